@@ -0,0 +1,252 @@
+"""
+Benchmarks the storages, the MovieApp queries and the website generation on synthetic libraries.
+Run it from the project root, results are written as JSON and can be compared against a saved baseline:
+
+    python -m benchmarks.run_benchmarks --sizes 1000 100000 --output benchmarks/results/baseline.json
+    python -m benchmarks.run_benchmarks --sizes 1000 100000 --baseline benchmarks/results/baseline.json
+"""
+import argparse
+import builtins
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from contextlib import contextmanager, redirect_stdout
+from movie_app.movie_app import MovieApp
+from storage import movie_analytics
+from storage.storage_binary import StorageBinary
+from storage.storage_cache import StorageCache
+from storage.storage_csv import StorageCSV
+from storage.storage_json import StorageJson
+from storage.storage_sqlite import StorageSQLite
+from tests.helpers import StubOmdbClient, generate_movies
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HTML_TEMPLATE_PATH = os.path.join(PROJECT_ROOT, "static", "index_template.html")
+DEFAULT_OUTPUT_PATH = os.path.join(PROJECT_ROOT, "benchmarks", "results", "latest.json")
+DEFAULT_SIZES = (1000, 100000, 1000000)
+STORAGE_TYPES = {
+    "json": (StorageJson, ".json"),
+    "csv": (StorageCSV, ".csv"),
+    "sqlite": (StorageSQLite, ".sqlite"),
+    "mvdb": (StorageBinary, ".mvdb")
+}
+IMPORT_BATCH_SIZE = 200
+
+
+def main() -> None:
+    """Runs the selected benchmarks, writes the results and compares them against the baseline"""
+    args = parse_args()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="movie_benchmarks_", dir=args.work_dir) as work_dir:
+        for size in args.sizes:
+            print(f"Generating {size} movies...")
+            movies = generate_movies(size, seed=args.seed)
+            for storage_type in args.backends:
+                results.update(benchmark_storage(storage_type, movies, work_dir, args.repeat))
+            if not args.skip_app:
+                results.update(benchmark_app(args.app_backend, movies, work_dir, args.repeat))
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": movie_analytics.is_numpy_available(),
+            "repeat": args.repeat,
+            "sizes": args.sizes
+        },
+        "results": results
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=4)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_results(results, baseline["results"], args.threshold, args.min_difference / 1000)
+        if regressions:
+            print(f"{len(regressions)} benchmarks are more than {args.threshold:.0%} slower than the baseline!")
+            sys.exit(1)
+        print("No regressions compared to the baseline.")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parses the command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark the storages, queries and website generation")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="numbers of movies of the synthetic libraries")
+    parser.add_argument('--backends', nargs='+', choices=list(STORAGE_TYPES), default=list(STORAGE_TYPES),
+                        help="storages to benchmark")
+    parser.add_argument('--app-backend', choices=list(STORAGE_TYPES), default="json",
+                        help="storage used for the MovieApp and website benchmarks")
+    parser.add_argument('--skip-app', action='store_true',
+                        help="only benchmark the storages")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per benchmark, the median gets compared")
+    parser.add_argument('--seed', type=int, default=42,
+                        help="seed of the synthetic libraries")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH,
+                        help="JSON file the results are written to")
+    parser.add_argument('--baseline',
+                        help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown compared to the baseline which counts as regression")
+    parser.add_argument('--min-difference', type=float, default=1,
+                        help="slowdown in milliseconds below which a benchmark never counts as regression")
+    parser.add_argument('--work-dir',
+                        help="directory for the temporary databases, defaults to the system temp directory")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat has to be at least 1")
+    return args
+
+
+def benchmark_storage(storage_type: str, movies: list[dict], work_dir: str, repeat: int) -> dict:
+    """
+    Times writing, loading, adding, updating, deleting and validating on a storage filled with movies.
+    Loading and validating use a new storage instance every run, like starting the program.
+    :return: dict of benchmark names and their timings
+    """
+    storage_class, extension = STORAGE_TYPES[storage_type]
+    file_path = os.path.join(work_dir, f"library_{len(movies)}{extension}")
+    storage = storage_class(file_path)
+    prefix = f"storage/{storage_type}/{len(movies)}"
+
+    benchmarks = {
+        "write_all": lambda run: storage.replace_movies_data(movies),
+        "load": lambda run: storage_class(file_path).get_movies_data(),
+        "add": lambda run: storage.write_movies_data(f"Benchmark Movie {run}", 2000, 7.5, None),
+        "update": lambda run: storage.update_movie_data(movies[run % len(movies)]["title"], f"Note {run}"),
+        "delete": lambda run: storage.delete_movie_data(f"Benchmark Movie {run}"),
+        "validate": lambda run: storage_class(file_path).validate_data()
+    }
+    return run_benchmarks(prefix, benchmarks, repeat)
+
+
+def benchmark_app(storage_type: str, movies: list[dict], work_dir: str, repeat: int) -> dict:
+    """
+    Times the MovieApp menu actions on a cached storage filled with movies, with a stub in place of OMDB.
+    The answers the actions ask for are given by scripted_input(), their output is discarded.
+    The website gets generated by a new generator (cold) and again without changes (warm).
+    :return: dict of benchmark names and their timings
+    """
+    storage_class, extension = STORAGE_TYPES[storage_type]
+    library_path = os.path.join(work_dir, f"app_library_{len(movies)}{extension}")
+    storage_class(library_path).replace_movies_data(movies)
+    storage = storage_class(library_path)
+    if not isinstance(storage, StorageSQLite):
+        # Like in main.py, SQLite answers queries itself
+        storage = StorageCache(storage)
+    html_output_path = os.path.join(work_dir, f"site_{len(movies)}", "index.html")
+    os.makedirs(os.path.dirname(html_output_path), exist_ok=True)
+    prefix = f"app/{storage_type}/{len(movies)}"
+
+    def create_app() -> MovieApp:
+        return MovieApp(storage, HTML_TEMPLATE_PATH, html_output_path, omdb_client=StubOmdbClient())
+
+    def import_titles(run: int) -> None:
+        titles_path = os.path.join(work_dir, f"import_{len(movies)}_{run}.txt")
+        with open(titles_path, "w", encoding="utf-8") as titles_file:
+            titles_file.writelines(f"Imported Movie {run} {number}\n" for number in range(IMPORT_BATCH_SIZE))
+            titles_file.write(f"Unknown Movie {run}\n")
+        app.import_movies_from_file(titles_path)
+
+    website_apps = []
+
+    def generate_website_cold(run: int) -> None:
+        website_apps.append(create_app())
+        website_apps[-1].generate_website()
+
+    def generate_website_warm(run: int) -> None:
+        # The generator of the last cold run has seen the current library already
+        website_apps[-1].generate_website()
+
+    app = create_app()
+    storage.get_movies_data()
+    benchmarks = {
+        "list": lambda run: app.list_movies(),
+        "filter": lambda run: scripted_call(app.filter_movies, "7", "1990", "2010"),
+        "sort_rating": lambda run: app.movies_sorted_by_rating(),
+        "sort_year": lambda run: scripted_call(app.movies_sorted_by_year, "y"),
+        "search": lambda run: scripted_call(app.search_movie, "night 12"),
+        "search_typo": lambda run: scripted_call(app.search_movie, "nihgt reiver"),
+        "stats": lambda run: app.movie_stats(),
+        "import": import_titles,
+        "website_cold": generate_website_cold,
+        "website_warm": generate_website_warm
+    }
+    return run_benchmarks(prefix, benchmarks, repeat)
+
+
+def run_benchmarks(prefix: str, benchmarks: dict[str, Callable[[int], object]], repeat: int) -> dict:
+    """
+    Runs every benchmark repeat times with the number of the run as argument and discards its output.
+    :return: dict of "prefix/name" and the median, minimum and all run times in seconds
+    """
+    results = {}
+    for name, benchmark in benchmarks.items():
+        run_times = []
+        for run in range(repeat):
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                start_time = time.perf_counter()
+                benchmark(run)
+                run_times.append(time.perf_counter() - start_time)
+        results[f"{prefix}/{name}"] = {
+            "median": statistics.median(run_times),
+            "min": min(run_times),
+            "runs": run_times
+        }
+        print(f"{prefix}/{name}: {statistics.median(run_times) * 1000:.2f} ms")
+    return results
+
+
+def compare_results(results: dict, baseline_results: dict, threshold: float, min_difference: float = 0.0) -> list[str]:
+    """
+    Prints the change of every benchmark median compared to the baseline.
+    Benchmarks missing in one of them are skipped, slowdowns below min_difference seconds are treated as noise.
+    :return: names of the benchmarks which got slower by more than threshold
+    """
+    regressions = []
+    for name, timing in results.items():
+        if name not in baseline_results:
+            continue
+        baseline_median = baseline_results[name]["median"]
+        ratio = timing["median"] / baseline_median if baseline_median else 1.0
+        marker = ""
+        if ratio > 1 + threshold and timing["median"] - baseline_median > min_difference:
+            regressions.append(name)
+            marker = " REGRESSION"
+        print(f"{name}: {baseline_median * 1000:.2f} ms -> {timing['median'] * 1000:.2f} ms ({ratio:.2f}x){marker}")
+    return regressions
+
+
+@contextmanager
+def scripted_input(*answers: str):
+    """Answers the input() prompts with the given answers while the with block runs"""
+    remaining_answers = iter(answers)
+    original_input = builtins.input
+    builtins.input = lambda prompt="": next(remaining_answers)
+    try:
+        yield
+    finally:
+        builtins.input = original_input
+
+
+def scripted_call(function: Callable[[], object], *answers: str) -> None:
+    """Calls a menu action with scripted answers to its prompts"""
+    with scripted_input(*answers):
+        function()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,171 @@
+import argparse
+import os
 import sys
-from movie_app.movie_app import MovieApp
-from storage.storage_json import StorageJson
-from storage.storage_csv import StorageCSV
+from movie_app import movie_cli
+from movie_app.perf_stats import STORAGE_METHODS, PerfStats
+from storage.file_types import DATABASE_EXTENSIONS, FILE_TYPES, get_storage_class
+from storage.istorage import IStorage
 
 
 HTML_TEMPLATE_PATH = 'static/index_template.html'
 HTML_OUTPUT_PATH = 'static/index.html'
+OMDB_CACHE_PATH = 'data/omdb_cache.sqlite'
+PROFILE_DIRECTORY = 'data/profile'
+DATA_DIRECTORY = 'data'
 
 
 def main():
     """
     Instantiate IStorage object, MovieApp object and call the run method from MovieApp object.
+    If the arguments start with a command (e.g. list or add), it runs the command and exits instead.
     """
-    if check_sys_input():
-        filetype, username = check_sys_input()
-        if filetype == 'csv':
-            print(f"\nWelcome {username}, you're using your csv database.")
-            storage = StorageCSV(f'data/{username}_movie_database.csv')
-            movie_app = MovieApp(storage, HTML_TEMPLATE_PATH, HTML_OUTPUT_PATH)
-            movie_app.run()
-        elif filetype == 'json':
-            print(f"\nWelcome {username}, you're using your json database.")
-            storage = StorageJson(f'data/{username}_movie_database.json')
-            movie_app = MovieApp(storage, HTML_TEMPLATE_PATH, HTML_OUTPUT_PATH)
-            movie_app.run()
+    if movie_cli.is_command(sys.argv[1:]):
+        sys.exit(movie_cli.run(sys.argv[1:], open_database, HTML_TEMPLATE_PATH, HTML_OUTPUT_PATH, OMDB_CACHE_PATH))
+
+    # Only the interactive menu needs them, commands import them on demand
+    from movie_app.movie_app import MovieApp
+    from movie_app.omdb_cache import OmdbCache
+    args = parse_args()
+    if args.convert_to or args.convert_all:
+        convert_databases(args)
+        return
+
+    omdb_cache = OmdbCache(OMDB_CACHE_PATH)
+    page_size = args.limit if args.limit > 0 else None
+    website_page_size = args.site_page_size if args.site_page_size > 0 else None
+    render_workers = args.render_workers if args.render_workers > 0 else None
+    poster_mirror = None
+    if args.mirror_posters:
+        from movie_app.poster_mirror import PosterMirror
+        poster_mirror = PosterMirror(os.path.dirname(HTML_OUTPUT_PATH))
+    perf_stats = PerfStats.from_environment(args.profile, args.cprofile)
+    sys_input = check_sys_input(args.database)
+    if sys_input:
+        filetype, username = sys_input
+        print(f"\nWelcome {username}, you're using your {filetype} database.")
+        storage = create_storage(filetype, f'data/{username}_movie_database', perf_stats)
     else:
         print("""
         No parameters given or invalid.
-        Remember: Parameters have to end with .csv or .json
+        Remember: Parameters have to end with .csv, .json, .db, .sqlite or .mvdb
         Starting program with default database, feel free to quit.
         """)
-        storage = StorageJson('data/movie_database.json')
-        movie_app = MovieApp(storage,HTML_TEMPLATE_PATH, HTML_OUTPUT_PATH)
+        storage = create_storage('json', 'data/movie_database', perf_stats)
+
+    movie_app = MovieApp(storage, HTML_TEMPLATE_PATH, HTML_OUTPUT_PATH, omdb_cache, page_size, args.offset,
+                         website_page_size, args.site_shard, poster_mirror, render_workers, perf_stats=perf_stats)
+    try:
         movie_app.run()
+    finally:
+        if perf_stats is not None:
+            written_paths = perf_stats.dump(PROFILE_DIRECTORY)
+            print(f"Perf stats written to {', '.join(written_paths)}")
+
+
+def open_database(database: str|None) -> IStorage:
+    """Returns the storage of a database argument like username.json, the default database if it is invalid"""
+    sys_input = check_sys_input(database)
+    if sys_input:
+        filetype, username = sys_input
+        return create_storage(filetype, f'data/{username}_movie_database')
+    return create_storage('json', 'data/movie_database')
+
+
+def create_storage(filetype: str, base_path: str, perf_stats: PerfStats|None = None) -> IStorage:
+    """
+    Instantiates the storage of a filetype returned by check_sys_input(), base_path is the path without extension.
+    With perf_stats the file storage below the cache gets instrumented, to tell loading and parsing apart
+    from cached reads.
+    """
+    # Only the selected storage gets imported, so commands start fast
+    storage_class = get_storage_class(filetype)
+    if filetype == 'sqlite':
+        return storage_class(f'{base_path}.sqlite')
+    from storage.storage_cache import StorageCache
+    file_storage = storage_class(f'{base_path}.{filetype}')
+    if perf_stats is not None:
+        perf_stats.instrument(file_storage, STORAGE_METHODS, f"{filetype}_file")
+    return StorageCache(file_storage)
+
+
+def convert_databases(args: argparse.Namespace) -> None:
+    """
+    Streams the movies of the database argument into the file given by --convert-to,
+    or converts every database in data/ into the format given by --convert-all, in parallel processes.
+    """
+    # Conversion needs all storages and a process pool, it's only imported when converting
+    from storage import conversion
+    if args.convert_to:
+        source_path = get_database_path(args.database)
+        try:
+            count = conversion.convert_database(source_path, args.convert_to)
+        except conversion.CONVERSION_ERRORS as error:
+            print(f"Can't convert: {error}")
+            return
+        print(f"Converted {count} movies from {source_path} to {args.convert_to}")
+
+    if args.convert_all:
+        max_workers = args.convert_workers if args.convert_workers > 0 else None
+        results = conversion.convert_directory(DATA_DIRECTORY, args.convert_all, max_workers)
+        if not results:
+            print(f"No databases to convert in {DATA_DIRECTORY}")
+        for result in results:
+            if result["error"] is None:
+                print(f"Converted {result['count']} movies from {result['source']} to {result['target']}")
+            else:
+                print(f"Can't convert {result['source']}: {result['error']}")
+
+
+def get_database_path(database: str|None) -> str:
+    """Returns the file path of a database argument like username.json, see open_database()"""
+    sys_input = check_sys_input(database)
+    if sys_input:
+        filetype, username = sys_input
+        return f'{DATA_DIRECTORY}/{username}_movie_database.{filetype}'
+    return f'{DATA_DIRECTORY}/movie_database.json'
+
+
+def parse_args() -> argparse.Namespace:
+    """Parses the command line arguments"""
+    parser = argparse.ArgumentParser(description="Access and write movie data")
+    parser.add_argument('database', nargs='?',
+                        help="your database, e.g. username.json, username.csv, username.db, username.sqlite or username.mvdb")
+    parser.add_argument('--limit', type=int, default=20,
+                        help="movies per page when listing, sorting, filtering or searching, 0 shows all at once")
+    parser.add_argument('--offset', type=int, default=0,
+                        help="number of movies to skip before the first page")
+    parser.add_argument('--site-page-size', type=int, default=0,
+                        help="movies per page of the generated website, 0 puts all movies on a single page")
+    parser.add_argument('--site-shard', choices=["decade", "rating"],
+                        help="split the paged website into separate pages per decade or per whole rating")
+    parser.add_argument('--mirror-posters', action='store_true',
+                        help="download the posters into static/posters and use the local copies on the website")
+    parser.add_argument('--render-workers', type=int, default=1,
+                        help="processes serializing the website of large libraries, 0 uses one per CPU core")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"record timings, bytes and cache hits, shown in the menu and written to {PROFILE_DIRECTORY}"
+                             " on exit (also enabled by MOVIE_APP_PROFILE=1)")
+    parser.add_argument('--cprofile', action='store_true',
+                        help="like --profile, additionally writes a cProfile profile per menu action")
+    parser.add_argument('--convert-to', metavar='PATH',
+                        help="stream all movies into the database file PATH, e.g. data/movies.mvdb"
+                             " or an export.ndjson, and exit")
+    parser.add_argument('--convert-all', metavar='FORMAT',
+                        choices=[extension.lstrip('.') for extension in DATABASE_EXTENSIONS],
+                        help=f"convert every database in {DATA_DIRECTORY} into FORMAT (json, csv, db, sqlite, mvdb"
+                             " or ndjson, db is written as .sqlite) next to it and exit")
+    parser.add_argument('--convert-workers', type=int, default=0,
+                        help="processes converting databases for --convert-all, 0 uses one per CPU core")
+    return parser.parse_args()
 
 
-def check_sys_input() -> None|tuple:
-    if len(sys.argv) > 1:
-        user_data = sys.argv[1].lower()
-        if user_data.endswith('.csv'):
-            filetype = 'csv'
-            username = user_data[0:-4]
-        elif user_data.endswith('.json'):
-            filetype = 'json'
-            username = user_data[0:-5]
-        else:
+def check_sys_input(database: str|None) -> None|tuple:
+    if database:
+        # Same extension mapping as the conversion, username.db and username.sqlite are both a sqlite database
+        username, extension = os.path.splitext(database.lower())
+        if extension not in FILE_TYPES:
             return None
-        return filetype, username
+        return FILE_TYPES[extension], username
     return None
 
 
@@ -1,32 +1,148 @@
-import statistics, random, requests, os
+import functools
+import random, os, csv, sys
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain, islice
+from typing import TYPE_CHECKING
 from storage.istorage import IStorage
-from dotenv import load_dotenv
+from movie_app.omdb_cache import OmdbCache
+from movie_app.perf_stats import MOVIE_APP_ACTIONS, STORAGE_METHODS, PerfStats
+
+# requests and dotenv are imported when OMDB is used first, so commands without network access start fast
+if TYPE_CHECKING:
+    from movie_app.omdb_client import OmdbClient
+    from movie_app.poster_mirror import PosterMirror
+
+
+OUTPUT_BATCH_SIZE = 500
 
 
 class MovieApp:
-    def __init__(self, storage, html_template_path: str, html_output_path: str) -> None:
+    def __init__(self, storage, html_template_path: str, html_output_path: str,
+                 omdb_cache: OmdbCache|None = None, page_size: int|None = 20, offset: int = 0,
+                 website_page_size: int|None = None, website_shard_by: str|None = None,
+                 poster_mirror: "PosterMirror|None" = None, render_workers: int|None = 1,
+                 omdb_client: "OmdbClient|None" = None, perf_stats: PerfStats|None = None) -> None:
         if not isinstance(storage, IStorage):
             raise TypeError(f"Expected storage to be instance of IStorage, got {type(storage).__name__} instead.")
+        if page_size is not None and page_size < 1:
+            raise ValueError("page_size has to be at least 1")
+        if offset < 0:
+            raise ValueError("offset can't be negative")
+        if website_page_size is not None and website_page_size < 1:
+            raise ValueError("website_page_size has to be at least 1")
         self._storage = storage
         self._html_template_path = html_template_path
         self._html_output_path = html_output_path
-
-        load_dotenv()
-        self._api_key = os.getenv('API_KEY')
+        self._page_size = page_size
+        self._offset = offset
+        self._pending_page = None
+        self._website_generator = None
+        self._website_page_size = website_page_size
+        self._website_shard_by = website_shard_by
+        self._poster_mirror = poster_mirror
+        self._render_workers = render_workers
+
+        # Any object with get_movie_by_title() can replace the client, e.g. a stub in benchmarks
+        self._omdb_client = omdb_client
+        self._omdb_cache = omdb_cache
+
+        self._perf_stats = perf_stats
+        if perf_stats is not None:
+            perf_stats.instrument(self._storage, STORAGE_METHODS, "storage")
+            if omdb_client is not None:
+                perf_stats.instrument(omdb_client, ["get_movie_by_title"], "omdb")
+            perf_stats.instrument(self, MOVIE_APP_ACTIONS, "action", profile_calls=True)
+            if hasattr(self._storage, "get_cache_stats"):
+                perf_stats.register_cache("storage", self._storage)
+            if omdb_cache is not None:
+                perf_stats.register_cache("omdb", omdb_cache)
+            if poster_mirror is not None:
+                perf_stats.instrument(poster_mirror, ["mirror"], "posters")
 
     def list_movies(self):
         """
-        Gets data from self._storage.get_movies_data() and prints out
-        all the movies currently existing in movie_database.json
+        Gets the number of movies from self._storage
+        and prints out the first page of the movies currently existing in the database.
         """
-        movies = self._storage.get_movies_data()
-        print(f"{len(movies)} movies in total")
-        for movie in movies:
-            movie_name = movie.get('title')
-            movie_rating = movie.get('rating')
-            movie_year = movie.get('year')
-            movie_note = movie.get('note', 'Add a Note')
-            print(f"{movie_name} ({movie_year}): {movie_rating}, Note: {movie_note}")
+        print(f"{self._storage.count_movies()} movies in total")
+        self._print_movies(self._storage.iter_query, with_note=True)
+
+    def next_page(self):
+        """Prints the next page of the last list, sort, filter or search results"""
+        if self._pending_page is None:
+            print("There is no next page.")
+            return
+        query, offset, with_note = self._pending_page
+        self._print_page(query, offset, with_note)
+
+    def _print_movies(self, query: Callable[..., Iterable[dict]], header: str|None = None,
+                      with_note: bool = False) -> bool:
+        """
+        Skips the first self._offset movies returned by query(limit=...) and prints the first page of the others.
+        The header gets printed before the first page if there are movies.
+        :return: False if there were no movies to print
+        """
+        self._pending_page = None
+        return self._print_page(query, self._offset, with_note, header)
+
+    def _print_page(self, query: Callable[..., Iterable[dict]], offset: int, with_note: bool,
+                    header: str|None = None) -> bool:
+        """
+        Prints a page of the movies returned by query(limit=...) starting at offset, batching the lines
+        into few writes to stdout. One more movie than fits on the page is fetched to know if there is a next page.
+        Only the query and the offset of the next page are kept for next_page(), which runs the query again,
+        so no cursor of the storage (e.g. a SQLite read lock) stays open between menu actions.
+        :return: False if there were no movies to print
+        """
+        page_end = offset + self._page_size if self._page_size is not None else None
+        movies = iter(query(limit=page_end + 1 if page_end is not None else None))
+        try:
+            page_movies = islice(movies, offset, None)
+            first_movie = next(page_movies, None)
+            if first_movie is None:
+                self._pending_page = None
+                return False
+            if header is not None:
+                print(header)
+
+            printed_count = 0
+            has_next_page = False
+            batch = []
+            for movie in chain([first_movie], page_movies):
+                if printed_count == self._page_size:
+                    has_next_page = True
+                    break
+                batch.append(self._format_movie(movie, with_note))
+                printed_count += 1
+                if len(batch) == OUTPUT_BATCH_SIZE:
+                    sys.stdout.write("\n".join(batch) + "\n")
+                    batch.clear()
+            if batch:
+                sys.stdout.write("\n".join(batch) + "\n")
+        finally:
+            # Generators release their cursor right away, others when the last reference is dropped
+            if hasattr(movies, "close"):
+                movies.close()
+
+        if has_next_page:
+            self._pending_page = (query, offset + printed_count, with_note)
+            print("Choose 'N' in the menu to show the next page.")
+        else:
+            self._pending_page = None
+        return True
+
+    def _forget_pending_pages(self) -> None:
+        """Drops the pending pages, gets called when the movies were modified"""
+        self._pending_page = None
+
+    @staticmethod
+    def _format_movie(movie: dict, with_note: bool = False) -> str:
+        """Returns a movie as printable string, with its note if with_note is True"""
+        movie_line = f"{movie.get('title')} ({movie.get('year')}): {movie.get('rating')}"
+        if with_note:
+            movie_line += f", Note: {movie.get('note', 'Add a Note')}"
+        return movie_line
 
     def add_movies(self):
         """
@@ -48,16 +164,122 @@ class MovieApp:
         if self._movie_already_exists(movie_title):
             print(f"Movie {movie_title} already exists in your database.")
         else:
+            self._forget_pending_pages()
             self._storage.write_movies_data(movie_title, movie_year, movie_rating, movie_poster_url)
             print(f"Movie {movie_title} successfully added")
 
+    def import_movies(self):
+        """
+        Asks user for a text file (one title per line) or a CSV file (title column) and
+        imports all movies in it with import_movies_from_file().
+        """
+        file_path = input("Enter path of the file to import: ").strip()
+        if not os.path.isfile(file_path):
+            print(f"File {file_path} doesn't exist!")
+            return
+        self.import_movies_from_file(file_path)
+
+    def import_movies_from_file(self, file_path: str, max_workers: int = 8) -> tuple[list[dict], list[str]]:
+        """
+        Reads all titles from a file and imports them with import_titles(),
+        titles which couldn't be resolved get written to <file_path>.failures.txt.
+        :return: tuple of added movies and failed titles
+        """
+        new_movies, failed_titles = self.import_titles(self._read_titles_from_file(file_path), max_workers)
+        if failed_titles:
+            failures_path = f"{file_path}.failures.txt"
+            with open(failures_path, "w", encoding='utf-8') as failures_file:
+                failures_file.writelines(f"{title}\n" for title in failed_titles)
+            print(f"{len(failed_titles)} titles not found, see {failures_path}")
+        return new_movies, failed_titles
+
+    def import_titles(self, new_titles: list[str], max_workers: int = 8) -> tuple[list[dict], list[str]]:
+        """
+        Skips duplicates and titles already in the database and resolves the remaining ones
+        with lookup_movies(). All found movies get written to storage with a single write.
+        :return: tuple of added movies and titles which couldn't be resolved
+        """
+        existing_titles = {movie["title"].casefold() for movie in self._storage.get_movies_data()}
+        titles = []
+        seen_titles = set(existing_titles)
+        for title in new_titles:
+            if title.casefold() not in seen_titles:
+                seen_titles.add(title.casefold())
+                titles.append(title)
+
+        print(f"Importing {len(titles)} new titles...")
+        found_movies, failed_titles = self.lookup_movies(titles, max_workers)
+
+        new_movies = []
+        for movie in found_movies:
+            # Different spellings can resolve to the same OMDB movie
+            if movie["title"].casefold() not in existing_titles:
+                existing_titles.add(movie["title"].casefold())
+                new_movies.append(movie)
+
+        if new_movies:
+            self._forget_pending_pages()
+            self._storage.write_many_movies_data(new_movies)
+        print(f"{len(new_movies)} movies successfully imported")
+        return new_movies, failed_titles
+
+    def lookup_movies(self, titles: list[str], max_workers: int = 8) -> tuple[list[dict], list[str]]:
+        """
+        Resolves titles concurrently against OMDB with a bounded thread pool, without touching the storage.
+        :return: tuple of the found movies (in the order of titles) and the titles which couldn't be resolved
+        """
+        responses = {}
+        if titles:
+            # Created before the threads share it
+            self._get_omdb_client()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._get_movie_by_name_from_omdb_api, title): title for title in titles}
+            for done_count, future in enumerate(as_completed(futures), start=1):
+                responses[futures[future]] = future.result()
+                if done_count % 50 == 0 or done_count == len(titles):
+                    print(f"Resolved {done_count}/{len(titles)} titles")
+
+        found_movies = []
+        failed_titles = []
+        for title in titles:
+            res = responses[title]
+            if res is None:
+                failed_titles.append(title)
+                continue
+            movie_title, movie_year, movie_rating, movie_poster_url = self._extract_info_from_movie_dict(res)
+            found_movies.append({
+                "title": movie_title,
+                "year": movie_year,
+                "rating": movie_rating,
+                "poster_url": movie_poster_url
+            })
+        return found_movies, failed_titles
+
+    @staticmethod
+    def _read_titles_from_file(file_path: str) -> list[str]:
+        """
+        Reads titles from a CSV file (column "title" or the first column) or from a text file (one title per line).
+        Empty lines are skipped.
+        """
+        with open(file_path, "r", newline='', encoding='utf-8') as file_reader:
+            if file_path.lower().endswith('.csv'):
+                rows = list(csv.reader(file_reader))
+                if not rows:
+                    return []
+                header = [column.strip().lower() for column in rows[0]]
+                if 'title' in header:
+                    title_index = header.index('title')
+                    rows = rows[1:]
+                else:
+                    title_index = 0
+                lines = [row[title_index] for row in rows if len(row) > title_index]
+            else:
+                lines = file_reader.read().splitlines()
+        return [line.strip() for line in lines if line.strip()]
+
     def _movie_already_exists(self, title: str) -> bool:
-        """Check current storage if movie is already present, returns bool"""
-        movie_exists = False
-        for item in self._storage.get_movies_data():
-            if title == item['title']:
-                movie_exists = True
-        return movie_exists
+        """Check current storage if movie is already present (case-insensitive), returns bool"""
+        return self._storage.get_movie(title) is not None
 
     @staticmethod
     def _extract_info_from_movie_dict(res: dict) -> tuple[str, int, float, str]:
@@ -73,55 +295,56 @@ class MovieApp:
 
     def _get_movie_by_name_from_omdb_api(self, name: str) -> dict|None:
         """
-        Parse movie name to OMDB API, fetch a JSON and convert to dict.
+        Parse movie name to self._omdb_client, which fetches the movie from the OMDB API as dict.
         """
         try:
-            res = requests.get(f'http://www.omdbapi.com/?i=tt3896198&apikey={self._api_key}&t={name}')
-            res = res.json()
-            if self._validate_request(res):
-                return res
-            else:
-                return None
+            return self._get_omdb_client().get_movie_by_title(name)
         except Exception as e:
             print("Error:", e)
             return None
 
-    @staticmethod
-    def _validate_request(res: dict) -> bool:
-        """Check if returned dict from request has valid data"""
-        return 'Title' in res.keys()
+    def _get_omdb_client(self) -> "OmdbClient":
+        """Creates the OMDB client with the API key from the .env file on first use"""
+        if self._omdb_client is None:
+            from dotenv import load_dotenv
+            from movie_app.omdb_client import OmdbClient
+            load_dotenv()
+            self._omdb_client = OmdbClient(os.getenv('API_KEY'), self._omdb_cache)
+            if self._perf_stats is not None:
+                self._perf_stats.instrument(self._omdb_client, ["get_movie_by_title"], "omdb")
+        return self._omdb_client
 
     def delete_movie(self):
         """
-        Asks user for movie to delete.
-        Then parses the string to self._storage.delete_movie_data()
+        Asks user for movie to delete and looks it up with self._storage.get_movie() (case-insensitive).
+        Then parses the stored title to self._storage.delete_movie_data()
         If movie doesn't exist it lets the user know.
         """
-        movies = self._storage.get_movies_data()
-        movie_titles = [movie["title"] for movie in movies]
         user_input_movie_name = input("Enter name of movie you want to delete: ")
+        movie = self._storage.get_movie(user_input_movie_name)
 
-        if user_input_movie_name in movie_titles:
-            self._storage.delete_movie_data(user_input_movie_name)
-            print(f"Movie {user_input_movie_name} successfully deleted!")
+        if movie is not None:
+            self._forget_pending_pages()
+            self._storage.delete_movie_data(movie["title"])
+            print(f"Movie {movie["title"]} successfully deleted!")
         else:
             print(f"Movie {user_input_movie_name} doesn't exist!")
 
     def update_movie(self):
         """
-        Asks user for movie name to update.
+        Asks user for movie name to update and looks it up with self._storage.get_movie() (case-insensitive).
         If movie exist in database user is prompted to enter a note for the movie.
         If movie doesn't exist prints an error message.
         """
-        movies = self._storage.get_movies_data()
-        movie_titles = [movie["title"] for movie in movies]
         user_input_movie_name = input("Enter name of movie you want to add a note to: ")
+        movie = self._storage.get_movie(user_input_movie_name)
 
-        if user_input_movie_name in movie_titles:
+        if movie is not None:
             while True:
                 try:
                     user_input_note = (input("Enter movie note: "))
-                    self._storage.update_movie_data(user_input_movie_name, user_input_note)
+                    self._forget_pending_pages()
+                    self._storage.update_movie_data(movie["title"], user_input_note)
                     print("Note successfully added!")
                     break
                 except ValueError:
@@ -131,32 +354,42 @@ class MovieApp:
 
     def movie_stats(self):
         """
-        Calls list_movies function to get all data and prints the average, median rating.
-        Also identifies the worst and best movies and saves them to a list.
-        Then parses both lists to print_list_of_tuple function to get a printable string.
+        Gets the rating statistics from self._storage.aggregate_ratings() and prints the average, median rating.
+        Then parses the lists of best and worst movies to get_printable_string_from_tuple to get a printable string.
+        Afterwards it prints the standard deviation and percentiles from self._storage.describe_ratings().
+        At the end it prints the number of movies, average rating and rating distribution per decade.
         """
-        movies = self._storage.get_movies_data()
-        rating_list = [float(movie["rating"]) for movie in movies]
-
-        average_rating = sum(rating_list) / len(rating_list)
-        median_rating = statistics.median(rating_list)
-
-        best_rating = max(rating_list)
-        worst_rating = min(rating_list)
-
-        best_movies = [(movie["title"], movie["rating"]) for movie in movies if float(movie["rating"]) == best_rating]
-        worst_movies = [(movie["title"], movie["rating"]) for movie in movies if float(movie["rating"]) == worst_rating]
-
-        print(f"Average rating: {round(average_rating, 1)}")
-        print(f"Median rating: {round(median_rating, 1)}")
-        print(f"Best movie(s): {self.get_printable_string_from_tuple(best_movies)}")
-        print(f"Worst movie(s): {self.get_printable_string_from_tuple(worst_movies)}")
+        stats = self._storage.aggregate_ratings()
+        if stats is None:
+            print("There are no movies to create stats for.")
+            return
+
+        print(f"Average rating: {round(stats['average'], 1)}")
+        print(f"Median rating: {round(stats['median'], 1)}")
+        print(f"Best movie(s): {self.get_printable_string_from_tuple(stats['best'])}")
+        print(f"Worst movie(s): {self.get_printable_string_from_tuple(stats['worst'])}")
+
+        distribution = self._storage.describe_ratings()
+        print(f"Standard deviation: {round(distribution['std_dev'], 2)}")
+        percentiles = ", ".join(
+            f"{percentile}%: {round(rating, 1)}" for percentile, rating in distribution['percentiles'].items()
+        )
+        print(f"Rating percentiles: {percentiles}")
+        print(f"Rating distribution (0-9): {self.get_histogram_string(distribution['histogram'])}")
+
+        print("Average rating and rating distribution (0-9) per decade:")
+        for decade, (decade_count, decade_average) in stats['per_decade'].items():
+            histogram = self.get_histogram_string(distribution['decade_histograms'][decade])
+            print(f"{decade}s: {round(decade_average, 1)} ({decade_count} movies) {histogram}")
 
     def random_movie(self):
         """
         uses the random module to get a pseudo-random entry from the movies list and prints it.
         """
         movies = self._storage.get_movies_data()
+        if not movies:
+            print("There are no movies to choose from.")
+            return
         random_movie_dictionary = random.choice(movies)
         title = random_movie_dictionary["title"]
         rating = random_movie_dictionary["rating"]
@@ -164,48 +397,34 @@ class MovieApp:
 
     def search_movie(self):
         """
-        Gets movies data from self._storage.get_movies_data() and asks user to enter part
-        of a movie name.
-        Creates a list of tuples to save all movies and their index in a list of tuples.
-        Then iterates over the created list and checks if user search term is part of any movie name,
-        if that's the case it saves this movies index in a different list.
-        At the end it checks if there were any matching movies found, if not user gets an error message.
-        If any movie(s) were found it iterates over the movies list of dictionaries and prints out every movie with
-        a matching index from the matching_movies_by_index list.
+        Asks user to enter part of a movie name and lets self._storage.search_movies() find
+        all movies containing the search term (case-insensitive).
+        If there were no matching movies found, it searches again allowing typos and suggests those movies,
+        otherwise the first page of matching movies gets printed.
         """
-        movies = self._storage.get_movies_data()
         user_search_term = input("Enter part of movie name: ")
-        all_movie_titles_with_index = [(i, movie["title"]) for i, movie in enumerate(movies)]
+        matching_movies = self._storage.search_movies(user_search_term)
 
-        matching_movie_by_index = []
-        for index, movie_title in enumerate(all_movie_titles_with_index):
-            if user_search_term.lower() in str(movie_title[1]).lower():
-                matching_movie_by_index.append(index)
-
-        if len(matching_movie_by_index) == 0:
-            print("Movie name not found!")
+        if len(matching_movies) == 0:
+            similar_movies = self._storage.search_movies(user_search_term, typo_tolerant=True)
+            if not self._print_movies(lambda limit: similar_movies[:limit], header="Movie name not found! Did you mean:"):
+                print("Movie name not found!")
         else:
-            for i, movie in enumerate(movies):
-                if i in matching_movie_by_index:
-                    print(f"{movie["title"]} ({movie["year"]}): {movie["rating"]}")
+            self._print_movies(lambda limit: matching_movies[:limit])
 
     def movies_sorted_by_rating(self):
         """
-        uses sorted() function to create a list of movies sorted by their rating.
-        Next it iterates over said list and prints out all movies with their info.
+        Lets self._storage.iter_query() produce the movies sorted by their rating.
+        Next it prints out the first page of movies with their info.
         """
-        movies = self._storage.get_movies_data()
-        movies_sorted_by_rating_list = sorted(movies, key=lambda x: x["rating"], reverse=True)
-        for movie in movies_sorted_by_rating_list:
-            print(f"{movie["title"]} ({movie["year"]}): {movie["rating"]}")
+        self._print_movies(functools.partial(self._storage.iter_query, order_by="rating", descending=True))
 
     def movies_sorted_by_year(self):
         """
         Asks user for sorting order.
-        Then uses sorted() function to create a list of movies sorted by their release year.
-        Next it iterates over said list and prints out all movies with their info.
+        Then lets self._storage.iter_query() produce the movies sorted by their release year.
+        Next it prints out the first page of movies with their info.
         """
-        movies = self._storage.get_movies_data()
         descending_order = False
         while True:
             user_choice = input("Do you want the latest movies first? (Y/N)\n")
@@ -217,45 +436,67 @@ class MovieApp:
             else:
                 print("Please enter 'Y' or 'N'")
 
-        movies_sorted_by_year_list = sorted(movies, key=lambda x: x["year"], reverse=descending_order)
-        for movie in movies_sorted_by_year_list:
-            print(f"{movie["title"]} ({movie["year"]}): {movie["rating"]}")
+        self._print_movies(functools.partial(self._storage.iter_query, order_by="year", descending=descending_order))
 
     def filter_movies(self):
         """
         Asks user for filter criteria, validates input with get_float_input() and get_int_input()
-        and creates a new list with filter applied.
-        If there are movies matching the filter prints them out, if not it prints an error message.
+        and lets self._storage.iter_query() produce the movies with filter applied.
+        If there are movies matching the filter prints the first page, if not it prints an error message.
         """
-        movies = self._storage.get_movies_data()
         minimum_rating = self.get_float_input("Enter minimum rating, leave blank for no filter: ")
         start_year = self.get_int_input("Enter start year, leave blank for no filter: ")
         end_year = self.get_float_input("Enter end year, leave blank for no filter: ")
 
-        filtered_movies = []
-        for movie in movies:
-            if minimum_rating is not None and movie["rating"] < minimum_rating:
-                continue
-            if start_year is not None and movie["year"] < start_year:
-                continue
-            if end_year is not None and movie["year"] > end_year:
-                continue
-            filtered_movies.append(movie)
+        filtered_movies = functools.partial(self._storage.iter_query, min_rating=minimum_rating,
+                                            year_range=(start_year, end_year))
 
-        if filtered_movies:
-            print("Filtered movies:")
-            for movie in filtered_movies:
-                print(f"{movie["title"]} ({movie["year"]}): {movie["rating"]}")
-        else:
+        if not self._print_movies(filtered_movies, header="Filtered movies:"):
             print("\nThere are no movies with your filters applied.")
 
-    def generate_website(self):
-        """"""
+    def generate_website(self) -> bool:
+        """
+        Lets the WebsiteGenerator write the website with all movies from self._storage.
+        The generator is kept between calls, so only changed movies get read and serialized again
+        and files are only written if they changed.
+        If a website page size is set, the movies are streamed into multiple pages instead of a single one.
+        If there is a poster mirror, missing posters get downloaded first and are embedded from the local copies.
+        :return: True if any file was written
+        """
         from movie_app.website_generator import WebsiteGenerator
-        movies = self._storage.get_movies_data()
-        generator = WebsiteGenerator(movies, self._html_template_path, self._html_output_path)
-        generator.generate_website()
-        print("Website successfully created!")
+        if self._website_generator is None:
+            self._website_generator = WebsiteGenerator(
+                [], self._html_template_path, self._html_output_path, self._poster_mirror, self._render_workers
+            )
+            if self._perf_stats is not None:
+                self._perf_stats.instrument(self._website_generator, ["update_website", "generate_pages"], "website")
+
+        if self._poster_mirror is not None:
+            print("Mirroring posters...")
+            downloaded_count, failed_count = self._poster_mirror.mirror(
+                movie["poster_url"] for movie in self._storage.iter_query()
+            )
+            print(f"{downloaded_count} posters downloaded, {failed_count} failed")
+
+        if self._website_page_size is not None:
+            written_files = self._website_generator.generate_pages(
+                self._storage.iter_query(), self._website_page_size, self._website_shard_by
+            )
+        else:
+            written_files = self._website_generator.update_website(self._storage)
+
+        if written_files:
+            print("Website successfully created!")
+        else:
+            print("Website is already up to date!")
+        return bool(written_files)
+
+    def show_perf_stats(self):
+        """Prints the recorded wall times, call counts, bytes and cache hits if profiling is enabled"""
+        if self._perf_stats is None:
+            print("Profiling is disabled, start the program with --profile or MOVIE_APP_PROFILE=1.")
+            return
+        print(self._perf_stats.format_table())
 
     @staticmethod
     def get_printable_string_from_tuple(a_list: list[tuple]) -> str:
@@ -271,6 +512,14 @@ class MovieApp:
         else:
             return f"{a_list[0][0]}, {a_list[0][1]}"
 
+    @staticmethod
+    def get_histogram_string(histogram: list[int]) -> str:
+        """
+        Helper function to convert the number of movies per whole rating into a string and returns it.
+        :return: string like "0 0 1 3 5 8 4 2 1 0"
+        """
+        return " ".join(str(count) for count in histogram)
+
     @staticmethod
     def get_float_input(prompt: str):
         """
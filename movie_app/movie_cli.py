@@ -0,0 +1,326 @@
+import argparse
+import json
+import os.path
+import shlex
+import sys
+from collections.abc import Callable, Iterable
+from contextlib import redirect_stdout
+from itertools import islice
+from storage.istorage import IStorage
+
+
+COMMANDS = ("add", "delete", "note", "list", "stats", "search", "build-site", "batch", "serve")
+
+
+class MovieCli:
+    """
+    Runs single commands on a storage without the interactive menu, e.g. from cron jobs or shell pipelines.
+    Every command returns a result dictionary with the key ok, which gets printed as text or as JSON.
+    MovieApp (and with it OMDB and the website generator) is only created for add and build-site,
+    so the other commands don't import or initialize anything they don't need.
+    """
+    def __init__(self, storage: IStorage, html_template_path: str, html_output_path: str,
+                 omdb_cache_path: str) -> None:
+        """Initializes the storage and the paths MovieApp gets created with"""
+        if not isinstance(storage, IStorage):
+            raise TypeError(f"Expected storage to be instance of IStorage, got {type(storage).__name__} instead.")
+
+        self._storage = storage
+        self._html_template_path = html_template_path
+        self._html_output_path = html_output_path
+        self._omdb_cache_path = omdb_cache_path
+        self._movie_app = None
+
+    def execute(self, args: argparse.Namespace) -> dict:
+        """Runs the command of parsed arguments, returns its result"""
+        match args.command:
+            case "add":
+                return self.add(read_titles(args.titles))
+            case "delete":
+                return self.delete(read_titles(args.titles))
+            case "note":
+                return self.note(args.title, args.note)
+            case "list":
+                return self.list_movies(args.limit, args.offset, args.sort, args.desc, args.min_rating,
+                                        args.start_year, args.end_year)
+            case "stats":
+                return self.stats()
+            case "search":
+                return self.search(args.term, args.typo)
+            case "build-site":
+                return self.build_site(args.site_page_size, args.site_shard, args.mirror_posters,
+                                       args.render_workers if args.render_workers > 0 else None)
+        raise ValueError(f"Unknown command {args.command}")
+
+    def add(self, titles: list[str]) -> dict:
+        """Looks the titles up on OMDB and adds the found movies, titles already in the database are skipped"""
+        new_movies, failed_titles = self.get_movie_app().import_titles(titles)
+        return {"command": "add", "ok": not failed_titles, "added": new_movies, "not_found": failed_titles}
+
+    def delete(self, titles: list[str]) -> dict:
+        """Deletes the movies with the titles (case-insensitive)"""
+        deleted_titles = []
+        missing_titles = []
+        for title in titles:
+            movie = self._storage.get_movie(title)
+            if movie is None:
+                missing_titles.append(title)
+            else:
+                self._storage.delete_movie_data(movie["title"])
+                deleted_titles.append(movie["title"])
+        return {"command": "delete", "ok": not missing_titles, "deleted": deleted_titles, "missing": missing_titles}
+
+    def note(self, title: str, note: str) -> dict:
+        """Sets the note of a movie (case-insensitive title)"""
+        movie = self._storage.get_movie(title)
+        if movie is None:
+            return {"command": "note", "ok": False, "missing": [title]}
+        self._storage.update_movie_data(movie["title"], note)
+        return {"command": "note", "ok": True, "title": movie["title"], "note": note}
+
+    def list_movies(self, limit: int|None = None, offset: int = 0, order_by: str|None = None,
+                    descending: bool = False, min_rating: float|None = None, start_year: int|None = None,
+                    end_year: int|None = None) -> dict:
+        """Lists the movies matching the filters, at most limit of them after skipping offset movies"""
+        movies = self._storage.iter_query(
+            min_rating=min_rating, year_range=(start_year, end_year), order_by=order_by, descending=descending,
+            limit=offset + limit if limit is not None else None
+        )
+        page = list(islice(movies, offset, offset + limit if limit is not None else None))
+        return {"command": "list", "ok": True, "movies": page}
+
+    def stats(self) -> dict:
+        """Returns the rating statistics and the rating distribution"""
+        stats = self._storage.aggregate_ratings()
+        if stats is None:
+            return {"command": "stats", "ok": True, "count": 0}
+        distribution = self._storage.describe_ratings()
+        return {
+            "command": "stats",
+            "ok": True,
+            "count": stats["count"],
+            "average": stats["average"],
+            "median": stats["median"],
+            "std_dev": distribution["std_dev"],
+            "best": [{"title": title, "rating": rating} for title, rating in stats["best"]],
+            "worst": [{"title": title, "rating": rating} for title, rating in stats["worst"]],
+            "percentiles": distribution["percentiles"],
+            "histogram": distribution["histogram"],
+            "per_decade": {
+                decade: {"count": decade_count, "average": decade_average}
+                for decade, (decade_count, decade_average) in stats["per_decade"].items()
+            }
+        }
+
+    def search(self, search_term: str, typo_tolerant: bool = False) -> dict:
+        """Searches the titles, falls back to a typo tolerant search if nothing contains the search term"""
+        movies = self._storage.search_movies(search_term, typo_tolerant=typo_tolerant)
+        if not movies and not typo_tolerant:
+            movies = self._storage.search_movies(search_term, typo_tolerant=True)
+            typo_tolerant = True
+        return {"command": "search", "ok": bool(movies), "typo_tolerant": typo_tolerant, "movies": movies}
+
+    def build_site(self, page_size: int|None = None, shard_by: str|None = None, mirror_posters: bool = False,
+                   render_workers: int|None = 1) -> dict:
+        """Generates the website, only changed files get written"""
+        poster_mirror = None
+        if mirror_posters:
+            from movie_app.poster_mirror import PosterMirror
+            poster_mirror = PosterMirror(os.path.dirname(self._html_output_path))
+        movie_app = self._create_movie_app(page_size, shard_by, poster_mirror, render_workers)
+        written = movie_app.generate_website()
+        return {"command": "build-site", "ok": True, "written": written, "path": self._html_output_path}
+
+    def run_batch(self, lines: Iterable[str], parser: argparse.ArgumentParser, output_json: bool,
+                  output=None) -> int:
+        """
+        Runs one command per line, e.g. add "The Matrix", all of them on the same storage.
+        Empty lines and lines starting with # are skipped, invalid lines are reported and skipped.
+        :return: exit code, 1 if any command failed
+        """
+        exit_code = 0
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                args = parser.parse_args(shlex.split(line))
+                if args.command == "batch":
+                    raise ValueError("batch can't be nested")
+                result = self.execute(args)
+            except SystemExit:
+                # argparse already explained the problem on stderr
+                result = {"command": line, "ok": False, "error": "invalid command"}
+            except ValueError as e:
+                result = {"command": line, "ok": False, "error": str(e)}
+            print_result(result, output_json, output)
+            if not result["ok"]:
+                exit_code = 1
+        return exit_code
+
+    def get_movie_app(self):
+        """
+        Returns the MovieApp for OMDB lookups, created on first use.
+        It is kept for further adds in batch mode and the server, so the OMDB connections get reused.
+        """
+        if self._movie_app is None:
+            self._movie_app = self._create_movie_app()
+        return self._movie_app
+
+    def _create_movie_app(self, website_page_size: int|None = None, website_shard_by: str|None = None,
+                          poster_mirror=None, render_workers: int|None = 1):
+        """Creates a MovieApp on the storage, imported here as it is only needed by add and build-site"""
+        from movie_app.movie_app import MovieApp
+        from movie_app.omdb_cache import OmdbCache
+        return MovieApp(self._storage, self._html_template_path, self._html_output_path,
+                        OmdbCache(self._omdb_cache_path), None, 0, website_page_size, website_shard_by,
+                        poster_mirror, render_workers)
+
+
+def is_command(argv: list[str]) -> bool:
+    """Checks if the command line arguments start with one of the COMMANDS, returns bool"""
+    return bool(argv) and argv[0] in COMMANDS
+
+
+def run(argv: list[str], open_storage: Callable[[str|None], IStorage], html_template_path: str,
+        html_output_path: str, omdb_cache_path: str) -> int:
+    """
+    Parses the command line arguments, runs the command on the storage open_storage returns for --db and
+    prints its result. Messages of the storages and MovieApp go to stderr, so stdout only contains the result.
+    :return: exit code, 1 if the command failed
+    """
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        from movie_app.movie_server import MovieServer
+        movie_server = MovieServer(open_storage(args.database), html_template_path, html_output_path, omdb_cache_path,
+                                   args.host, args.port, args.workers)
+        host, port = movie_server.server_address
+        print(f"Serving the movies on http://{host}:{port}/ (API under /api), press Ctrl+C to stop.")
+        movie_server.serve_forever()
+        return 0
+
+    output = sys.stdout
+    with redirect_stdout(sys.stderr):
+        movie_cli = MovieCli(open_storage(args.database), html_template_path, html_output_path, omdb_cache_path)
+        if args.command == "batch":
+            return movie_cli.run_batch(sys.stdin, parser, args.json, output)
+        result = movie_cli.execute(args)
+    print_result(result, args.json, output)
+    return 0 if result["ok"] else 1
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Creates the parser of all COMMANDS, each of them accepts --db and --json"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', dest='database',
+                        help="your database, e.g. username.json, username.csv, username.sqlite or username.mvdb")
+    common.add_argument('--json', action='store_true',
+                        help="print the result as JSON")
+
+    parser = argparse.ArgumentParser(prog="main.py", description="Run a single command on your movies and exit")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", parents=[common], help="add movies from OMDB")
+    add_parser.add_argument('titles', nargs='+', help="titles to add, - reads them from stdin (one per line)")
+
+    delete_parser = subparsers.add_parser("delete", parents=[common], help="delete movies")
+    delete_parser.add_argument('titles', nargs='+', help="titles to delete, - reads them from stdin (one per line)")
+
+    note_parser = subparsers.add_parser("note", parents=[common], help="set the note of a movie")
+    note_parser.add_argument('title')
+    note_parser.add_argument('note')
+
+    list_parser = subparsers.add_parser("list", parents=[common], help="list and filter movies")
+    list_parser.add_argument('--limit', type=int, help="maximum number of movies")
+    list_parser.add_argument('--offset', type=int, default=0, help="number of movies to skip")
+    list_parser.add_argument('--sort', choices=["title", "year", "rating"], help="sort the movies")
+    list_parser.add_argument('--desc', action='store_true', help="sort descending")
+    list_parser.add_argument('--min-rating', type=float)
+    list_parser.add_argument('--start-year', type=int)
+    list_parser.add_argument('--end-year', type=int)
+
+    subparsers.add_parser("stats", parents=[common], help="show rating statistics")
+
+    search_parser = subparsers.add_parser("search", parents=[common], help="search movie titles")
+    search_parser.add_argument('term')
+    search_parser.add_argument('--typo', action='store_true', help="allow typos in the search term")
+
+    site_parser = subparsers.add_parser("build-site", parents=[common], help="generate the website")
+    site_parser.add_argument('--site-page-size', type=int, help="movies per page, all on a single page by default")
+    site_parser.add_argument('--site-shard', choices=["decade", "rating"], help="separate pages per decade or rating")
+    site_parser.add_argument('--mirror-posters', action='store_true', help="download the posters")
+    site_parser.add_argument('--render-workers', type=int, default=1,
+                             help="processes serializing the website, 0 uses one per CPU core")
+
+    subparsers.add_parser("batch", parents=[common],
+                          help="run one command per line from stdin on the same database, e.g. add \"The Matrix\"")
+
+    serve_parser = subparsers.add_parser("serve", parents=[common],
+                                         help="serve the movies over a local HTTP API and the website")
+    serve_parser.add_argument('--host', default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument('--port', type=int, default=8000, help="port to listen on, 0 picks a free one")
+    serve_parser.add_argument('--workers', type=int, default=8, help="requests handled at the same time")
+    return parser
+
+
+def read_titles(titles: list[str]) -> list[str]:
+    """Returns the titles, a - is replaced by the lines of stdin"""
+    if "-" not in titles:
+        return titles
+    stdin_titles = [line.strip() for line in sys.stdin if line.strip()]
+    return [title for argument in titles for title in (stdin_titles if argument == "-" else [argument])]
+
+
+def print_result(result: dict, output_json: bool, output=None) -> None:
+    """Prints a command result as JSON (one line) or as text"""
+    output = output if output is not None else sys.stdout
+    if output_json:
+        print(json.dumps(result), file=output)
+        return
+
+    for line in format_result(result):
+        print(line, file=output)
+
+
+def format_result(result: dict) -> list[str]:
+    """Returns a command result as printable lines"""
+    if "error" in result:
+        return [f"Error in {result['command']}: {result['error']}"]
+
+    lines = []
+    match result["command"]:
+        case "add":
+            lines.extend(f"Added {format_movie(movie)}" for movie in result["added"])
+            lines.extend(f"Not found: {title}" for title in result["not_found"])
+        case "delete":
+            lines.extend(f"Deleted {title}" for title in result["deleted"])
+        case "note":
+            if result["ok"]:
+                lines.append(f"Note of {result['title']} set to {result['note']}")
+        case "list" | "search":
+            if result["command"] == "search" and result["typo_tolerant"] and result["movies"]:
+                lines.append("Did you mean:")
+            lines.extend(format_movie(movie) for movie in result["movies"])
+        case "stats":
+            if result["count"] == 0:
+                lines.append("There are no movies to create stats for.")
+            else:
+                lines.append(f"Movies: {result['count']}")
+                lines.append(f"Average rating: {round(result['average'], 1)}")
+                lines.append(f"Median rating: {round(result['median'], 1)}")
+                lines.append(f"Standard deviation: {round(result['std_dev'], 2)}")
+                lines.append(f"Best movie(s): {', '.join(movie['title'] for movie in result['best'])}")
+                lines.append(f"Worst movie(s): {', '.join(movie['title'] for movie in result['worst'])}")
+        case "build-site":
+            lines.append(f"{result['path']}: {'written' if result['written'] else 'unchanged'}")
+    lines.extend(f"Movie {title} doesn't exist!" for title in result.get("missing", []))
+    return lines
+
+
+def format_movie(movie: dict) -> str:
+    """Returns a movie as printable line, with its note if it has one"""
+    movie_line = f"{movie['title']} ({movie['year']}): {movie['rating']}"
+    if movie.get("note"):
+        movie_line += f", Note: {movie['note']}"
+    return movie_line
@@ -16,6 +16,9 @@ class MovieMenu:
         9. List all movies
         10. Update movie
         11. Generate Website
+        12. Import movies from file
+        N. Next page
+        P. Show perf stats
         Q. Quit
         """
 
@@ -53,6 +56,12 @@ class MovieMenu:
                     movie_app.update_movie()
                 case '11':
                     movie_app.generate_website()
+                case '12':
+                    movie_app.import_movies()
+                case 'n' | 'next':
+                    movie_app.next_page()
+                case 'p' | 'perf':
+                    movie_app.show_perf_stats()
                 case _:
                     print("Invalid input, please try again.")
 
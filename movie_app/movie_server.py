@@ -0,0 +1,420 @@
+import functools
+import json
+import os.path
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import parse_qs, unquote, urlsplit
+from movie_app.movie_cli import MovieCli
+from storage.istorage import IStorage
+
+
+# Larger request bodies are rejected, the API only receives titles and notes
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer handling the requests in a bounded thread pool instead of one new thread per request"""
+    def __init__(self, server_address: tuple, handler_class, max_workers: int) -> None:
+        """Initializes the server and its thread pool"""
+        super().__init__(server_address, handler_class)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="movie-server")
+        self.movie_server = None
+
+    def process_request(self, request, client_address) -> None:
+        """Hands the request to the thread pool"""
+        self._executor.submit(self._process_request_in_thread, request, client_address)
+
+    def server_close(self) -> None:
+        """Closes the socket and waits for the running requests"""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+    def _process_request_in_thread(self, request, client_address) -> None:
+        """Same as ThreadingMixIn.process_request_thread, runs in the thread pool"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class ReadWriteLock:
+    """
+    Lock held by any number of readers at once or by a single writer.
+    Waiting writers keep new readers out, so a steady stream of reads can't starve the writer thread.
+    Not reentrant, a thread holding the lock mustn't acquire it again.
+    """
+    def __init__(self) -> None:
+        """Initializes the condition guarding the number of readers and the writer"""
+        self._condition = threading.Condition()
+        self._reader_count = 0
+        self._waiting_writer_count = 0
+        self._writing = False
+
+    @contextmanager
+    def read(self):
+        """Holds the lock shared with other readers while the with block runs"""
+        with self._condition:
+            while self._writing or self._waiting_writer_count:
+                self._condition.wait()
+            self._reader_count += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._reader_count -= 1
+                if self._reader_count == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Holds the lock exclusively while the with block runs"""
+        with self._condition:
+            self._waiting_writer_count += 1
+            try:
+                while self._writing or self._reader_count:
+                    self._condition.wait()
+            finally:
+                self._waiting_writer_count -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class MovieServer:
+    """
+    Long-running HTTP server which loads the storage once and answers from memory, e.g. for dashboards and scripts.
+    The JSON API under /api offers the commands of MovieCli, all other paths serve the generated website.
+    Reads run concurrently on the storage (usually a StorageCache) and take milliseconds, they only wait
+    while a batch is written or if another process changed the data, which makes the next read reload it alone.
+    Writes are queued and applied by a single writer thread: everything queued while a batch is written
+    forms the next batch, which is applied under one storage lock and consecutive adds with a single write.
+    OMDB lookups of new movies happen before queueing, so they don't block other requests.
+    """
+    def __init__(self, storage: IStorage, html_template_path: str, html_output_path: str, omdb_cache_path: str,
+                 host: str = "127.0.0.1", port: int = 8000, max_workers: int = 8, max_batch_size: int = 100) -> None:
+        """Initializes the commands on the storage, the HTTP server and the write queue"""
+        if not isinstance(storage, IStorage):
+            raise TypeError(f"Expected storage to be instance of IStorage, got {type(storage).__name__} instead.")
+        if max_workers < 1:
+            raise ValueError("max_workers has to be at least 1")
+
+        self._storage = storage
+        self._movie_cli = MovieCli(storage, html_template_path, html_output_path, omdb_cache_path)
+        self._html_output_path = html_output_path
+        self._max_batch_size = max_batch_size
+        self._lock = ReadWriteLock()
+        # Data signature of the storage after the last exclusive access, see read()
+        self._signature = None
+        self._write_queue = queue.Queue()
+        self._writer_thread = None
+
+        handler_class = functools.partial(MovieRequestHandler, directory=os.path.dirname(html_output_path) or ".")
+        self._http_server = PooledHTTPServer((host, port), handler_class, max_workers)
+        self._http_server.movie_server = self
+
+    @property
+    def server_address(self) -> tuple:
+        """Returns host and port the server listens on"""
+        return self._http_server.server_address[:2]
+
+    def serve_forever(self) -> None:
+        """Loads the movies, then handles requests until shutdown() is called or the user presses Ctrl+C"""
+        self._movie_cli.get_movie_app()
+        self._run_exclusive(self._storage.count_movies)
+        self._writer_thread = threading.Thread(target=self._write_batches, name="movie-writer", daemon=True)
+        self._writer_thread.start()
+        try:
+            self._http_server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopping the server.")
+        finally:
+            self._http_server.server_close()
+            self._write_queue.put(None)
+            self._writer_thread.join()
+
+    def shutdown(self) -> None:
+        """Stops serve_forever(), has to be called from another thread"""
+        self._http_server.shutdown()
+
+    def read(self, function, *args):
+        """
+        Calls function while other reads may run as well and returns its result.
+        If the data changed since the last exclusive access (e.g. another process wrote the file),
+        function runs exclusively instead, so only one thread reloads the cached movies.
+        """
+        with self._lock.read():
+            if self._storage.get_data_signature() == self._signature:
+                return function(*args)
+        return self._run_exclusive(function, *args)
+
+    def write(self, command: str, *args) -> dict:
+        """Queues a write for the writer thread and waits until its batch was written, returns the result"""
+        future = Future()
+        self._write_queue.put((command, args, future))
+        return future.result()
+
+    def list_movies(self, *args) -> dict:
+        """See MovieCli.list_movies()"""
+        return self.read(self._movie_cli.list_movies, *args)
+
+    def search(self, search_term: str, typo_tolerant: bool) -> dict:
+        """See MovieCli.search()"""
+        return self.read(self._movie_cli.search, search_term, typo_tolerant)
+
+    def stats(self) -> dict:
+        """See MovieCli.stats()"""
+        return self.read(self._movie_cli.stats)
+
+    def add(self, titles: list[str]) -> dict:
+        """
+        Looks up the titles which aren't in the database yet on OMDB, then queues the found movies.
+        :return: result like MovieCli.add()
+        """
+        movie_app = self._movie_cli.get_movie_app()
+        new_titles = self.read(
+            lambda: list(dict.fromkeys(title for title in titles if self._storage.get_movie(title) is None))
+        )
+        found_movies, failed_titles = movie_app.lookup_movies(new_titles)
+        added_movies = self.write("add", found_movies) if found_movies else []
+        return {"command": "add", "ok": not failed_titles, "added": added_movies, "not_found": failed_titles}
+
+    def delete(self, title: str) -> dict:
+        """Queues the deletion of a movie, see MovieCli.delete()"""
+        return self.write("delete", [title])
+
+    def note(self, title: str, note: str) -> dict:
+        """Queues the note of a movie, see MovieCli.note()"""
+        return self.write("note", title, note)
+
+    def build_site(self) -> dict:
+        """
+        Generates the website, the generator is kept so only changed movies get serialized again.
+        Runs exclusively, as the generator keeps state between builds.
+        """
+        written = self._run_exclusive(self._movie_cli.get_movie_app().generate_website)
+        return {"command": "build-site", "ok": True, "written": written, "path": self._html_output_path}
+
+    def _write_batches(self) -> None:
+        """Writer thread, applies everything queued meanwhile as one batch until None is queued"""
+        while True:
+            operation = self._write_queue.get()
+            if operation is None:
+                return
+            batch = [operation]
+            stop = False
+            while len(batch) < self._max_batch_size:
+                try:
+                    operation = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if operation is None:
+                    stop = True
+                    break
+                batch.append(operation)
+
+            try:
+                self._run_exclusive(self._apply_locked_batch, batch)
+            except Exception as e:
+                # e.g. the lock couldn't be acquired, the waiting requests fail instead of hanging
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def _run_exclusive(self, function, *args):
+        """Calls function while no read or write runs and remembers the data signature afterwards, see read()"""
+        with self._lock.write():
+            try:
+                return function(*args)
+            finally:
+                self._signature = self._storage.get_data_signature()
+
+    def _apply_locked_batch(self, batch: list[tuple]) -> None:
+        """Applies a batch under one lock of the storage, see _apply_batch()"""
+        with self._storage.locked():
+            self._apply_batch(batch)
+
+    def _apply_batch(self, batch: list[tuple]) -> None:
+        """Applies the operations in their order, consecutive adds get combined into a single write"""
+        pending_adds = []
+        for command, args, future in batch:
+            if command == "add":
+                pending_adds.append((args[0], future))
+                continue
+            self._apply_adds(pending_adds)
+            pending_adds = []
+            try:
+                future.set_result(getattr(self._movie_cli, command)(*args))
+            except Exception as e:
+                future.set_exception(e)
+        self._apply_adds(pending_adds)
+
+    def _apply_adds(self, pending_adds: list[tuple]) -> None:
+        """Writes the movies of several add requests at once, skipping titles which exist meanwhile"""
+        if not pending_adds:
+            return
+        seen_titles = set()
+        added_movies_per_request = []
+        for movies, _ in pending_adds:
+            added_movies = []
+            for movie in movies:
+                key = movie["title"].casefold()
+                if key not in seen_titles and self._storage.get_movie(movie["title"]) is None:
+                    seen_titles.add(key)
+                    added_movies.append(movie)
+            added_movies_per_request.append(added_movies)
+
+        try:
+            self._storage.write_many_movies_data([movie for movies in added_movies_per_request for movie in movies])
+        except Exception as e:
+            for _, future in pending_adds:
+                future.set_exception(e)
+            return
+        for (_, future), added_movies in zip(pending_adds, added_movies_per_request):
+            future.set_result(added_movies)
+
+
+class MovieRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Answers the JSON API under /api and serves the files of the website directory otherwise:
+    GET /api/movies (limit, offset, sort, desc, min_rating, start_year, end_year), GET /api/search (q, typo),
+    GET /api/stats, POST /api/movies ({"titles": [...]}), DELETE /api/movies/<title>,
+    PUT /api/movies/<title>/note ({"note": "..."}) and POST /api/site.
+    """
+    timeout = 30
+
+    def do_GET(self) -> None:
+        """Answers API requests, serves the website otherwise"""
+        url = urlsplit(self.path)
+        if not url.path.startswith("/api/"):
+            super().do_GET()
+            return
+        self._answer(lambda: self._get(url.path, {key: values[-1] for key, values in parse_qs(url.query).items()}))
+
+    def do_POST(self) -> None:
+        """Adds movies or generates the website"""
+        self._answer(lambda: self._post(urlsplit(self.path).path))
+
+    def do_PUT(self) -> None:
+        """Sets the note of a movie"""
+        self._answer(lambda: self._put(urlsplit(self.path).path))
+
+    def do_DELETE(self) -> None:
+        """Deletes a movie"""
+        self._answer(lambda: self._delete(urlsplit(self.path).path))
+
+    def _answer(self, handle) -> None:
+        """
+        Sends the result of handle(), None means handle() answered itself.
+        ValueError is answered with 400, any other exception with 500 instead of closing the connection.
+        """
+        try:
+            result = handle()
+        except ValueError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"ok": False, "error": str(e)})
+            return
+        except Exception as e:
+            self.log_error("%s %s failed: %r", self.command, self.path, e)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"ok": False, "error": "Internal server error"})
+            return
+        if result is not None:
+            self._send_result(result)
+
+    def _get(self, path: str, parameters: dict) -> dict|None:
+        """Returns the result of a GET request to the API"""
+        movie_server = self.server.movie_server
+        match path:
+            case "/api/movies":
+                return movie_server.list_movies(
+                    self._get_number(parameters, "limit", int), self._get_number(parameters, "offset", int) or 0,
+                    parameters.get("sort"), parameters.get("desc") in ("1", "true"),
+                    self._get_number(parameters, "min_rating", float),
+                    self._get_number(parameters, "start_year", int), self._get_number(parameters, "end_year", int)
+                )
+            case "/api/search":
+                if not parameters.get("q"):
+                    raise ValueError("Parameter q is missing")
+                return movie_server.search(parameters["q"], parameters.get("typo") in ("1", "true"))
+            case "/api/stats":
+                return movie_server.stats()
+        return self._send_not_found()
+
+    def _post(self, path: str) -> dict|None:
+        """Returns the result of a POST request to the API"""
+        movie_server = self.server.movie_server
+        if path == "/api/movies":
+            body = self._read_json_body()
+            titles = body.get("titles", [body["title"]] if "title" in body else [])
+            if not titles or not all(isinstance(title, str) and title.strip() for title in titles):
+                raise ValueError("Expected a list of titles")
+            return movie_server.add([title.strip() for title in titles])
+        if path == "/api/site":
+            return movie_server.build_site()
+        return self._send_not_found()
+
+    def _put(self, path: str) -> dict|None:
+        """Returns the result of a PUT request to the API"""
+        if not (path.startswith("/api/movies/") and path.endswith("/note")):
+            return self._send_not_found()
+        note = self._read_json_body().get("note")
+        if not isinstance(note, str):
+            raise ValueError("Expected a note")
+        title = unquote(path[len("/api/movies/"):-len("/note")])
+        return self.server.movie_server.note(title, note)
+
+    def _delete(self, path: str) -> dict|None:
+        """Returns the result of a DELETE request to the API"""
+        if not path.startswith("/api/movies/"):
+            return self._send_not_found()
+        return self.server.movie_server.delete(unquote(path[len("/api/movies/"):]))
+
+    def _send_not_found(self) -> None:
+        """Answers requests to unknown API paths"""
+        self._send_json(HTTPStatus.NOT_FOUND, {"ok": False, "error": "Unknown API path"})
+
+    def _send_result(self, result: dict) -> None:
+        """Sends a command result, with 404 if movies of it don't exist"""
+        self._send_json(HTTPStatus.NOT_FOUND if result.get("missing") else HTTPStatus.OK, result)
+
+    def _send_json(self, status: HTTPStatus, body: dict) -> None:
+        """Sends body as JSON response"""
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _read_json_body(self) -> dict:
+        """Reads the JSON object of the request body, raises ValueError if it is missing, too large or invalid"""
+        content_length = int(self.headers.get("Content-Length") or 0)
+        if not 0 < content_length <= MAX_BODY_SIZE:
+            raise ValueError(f"Expected a JSON body of at most {MAX_BODY_SIZE} bytes")
+        try:
+            body = json.loads(self.rfile.read(content_length))
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON body")
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object")
+        return body
+
+    @staticmethod
+    def _get_number(parameters: dict, name: str, number_type: type) -> int|float|None:
+        """Returns a query parameter converted to number_type, None if it is missing"""
+        if name not in parameters:
+            return None
+        try:
+            return number_type(parameters[name])
+        except ValueError:
+            raise ValueError(f"Parameter {name} has to be a number")
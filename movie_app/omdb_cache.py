@@ -0,0 +1,106 @@
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+
+
+class OmdbCache:
+    """
+    Persistent cache for OMDB responses, stored in a SQLite file.
+    Entries are keyed by the normalized title, expire after a TTL and the least recently
+    used entries get evicted once there are more than max_entries.
+    "Not found" results are cached too (as None), with their own, usually shorter TTL.
+    The cache can be shared between threads.
+    """
+    def __init__(self, file_path: str, ttl: float = 30 * 24 * 60 * 60, not_found_ttl: float = 24 * 60 * 60,
+                 max_entries: int = 10000, clock: Callable[[], float] = time.time) -> None:
+        """
+        Initializes the cache settings, the connection gets opened on first use.
+        clock returns the current time in seconds, e.g. a fake clock in tests.
+        """
+        if not isinstance(file_path, str):
+            raise TypeError(f"Expected string for file_path, got {type(file_path).__name__} instead.")
+        if not file_path.strip():
+            raise ValueError("Empty string is invalid")
+        if max_entries < 1:
+            raise ValueError("max_entries has to be at least 1")
+
+        self._filepath = file_path
+        self._ttl = ttl
+        self._not_found_ttl = not_found_ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._connection = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(self, title: str) -> tuple[bool, dict|None]:
+        """
+        Looks up a title in the cache.
+        :return: tuple (hit, response), response is None for cached "not found" results
+        """
+        key = self.normalize_title(title)
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT response, created_at FROM omdb_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return False, None
+
+            response, created_at = row
+            now = self._clock()
+            ttl = self._ttl if response is not None else self._not_found_ttl
+            with connection:
+                if now - created_at > ttl:
+                    connection.execute("DELETE FROM omdb_cache WHERE key = ?", (key,))
+                    self._misses += 1
+                    return False, None
+                connection.execute("UPDATE omdb_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._hits += 1
+        return True, json.loads(response) if response is not None else None
+
+    def store(self, title: str, response: dict|None) -> None:
+        """Stores a response (None for "not found") and evicts the least recently used entries if necessary"""
+        key = self.normalize_title(title)
+        now = self._clock()
+        serialized_response = json.dumps(response) if response is not None else None
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO omdb_cache (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, serialized_response, now, now)
+            )
+            entry_count = connection.execute("SELECT COUNT(*) FROM omdb_cache").fetchone()[0]
+            if entry_count > self._max_entries:
+                connection.execute(
+                    "DELETE FROM omdb_cache WHERE key IN (SELECT key FROM omdb_cache ORDER BY last_used LIMIT ?)",
+                    (entry_count - self._max_entries,)
+                )
+
+    def get_cache_stats(self) -> tuple[int, int]:
+        """Returns the number of lookups which were answered from the cache (hits) and which weren't (misses)"""
+        return self._hits, self._misses
+
+    @staticmethod
+    def normalize_title(title: str) -> str:
+        """Returns the title case-folded and with collapsed whitespace, so small typing differences share an entry"""
+        return " ".join(title.casefold().split())
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens the connection and creates the table on first use, returns the connection"""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._filepath, check_same_thread=False)
+            with self._connection as connection:
+                connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS omdb_cache (
+                        key TEXT PRIMARY KEY,
+                        response TEXT,
+                        created_at REAL NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                    """
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS idx_omdb_cache_last_used ON omdb_cache (last_used)")
+        return self._connection
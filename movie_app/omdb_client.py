@@ -0,0 +1,94 @@
+import threading
+import time
+from collections.abc import Callable
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from movie_app.omdb_cache import OmdbCache
+
+
+class OmdbClient:
+    """
+    Client for the OMDB API.
+    Keeps a requests.Session with pooled keep-alive connections, uses connect/read timeouts,
+    retries 429/5xx responses with exponential backoff and limits the request rate on the client side.
+    """
+    BASE_URL = 'http://www.omdbapi.com/'
+
+    def __init__(self, api_key: str|None, cache: OmdbCache|None = None, connect_timeout: float = 3.05,
+                 read_timeout: float = 10, max_retries: int = 3, backoff_factor: float = 0.5,
+                 requests_per_second: float = 10, pool_size: int = 10,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        Initializes the session, its retry policy and the rate limiter.
+        The rate limiter reads the time from clock and waits with sleep, e.g. a fake clock in tests.
+        """
+        self._api_key = api_key
+        self._cache = cache
+        self._timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        self._min_interval = 1 / requests_per_second if requests_per_second else 0
+        self._rate_lock = threading.Lock()
+        self._next_request_time = 0.0
+        self._clock = clock
+        self._sleep = sleep
+
+    def get_movie_by_title(self, title: str) -> dict|None:
+        """
+        Fetches a movie by its title and returns the OMDB response as dict, None if the movie wasn't found.
+        Responses and "not found" results get cached if there is a cache.
+        Raises requests.RequestException if the request failed after all retries.
+        """
+        if self._cache is not None:
+            cache_hit, cached_res = self._cache.lookup(title)
+            if cache_hit:
+                return cached_res
+
+        self._wait_for_rate_limit()
+        response = self._session.get(
+            self.BASE_URL,
+            params={'i': 'tt3896198', 'apikey': self._api_key, 't': title},
+            timeout=self._timeout
+        )
+        res = response.json()
+        if not self._validate_response(res):
+            if not response.ok:
+                # e.g. an invalid API key, nothing to cache
+                print("Error:", res.get('Error', response.reason))
+                return None
+            res = None
+
+        if self._cache is not None:
+            self._cache.store(title, res)
+        return res
+
+    def close(self) -> None:
+        """Closes all pooled connections"""
+        self._session.close()
+
+    def _wait_for_rate_limit(self) -> None:
+        """Sleeps until the next request is allowed, reserves a time slot for every caller"""
+        with self._rate_lock:
+            now = self._clock()
+            wait_time = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + self._min_interval
+        if wait_time > 0:
+            self._sleep(wait_time)
+
+    @staticmethod
+    def _validate_response(res: dict) -> bool:
+        """Check if returned dict from request has valid data"""
+        return 'Title' in res.keys()
@@ -0,0 +1,279 @@
+import functools
+import json
+import os
+import threading
+import time
+import types
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from storage.atomic_file import atomic_open
+from storage.istorage import IStorage
+
+
+# Setting it to "1" enables the stats like --profile, "cprofile" additionally like --cprofile
+PROFILE_ENV_VARIABLE = "MOVIE_APP_PROFILE"
+STORAGE_METHODS = tuple(
+    name for name, member in vars(IStorage).items() if callable(member) and not name.startswith("_")
+)
+# Actions MovieMenu.run dispatches to, needs to be updated according to changes in MovieMenu
+MOVIE_APP_ACTIONS = (
+    "add_movies", "delete_movie", "filter_movies", "movie_stats", "random_movie", "search_movie",
+    "movies_sorted_by_rating", "movies_sorted_by_year", "list_movies", "update_movie", "generate_website",
+    "import_movies", "next_page"
+)
+# Bytes read and written by the whole process, only available on Linux
+PROC_IO_PATH = "/proc/self/io"
+
+
+class CallStats:
+    """Wall time, number of calls and bytes read and written of one instrumented function"""
+    __slots__ = ("count", "errors", "total_time", "max_time", "bytes_read", "bytes_written")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def to_dict(self) -> dict:
+        """Returns the stats as dict, including the average time per call"""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": self.total_time,
+            "average_seconds": self.total_time / self.count if self.count else 0.0,
+            "max_seconds": self.max_time,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written
+        }
+
+
+class PerfStats:
+    """
+    Opt-in instrumentation of the storages, the menu actions, the OMDB client and the website generation.
+    instrument() replaces methods of an object by wrappers recording wall time, number of calls and errors
+    and the bytes the process read and wrote meanwhile (Linux only). Generators returned by a method are
+    wrapped as well, so the time spent iterating them counts for the method too.
+    Caches with a get_cache_stats() method can be registered to report their hits and misses.
+    With cprofile set, every menu action additionally runs under cProfile and the profiles are dumped per action.
+    Nothing gets wrapped without an instance, so there is no overhead unless profiling is enabled.
+    """
+    def __init__(self, cprofile: bool = False) -> None:
+        """Initializes empty stats, the lock protects them against the import threads"""
+        self._cprofile = cprofile
+        self._calls = {}
+        self._caches = {}
+        self._profiles = {}
+        self._profiling = False
+        self._lock = threading.Lock()
+        self._has_io_counters = os.path.exists(PROC_IO_PATH)
+
+    @classmethod
+    def from_environment(cls, profile: bool = False, cprofile: bool = False) -> "PerfStats|None":
+        """
+        Creates an instance if profiling is enabled by the arguments or the environment variable.
+        :return: PerfStats or None if profiling is disabled
+        """
+        env_value = os.getenv(PROFILE_ENV_VARIABLE, "").strip().lower()
+        cprofile = cprofile or env_value == "cprofile"
+        if not (profile or cprofile or env_value in ("1", "true", "yes", "cprofile")):
+            return None
+        return cls(cprofile)
+
+    def instrument(self, target: object, method_names: Iterable[str], prefix: str,
+                   profile_calls: bool = False) -> None:
+        """
+        Replaces the methods of target by recording wrappers named "<prefix>.<method name>".
+        Methods which don't exist on target are skipped, profile_calls runs the methods under cProfile.
+        """
+        for method_name in method_names:
+            method = getattr(target, method_name, None)
+            if callable(method):
+                setattr(target, method_name, self._wrap(f"{prefix}.{method_name}", method, profile_calls))
+
+    def register_cache(self, name: str, cache: object) -> None:
+        """Registers an object with a get_cache_stats() method returning its hits and misses"""
+        self._caches[name] = cache
+
+    @contextmanager
+    def measure(self, name: str, profile_call: bool = False):
+        """Records the with block as call of name"""
+        profile = self._start_profile(name) if profile_call else None
+        io_before = self._read_io_counters()
+        start_time = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed_time = time.perf_counter() - start_time
+            io_after = self._read_io_counters()
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+            self._record(name, elapsed_time, io_before, io_after, failed, count=True)
+
+    def to_dict(self) -> dict:
+        """Returns the stats of all calls and caches, calls sorted by their total time"""
+        with self._lock:
+            calls = sorted(self._calls.items(), key=lambda item: item[1].total_time, reverse=True)
+            return {
+                "calls": {name: stats.to_dict() for name, stats in calls},
+                "caches": {
+                    name: dict(zip(("hits", "misses"), cache.get_cache_stats()))
+                    for name, cache in self._caches.items()
+                }
+            }
+
+    def to_prometheus(self) -> str:
+        """Returns the stats in the Prometheus text exposition format"""
+        stats = self.to_dict()
+        metrics = [
+            ("movie_app_calls_total", "counter", "Number of calls", "count"),
+            ("movie_app_call_errors_total", "counter", "Number of calls which raised an exception", "errors"),
+            ("movie_app_call_seconds_total", "counter", "Wall time spent in the calls", "total_seconds"),
+            ("movie_app_call_seconds_max", "gauge", "Longest wall time of a single call", "max_seconds"),
+            ("movie_app_call_read_bytes_total", "counter", "Bytes read by the process during the calls",
+             "bytes_read"),
+            ("movie_app_call_written_bytes_total", "counter", "Bytes written by the process during the calls",
+             "bytes_written")
+        ]
+        lines = []
+        for metric_name, metric_type, help_text, key in metrics:
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} {metric_type}")
+            lines.extend(
+                f'{metric_name}{{name="{self._escape_label(name)}"}} {call[key]}'
+                for name, call in stats["calls"].items()
+            )
+        for metric_name, key in (("movie_app_cache_hits_total", "hits"), ("movie_app_cache_misses_total", "misses")):
+            lines.append(f"# HELP {metric_name} Number of cache {key}")
+            lines.append(f"# TYPE {metric_name} counter")
+            lines.extend(
+                f'{metric_name}{{cache="{self._escape_label(name)}"}} {cache[key]}'
+                for name, cache in stats["caches"].items()
+            )
+        return "\n".join(lines) + "\n"
+
+    def format_table(self, limit: int|None = 25) -> str:
+        """Returns the stats as a human readable table of the calls with the highest total time and the caches"""
+        stats = self.to_dict()
+        if not stats["calls"]:
+            return "No calls recorded yet."
+        lines = [f"{'Call':<45} {'Count':>7} {'Total ms':>10} {'Avg ms':>9} {'Max ms':>9} {'Read':>10} {'Written':>10}"]
+        for name, call in list(stats["calls"].items())[:limit]:
+            lines.append(
+                f"{name:<45} {call['count']:>7} {call['total_seconds'] * 1000:>10.1f} "
+                f"{call['average_seconds'] * 1000:>9.2f} {call['max_seconds'] * 1000:>9.2f} "
+                f"{self._format_bytes(call['bytes_read']):>10} {self._format_bytes(call['bytes_written']):>10}"
+            )
+        for name, cache in stats["caches"].items():
+            lookups = cache["hits"] + cache["misses"]
+            hit_rate = f"{cache['hits'] / lookups:.0%}" if lookups else "-"
+            lines.append(f"Cache {name}: {cache['hits']} hits, {cache['misses']} misses ({hit_rate} hit rate)")
+        return "\n".join(lines)
+
+    def dump(self, directory: str) -> list[str]:
+        """
+        Writes the stats as perf_stats.json and perf_stats.prom and the cProfile profile of every action
+        as <action>.prof (readable with pstats or snakeviz) into directory.
+        :return: paths of the written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, "perf_stats.json")
+        with atomic_open(json_path, "w", encoding="utf-8") as json_file:
+            json.dump(self.to_dict(), json_file, indent=4)
+        prometheus_path = os.path.join(directory, "perf_stats.prom")
+        with atomic_open(prometheus_path, "w", encoding="utf-8") as prometheus_file:
+            prometheus_file.write(self.to_prometheus())
+
+        written_paths = [json_path, prometheus_path]
+        for name, profile in self._profiles.items():
+            profile_path = os.path.join(directory, f"{name}.prof")
+            profile.dump_stats(profile_path)
+            written_paths.append(profile_path)
+        return written_paths
+
+    def _wrap(self, name: str, method, profile_calls: bool):
+        """Returns a wrapper recording the calls of method as name"""
+        profile_call = profile_calls and self._cprofile
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with self.measure(name, profile_call):
+                result = method(*args, **kwargs)
+            if isinstance(result, types.GeneratorType):
+                return self._measure_iteration(name, result)
+            return result
+        return wrapper
+
+    def _measure_iteration(self, name: str, iterator: Iterator) -> Iterator:
+        """Yields from iterator and adds the time spent producing the items to the calls of name"""
+        while True:
+            io_before = self._read_io_counters()
+            start_time = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._record(name, time.perf_counter() - start_time, io_before, self._read_io_counters(),
+                             failed=False, count=False)
+            yield item
+
+    def _record(self, name: str, elapsed_time: float, io_before: tuple|None, io_after: tuple|None,
+                failed: bool, count: bool) -> None:
+        """Adds a measurement to the stats of name"""
+        with self._lock:
+            stats = self._calls.get(name)
+            if stats is None:
+                stats = self._calls[name] = CallStats()
+            if count:
+                stats.count += 1
+                stats.max_time = max(stats.max_time, elapsed_time)
+            stats.errors += failed
+            stats.total_time += elapsed_time
+            if io_before is not None and io_after is not None:
+                stats.bytes_read += io_after[0] - io_before[0]
+                stats.bytes_written += io_after[1] - io_before[1]
+
+    def _start_profile(self, name: str) -> "cProfile.Profile|None":
+        """Enables the profile of an action, actions called by another action are part of the outer profile"""
+        if self._profiling:
+            return None
+        profile = self._profiles.get(name)
+        if profile is None:
+            import cProfile
+            profile = self._profiles[name] = cProfile.Profile()
+        self._profiling = True
+        profile.enable()
+        return profile
+
+    def _read_io_counters(self) -> tuple[int, int]|None:
+        """Returns the bytes read and written by the process so far, None if the platform doesn't tell"""
+        if not self._has_io_counters:
+            return None
+        counters = {}
+        with open(PROC_IO_PATH, "r") as io_file:
+            for line in io_file:
+                key, _, value = line.partition(":")
+                counters[key] = int(value)
+        return counters["rchar"], counters["wchar"]
+
+    @staticmethod
+    def _escape_label(value: str) -> str:
+        """Escapes a Prometheus label value"""
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    @staticmethod
+    def _format_bytes(byte_count: int) -> str:
+        """Returns a byte count as B, KB or MB"""
+        if byte_count < 1024:
+            return f"{byte_count} B"
+        if byte_count < 1024 * 1024:
+            return f"{byte_count / 1024:.1f} KB"
+        return f"{byte_count / (1024 * 1024):.1f} MB"
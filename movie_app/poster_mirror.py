@@ -0,0 +1,217 @@
+import hashlib
+import io
+import json
+import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from storage.atomic_file import atomic_open
+
+# Pillow is optional, without it no thumbnails get generated
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp"
+}
+
+
+class PosterMirror:
+    """
+    Mirrors the posters of the website into a local directory, so the site loads fast and works offline.
+    Posters are downloaded concurrently with a bounded thread pool and stored under the SHA-256 hash
+    of their content, so equal posters are only stored once. Only if the optional Pillow is installed,
+    a small thumbnail gets generated for every poster.
+    Posters which can't be downloaded or stored aren't mirrored, the website keeps their remote URL.
+    An index file maps every poster URL to its local files, posters in it aren't downloaded again.
+    """
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self, site_directory: str, directory_name: str = "posters", max_workers: int = 8,
+                 thumbnail_width: int = 128, connect_timeout: float = 3.05, read_timeout: float = 10,
+                 max_retries: int = 3) -> None:
+        """
+        Initializes the session and loads the index of already mirrored posters.
+        Posters are stored in site_directory/directory_name, paths handed out are relative to site_directory.
+        """
+        if not isinstance(site_directory, str):
+            raise TypeError(f"Expected string for site_directory, got {type(site_directory).__name__} instead.")
+        if max_workers < 1:
+            raise ValueError("max_workers has to be at least 1")
+
+        self._site_directory = site_directory
+        self._directory_name = directory_name
+        self._directory = os.path.join(site_directory, directory_name)
+        self._index_path = os.path.join(self._directory, self.INDEX_FILE_NAME)
+        self._max_workers = max_workers
+        self._thumbnail_width = thumbnail_width
+        self._timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        self._index = self._load_index()
+
+    def mirror(self, poster_urls: Iterable[str]) -> tuple[int, int]:
+        """
+        Downloads all posters which aren't mirrored yet, at most max_workers at once.
+        The URLs are consumed lazily, only a bounded number of downloads is pending at any time.
+        Empty URLs and "N/A" get skipped, failed downloads are retried on the next call.
+        :return: tuple of the number of downloaded and failed posters
+        """
+        downloaded_count = 0
+        failed_count = 0
+        seen_urls = set()
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            pending = set()
+            for poster_url in poster_urls:
+                if not poster_url or poster_url == "N/A" or poster_url in seen_urls or self.is_mirrored(poster_url):
+                    continue
+                seen_urls.add(poster_url)
+                pending.add(executor.submit(self._download_poster, poster_url))
+                if len(pending) >= self._max_workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    downloaded, failed = self._collect_results(done)
+                    downloaded_count += downloaded
+                    failed_count += failed
+            downloaded, failed = self._collect_results(wait(pending).done)
+            downloaded_count += downloaded
+            failed_count += failed
+
+        if downloaded_count:
+            self._save_index()
+        return downloaded_count, failed_count
+
+    def is_mirrored(self, poster_url: str) -> bool:
+        """Checks if a poster is mirrored and its file still exists, returns bool"""
+        entry = self._index.get(poster_url)
+        return entry is not None and os.path.exists(os.path.join(self._site_directory, entry["poster"]))
+
+    def get_local_poster(self, poster_url: str) -> tuple[str, str|None]|None:
+        """
+        Returns the paths of the mirrored poster and of its thumbnail (None without Pillow),
+        relative to the site directory.
+        :return: tuple or None if the poster isn't mirrored
+        """
+        entry = self._index.get(poster_url)
+        if entry is None:
+            return None
+        return entry["poster"], entry.get("thumbnail")
+
+    def close(self) -> None:
+        """Closes all pooled connections"""
+        self._session.close()
+
+    def _collect_results(self, futures: Iterable) -> tuple[int, int]:
+        """
+        Adds the finished downloads to the index.
+        :return: tuple of the number of downloaded and failed posters
+        """
+        downloaded_count = 0
+        failed_count = 0
+        for future in futures:
+            poster_url, entry = future.result()
+            if entry is None:
+                failed_count += 1
+            else:
+                self._index[poster_url] = entry
+                downloaded_count += 1
+        return downloaded_count, failed_count
+
+    def _download_poster(self, poster_url: str) -> tuple[str, dict|None]:
+        """
+        Downloads and stores a poster, see _mirror_poster(). Runs in the worker threads.
+        Any failure only affects this poster, it isn't mirrored and the website keeps using the remote URL.
+        :return: tuple of the URL and its index entry, None if the poster couldn't be mirrored
+        """
+        try:
+            return poster_url, self._mirror_poster(poster_url)
+        except requests.RequestException as e:
+            print(f"Couldn't download poster {poster_url}: {e}")
+        except Exception as e:
+            # e.g. OSError while writing or an unexpected response, it mustn't stop the other downloads
+            print(f"Couldn't mirror poster {poster_url}, using the remote URL: {type(e).__name__}: {e}")
+        return poster_url, None
+
+    def _mirror_poster(self, poster_url: str) -> dict:
+        """
+        Downloads a poster, stores it under its content hash and generates its thumbnail.
+        :return: index entry of the poster
+        """
+        response = self._session.get(poster_url, timeout=self._timeout)
+        response.raise_for_status()
+
+        content = response.content
+        content_hash = hashlib.sha256(content).hexdigest()
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        extension = CONTENT_TYPE_EXTENSIONS.get(content_type) \
+            or os.path.splitext(poster_url.split("?")[0])[1] or ".img"
+
+        poster_path = self._get_relative_path(content_hash, extension)
+        self._write_file(poster_path, content)
+        entry = {"poster": poster_path, "thumbnail": None}
+
+        if Image is not None:
+            thumbnail_path = self._get_relative_path(content_hash, f"-{self._thumbnail_width}w.jpg")
+            if os.path.exists(os.path.join(self._site_directory, thumbnail_path)) \
+                    or self._write_thumbnail(thumbnail_path, content):
+                entry["thumbnail"] = thumbnail_path
+        return entry
+
+    def _write_thumbnail(self, thumbnail_path: str, content: bytes) -> bool:
+        """Scales a poster down to the thumbnail width and stores it as JPEG, returns False if it can't be read"""
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                image.thumbnail((self._thumbnail_width, self._thumbnail_width * 3))
+                thumbnail = io.BytesIO()
+                image.convert("RGB").save(thumbnail, "JPEG", quality=80, optimize=True)
+        except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as e:
+            # Pillow raises all of them for broken or huge images, the poster is still used without thumbnail
+            print(f"Couldn't create thumbnail {thumbnail_path}: {e}")
+            return False
+        self._write_file(thumbnail_path, thumbnail.getvalue())
+        return True
+
+    def _get_relative_path(self, content_hash: str, suffix: str) -> str:
+        """Returns the path of a content-addressed file relative to the site, spread over 256 subdirectories"""
+        return "/".join((self._directory_name, content_hash[:2], content_hash + suffix))
+
+    def _write_file(self, relative_path: str, content: bytes) -> None:
+        """Writes a file atomically if it doesn't exist yet, equal content means equal path"""
+        file_path = os.path.join(self._site_directory, relative_path)
+        if os.path.exists(file_path):
+            return
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with atomic_open(file_path, "wb") as new_file:
+            new_file.write(content)
+
+    def _load_index(self) -> dict:
+        """Loads the index of mirrored posters, returns an empty one if it doesn't exist or is broken"""
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as index_file:
+                index = json.load(index_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    def _save_index(self) -> None:
+        """Writes the index of mirrored posters"""
+        os.makedirs(self._directory, exist_ok=True)
+        with atomic_open(self._index_path, "w", encoding="utf-8") as index_file:
+            json.dump(self._index, index_file)
@@ -1,58 +1,437 @@
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+from storage.atomic_file import atomic_open
+from storage.istorage import IStorage
+
+# The poster mirror imports requests, it's only needed for the annotation, the mirror is created by the callers
+if TYPE_CHECKING:
+    from movie_app.poster_mirror import PosterMirror
+
+
+MOVIE_FRAGMENT_TEMPLATE = (
+    '\t\t<li>\n'
+    '\t\t\t<div class="movie">\n'
+    '\t\t\t\t<img class="movie-poster" {poster_attributes} title="{note}">\n'
+    '\t\t\t\t<div class="movie-title">{title}</div>\n'
+    '\t\t\t\t<div class="movie-year">{year}</div>\n'
+    '\t\t\t\t<div class="movie-rating">IMDB: {rating}</div>\n'
+    '\t\t\t</div>\n'
+    '\t\t</li>\n'
+)
+MANIFEST_FILE_NAME = "manifest.json"
+SHARD_TYPES = ("decade", "rating")
+# Below this number of movies to serialize, starting worker processes costs more than it saves
+MIN_PARALLEL_MOVIES = 5000
+
+
+def render_movie_fragments(rows: list[tuple]) -> list[str]:
+    """
+    Serializes (title, year, rating, poster_attributes, note) tuples into HTML fragments.
+    Module level function, so it can run in the worker processes.
+    """
+    return [
+        MOVIE_FRAGMENT_TEMPLATE.format(title=title, year=year, rating=rating,
+                                       poster_attributes=poster_attributes, note=note)
+        for title, year, rating, poster_attributes, note in rows
+    ]
+
+
 class WebsiteGenerator:
-    def __init__(self, movies: list[dict], html_template_path: str, html_output_path: str) -> None:
-        """initialize Placeholder constant and movie variable"""
+    """
+    Generates the website incrementally: the HTML fragment of every movie is cached under the content
+    of its record, so generating again only serializes movies which were added or changed.
+    Output files are replaced atomically and only if their content hash changed.
+    update_website() keeps the page in sync with a storage by its changes, so its cost scales with the edit.
+    Large libraries can be split into pages with generate_pages().
+    With a PosterMirror, posters which were mirrored are embedded from the local copies and loaded lazily.
+    With render_workers > 1, large numbers of new fragments are serialized in worker processes.
+    Keep the instance around between generations to profit from the caches.
+    """
+    def __init__(self, movies: list[dict], html_template_path: str, html_output_path: str,
+                 poster_mirror: "PosterMirror|None" = None, render_workers: int|None = 1) -> None:
+        """
+        initialize Placeholder constant, movie variable, the poster mirror, the caches
+        and the number of worker processes, None uses one per CPU core.
+        """
+        if render_workers is not None and render_workers < 1:
+            raise ValueError("render_workers has to be at least 1")
         self.placeholder = "__TEMPLATE_MOVIE_GRID__"
         self._movies = movies
         self._html_template_path = html_template_path
         self._html_output_path = html_output_path
+        self._poster_mirror = poster_mirror
+        self._render_workers = render_workers or os.cpu_count() or 1
+        self._fragments = {}
+        self._template = None
+        self._template_signature = None
+        self._output_hashes = {}
+        # State of update_website(): fragments by case-folded title in storage order and what they were written for
+        self._page_fragments = None
+        self._storage_token = None
+        self._page_template_signature = None
+        self._page_output_signature = None
 
-    def generate_website(self) -> None:
+    def generate_website(self, movies: list[dict]|None = None) -> bool:
         """
         Main method for the class:
-        - Reads the HTML template.
-        - Gets data from self._movies and generates HTML content.
-        - Writes the HTML content to a specified output file.
+        - Reads the HTML template if it changed since the last generation.
+        - Gets data from movies (self._movies if not given) and generates HTML content,
+          reusing the cached fragments of unchanged movies.
+        - Writes the HTML content to a specified output file, if it differs from the current one.
+        - Deletes the pages and the manifest of a previous generate_pages().
+        :return: True if the output file was written, False if it was already up to date
         """
+        if movies is not None:
+            self._movies = movies
+        self.__remove_paged_layout()
         html_template = self.__html_template_to_string()
         movie_content = self.__generate_html_string()
-        new_html_string = self.__add_data_to_template(html_template, movie_content)
-        self.__write_html_file(self._html_output_path, new_html_string)
+        new_html_string = self.__add_data_to_template(html_template, movie_content).encode()
+
+        return self.__write_if_changed(self._html_output_path, new_html_string)
+
+    def update_website(self, storage: IStorage) -> bool:
+        """
+        Like generate_website() with the movies of storage, but only the movies changed since the last update
+        (see IStorage.get_changes()) get read and serialized again.
+        If nothing changed and neither did the template nor the output file, nothing gets read or hashed.
+        With a PosterMirror every fragment can change when posters got mirrored, so all movies get read.
+        The pages and the manifest of a previous generate_pages() get deleted.
+        :return: True if the output file was written, False if it was already up to date
+        """
+        if self._poster_mirror is not None:
+            return self.generate_website(storage.get_movies_data())
+
+        self.__remove_paged_layout()
+        html_template = self.__html_template_to_string()
+        token, changes = storage.get_changes(self._storage_token)
+        if changes is None or self._page_fragments is None:
+            changes = None
+            movies = storage.get_movies_data()
+            self._page_fragments = dict(zip(
+                (movie["title"].casefold() for movie in movies), self.__get_fragments(movies)
+            ))
+        else:
+            self.__apply_changes(storage, changes)
+        self._storage_token = token
+
+        output_signature = self.__get_file_signature(self._html_output_path)
+        if changes == [] and self._template_signature == self._page_template_signature \
+                and output_signature is not None and output_signature == self._page_output_signature:
+            return False
+
+        movie_content = "".join(self._page_fragments.values())
+        new_html_string = self.__add_data_to_template(html_template, movie_content).encode()
+        if changes:
+            # Movies changed, so does the page: writing it without comparing hashes
+            self.__write_html_file(self._html_output_path, new_html_string)
+            self._output_hashes.pop(self._html_output_path, None)
+            written = True
+        else:
+            written = self.__write_if_changed(self._html_output_path, new_html_string)
+        self._page_template_signature = self._template_signature
+        self._page_output_signature = self.__get_file_signature(self._html_output_path)
+        return written
+
+    def generate_pages(self, movies: Iterable[dict], page_size: int = 100, shard_by: str|None = None) -> int:
+        """
+        Writes the movies as multiple pages of page_size movies each, next to the output file.
+        The output file becomes an index page linking to all pages and a JSON manifest lists all of them.
+        With shard_by "decade" or "rating" every decade or whole rating gets its own pages.
+        Movies are streamed: every page is written as soon as it is complete, so at most one page per shard
+        is held in memory. For that reason the fragments aren't cached here, unchanged pages are still
+        only written if their content hash differs.
+        Pages of the previous generation which don't exist anymore get deleted.
+        :return: number of written or changed files
+        """
+        if page_size < 1:
+            raise ValueError("page_size has to be at least 1")
+        if shard_by is not None and shard_by not in SHARD_TYPES:
+            raise ValueError(f"Can't shard website by {shard_by}")
+
+        page_head, page_tail = self.__html_template_to_string().split(self.placeholder, 1)
+        output_directory = os.path.dirname(self._html_output_path)
+        shards = {}
+        written_files = 0
+
+        for movie in movies:
+            shard_value = self.__get_shard_value(movie, shard_by)
+            shard = shards.get(shard_value)
+            if shard is None:
+                shard = shards[shard_value] = self.__create_shard(shard_value, shard_by)
+            if len(shard["fragments"]) == page_size:
+                # Only now it's known that the full page has a next one
+                written_files += self.__write_page(shard, page_head, page_tail, output_directory, True)
+            shard["fragments"].append(self.__serialize_movie(movie))
+            shard["count"] += 1
+
+        if not shards:
+            shards[None] = self.__create_shard(None, None)
+        for shard in shards.values():
+            written_files += self.__write_page(shard, page_head, page_tail, output_directory, False)
+
+        shard_values = sorted(shards, reverse=shard_by == "rating") if shard_by is not None else list(shards)
+        manifest = {
+            "page_size": page_size,
+            "shard_by": shard_by,
+            "movie_count": sum(shard["count"] for shard in shards.values()),
+            "shards": [
+                {
+                    "name": shards[shard_value]["name"],
+                    "label": shards[shard_value]["label"],
+                    "movie_count": shards[shard_value]["count"],
+                    "pages": shards[shard_value]["pages"]
+                }
+                for shard_value in shard_values
+            ]
+        }
+        index_html = page_head + page_tail.replace("</body>", self.__get_index_navigation(manifest) + "</body>", 1)
+        written_files += self.__write_if_changed(self._html_output_path, index_html.encode())
+        self.__remove_outdated_pages(output_directory, manifest)
+        manifest_path = os.path.join(output_directory, MANIFEST_FILE_NAME)
+        written_files += self.__write_if_changed(manifest_path, json.dumps(manifest, indent=4).encode())
+        return written_files
 
     def __html_template_to_string(self) -> str:
-        """Opens HTML Template and returns it as a string"""
-        with open(self._html_template_path, 'r') as template:
-            return template.read()
+        """Opens HTML Template and returns it as a string, only reads it again if the file changed"""
+        signature = self.__get_file_signature(self._html_template_path)
+        if self._template is None or signature != self._template_signature:
+            with open(self._html_template_path, 'r') as template:
+                self._template = template.read()
+            self._template_signature = signature
+        return self._template
 
     def __add_data_to_template(self, template: str, content: str) -> str:
         """Replaces Placeholder in template with new content and returns it"""
         return template.replace(self.placeholder, content)
 
     def __generate_html_string(self) -> str:
-        """Generates an HTML string based on self._movies"""
-        return "".join(self.__serialize_movie(movie) for movie in self._movies)
+        """Generates an HTML string based on self._movies, see __get_fragments()"""
+        return "".join(self.__get_fragments(self._movies))
+
+    def __get_fragments(self, movies: list[dict]) -> list[str]:
+        """
+        Returns the HTML fragments of movies.
+        Fragments are looked up by the content of the movie record (its items),
+        the missing ones get serialized in one go and are stitched in at their positions.
+        Fragments of movies which don't exist anymore are dropped from the cache.
+        """
+        cached_fragments = self._fragments
+        fragments = {}
+        missing_movies = {}
+        keys = []
+        for movie in movies:
+            key = tuple(movie.items())
+            if self._poster_mirror is not None:
+                key = (key, self._poster_mirror.get_local_poster(movie.get('poster_url')))
+            keys.append(key)
+            if key not in fragments:
+                fragment = cached_fragments.get(key)
+                if fragment is None:
+                    missing_movies[key] = movie
+                fragments[key] = fragment
+
+        if missing_movies:
+            new_fragments = self.__render_movies(list(missing_movies.values()))
+            fragments.update(zip(missing_movies, new_fragments))
+        self._fragments = fragments
+        return list(map(fragments.__getitem__, keys))
+
+    def __apply_changes(self, storage: IStorage, changes: list[tuple[str, str]]) -> None:
+        """
+        Updates the fragments of update_website() with the changes of storage.
+        Added movies go to the end like in the storages, changed notes keep their position.
+        The current movie is read for every change, so a movie deleted by a later change is skipped.
+        """
+        fragments = self._page_fragments
+        for operation, key in changes:
+            movie = storage.get_movie(key) if operation != "delete" else None
+            if movie is None:
+                fragments.pop(key, None)
+            elif operation == "add":
+                fragments.pop(key, None)
+                fragments[key] = self.__serialize_movie(movie)
+            elif key in fragments:
+                fragments[key] = self.__serialize_movie(movie)
+
+    def __render_movies(self, movies: list[dict]) -> list[str]:
+        """
+        Serializes movies into HTML fragments, keeping their order.
+        With multiple render workers and enough movies, the movies are split into chunks
+        which get serialized in a ProcessPoolExecutor.
+        """
+        if self._render_workers == 1 or len(movies) < MIN_PARALLEL_MOVIES:
+            return [self.__serialize_movie(movie) for movie in movies]
+
+        # Plain tuples are much cheaper to send to the workers than dictionaries
+        rows = [
+            (
+                movie.get('title'),
+                movie.get('year'),
+                movie.get('rating'),
+                self.__get_poster_attributes(movie.get('poster_url')),
+                movie.get('note', '')
+            )
+            for movie in movies
+        ]
+        chunk_size = -(-len(rows) // (self._render_workers * 4))
+        chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+        with ProcessPoolExecutor(max_workers=self._render_workers) as executor:
+            return [fragment for chunk in executor.map(render_movie_fragments, chunks) for fragment in chunk]
+
+    def __write_page(self, shard: dict, page_head: str, page_tail: str, output_directory: str,
+                     has_next_page: bool) -> bool:
+        """
+        Writes the collected fragments of a shard as its next page and empties them.
+        :return: True if the page file was written, False if it was already up to date
+        """
+        page_number = len(shard["pages"]) + 1
+        shard_name = shard["name"]
+        file_name = f"{shard_name}-{page_number}.html"
+        shard["pages"].append(file_name)
+
+        navigation = ['\t<nav class="page-navigation">\n', '\t\t<a href="index.html">Index</a>\n']
+        if page_number > 1:
+            navigation.append(f'\t\t<a href="{shard_name}-{page_number - 1}.html">Previous</a>\n')
+        navigation.append(f'\t\t<span>Page {page_number}</span>\n')
+        if has_next_page:
+            navigation.append(f'\t\t<a href="{shard_name}-{page_number + 1}.html">Next</a>\n')
+        navigation.append('\t</nav>\n')
+
+        page_html = page_head + "".join(shard["fragments"]) \
+            + page_tail.replace("</body>", "".join(navigation) + "</body>", 1)
+        shard["fragments"] = []
+        return self.__write_if_changed(os.path.join(output_directory, file_name), page_html.encode())
+
+    def __write_if_changed(self, output_path: str, content: bytes) -> bool:
+        """
+        Writes content to output_path if its content hash differs from the one of the current file.
+        :return: True if the file was written, False if it was already up to date
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        if content_hash == self.__get_output_hash(output_path):
+            return False
+        self.__write_html_file(output_path, content)
+        self._output_hashes[output_path] = (self.__get_file_signature(output_path), content_hash)
+        return True
+
+    def __get_output_hash(self, output_path: str) -> str|None:
+        """
+        Returns the content hash of an output file.
+        The file only gets read and hashed if it changed since it was written the last time.
+        """
+        signature = self.__get_file_signature(output_path)
+        if signature is None:
+            return None
+        known_signature, content_hash = self._output_hashes.get(output_path, (None, None))
+        if signature != known_signature:
+            with open(output_path, 'rb') as output_file:
+                content_hash = hashlib.sha256(output_file.read()).hexdigest()
+            self._output_hashes[output_path] = (signature, content_hash)
+        return content_hash
+
+    def __remove_outdated_pages(self, output_directory: str, manifest: dict) -> None:
+        """Deletes the pages listed in the previous manifest which aren't part of the new one"""
+        try:
+            with open(os.path.join(output_directory, MANIFEST_FILE_NAME), 'r') as manifest_file:
+                previous_manifest = json.load(manifest_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        current_pages = {page for shard in manifest["shards"] for page in shard["pages"]}
+        for shard in previous_manifest.get("shards", []):
+            for page in shard.get("pages", []):
+                page_path = os.path.join(output_directory, os.path.basename(page))
+                if page not in current_pages and os.path.exists(page_path):
+                    os.remove(page_path)
+                    self._output_hashes.pop(page_path, None)
+
+    def __remove_paged_layout(self) -> None:
+        """Deletes all pages listed in the manifest of generate_pages() and the manifest itself, if there is one"""
+        output_directory = os.path.dirname(self._html_output_path)
+        manifest_path = os.path.join(output_directory, MANIFEST_FILE_NAME)
+        if not os.path.exists(manifest_path):
+            return
+        self.__remove_outdated_pages(output_directory, {"shards": []})
+        os.remove(manifest_path)
+        self._output_hashes.pop(manifest_path, None)
+
+    @staticmethod
+    def __get_index_navigation(manifest: dict) -> str:
+        """Returns the navigation of the index page, linking every page of every shard"""
+        navigation = ['\t<nav class="page-navigation">\n']
+        for shard in manifest["shards"]:
+            navigation.append(f'\t\t<h2>{shard["label"]} ({shard["movie_count"]} movies)</h2>\n')
+            for page_number, page in enumerate(shard["pages"], start=1):
+                navigation.append(f'\t\t<a href="{page}">{page_number}</a>\n')
+        navigation.append('\t</nav>\n')
+        return "".join(navigation)
+
+    @staticmethod
+    def __get_shard_value(movie: dict, shard_by: str|None) -> int|None:
+        """Returns the decade or whole rating of a movie, None if the website isn't sharded"""
+        if shard_by == "decade":
+            return int(movie["year"]) // 10 * 10
+        if shard_by == "rating":
+            return min(max(int(float(movie["rating"])), 0), 9)
+        return None
 
     @staticmethod
-    def __serialize_movie(movie: dict) -> str:
+    def __create_shard(shard_value: int|None, shard_by: str|None) -> dict:
+        """
+        Returns a new shard with its file name prefix, its heading on the index page,
+        the file names of its pages, the fragments of its current page and its number of movies
+        """
+        if shard_by == "decade":
+            name, label = f"decade-{shard_value}", f"{shard_value}s"
+        elif shard_by == "rating":
+            name, label = f"rating-{shard_value}", f"Rated {shard_value} to {shard_value + 1}"
+        else:
+            name, label = "movies", "All movies"
+        return {"name": name, "label": label, "pages": [], "fragments": [], "count": 0}
+
+    def __serialize_movie(self, movie: dict) -> str:
         """Serialize a single movie into an HTML string representation."""
-        movie_title = movie.get('title')
-        movie_year = movie.get('year')
-        movie_poster = movie.get('poster_url')
-        movie_note = movie.get('note', '')
-        movie_rating = movie.get('rating')
-
-        html_string = '\t\t<li>\n'
-        html_string += '\t\t\t<div class="movie">\n'
-        html_string += f'\t\t\t\t<img class="movie-poster" src="{movie_poster}" title="{movie_note}">\n'
-        html_string += f'\t\t\t\t<div class="movie-title">{movie_title}</div>\n'
-        html_string += f'\t\t\t\t<div class="movie-year">{movie_year}</div>\n'
-        html_string += f'\t\t\t\t<div class="movie-rating">IMDB: {movie_rating}</div>\n'
-        html_string += '\t\t\t</div>\n'
-        html_string += '\t\t</li>\n'
-
-        return html_string
+        return MOVIE_FRAGMENT_TEMPLATE.format(
+            title=movie.get('title'),
+            year=movie.get('year'),
+            rating=movie.get('rating'),
+            poster_attributes=self.__get_poster_attributes(movie.get('poster_url')),
+            note=movie.get('note', '')
+        )
+
+    def __get_poster_attributes(self, poster_url: str|None) -> str:
+        """
+        Returns the attributes of a poster's img tag.
+        Mirrored posters are loaded lazily from the local copy, the thumbnail is used on normal displays
+        and the full poster on high resolution displays.
+        """
+        local_poster = self._poster_mirror.get_local_poster(poster_url) if self._poster_mirror is not None else None
+        if local_poster is None:
+            return f'src="{poster_url}"'
+        poster_path, thumbnail_path = local_poster
+        if thumbnail_path is None:
+            return f'src="{poster_path}" loading="lazy"'
+        return f'src="{thumbnail_path}" srcset="{thumbnail_path} 1x, {poster_path} 2x" loading="lazy"'
 
     @staticmethod
-    def __write_html_file(output_path: str, content: str) -> None:
-        """Creates / overwrites html file at specified location with new content"""
-        with open(output_path, "w") as new_file:
-            new_file.write(content)
\ No newline at end of file
+    def __get_file_signature(file_path: str) -> tuple|None:
+        """Returns modification time and size of a file, None if it doesn't exist"""
+        try:
+            file_stats = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return file_stats.st_mtime_ns, file_stats.st_size
+
+    @staticmethod
+    def __write_html_file(output_path: str, content: bytes) -> None:
+        """
+        Creates / overwrites html file at specified location with new content.
+        The file gets replaced atomically, so the website is never left half written.
+        """
+        with atomic_open(output_path, "wb") as new_file:
+            new_file.write(content)
@@ -0,0 +1,75 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+# Reading the umask means setting it, done once at import instead of racing with other threads later
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def atomic_open(file_path: str, mode: str = "w", **open_kwargs):
+    """
+    Opens a temporary file next to file_path for writing and yields it.
+    When the with block finishes, the temporary file gets flushed, fsynced and renamed over file_path,
+    so readers and crashes only ever see the old or the complete new content, never a truncated file.
+    If the with block raises, the temporary file gets removed and file_path stays untouched.
+    """
+    if mode not in ("w", "wb"):
+        raise ValueError(f"Can't open a file atomically with mode {mode}")
+
+    directory = os.path.dirname(file_path) or "."
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, mode, **open_kwargs) as temporary_file:
+            yield temporary_file
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        # mkstemp only grants access to the owner, keep the permissions of a normally created file
+        os.chmod(temporary_path, _get_permissions(file_path))
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def backup_corrupt_file(file_path: str) -> str:
+    """
+    Moves a corrupt file aside instead of overwriting it, to <file_path>.corrupt
+    or <file_path>.corrupt.<n> if that one exists already.
+    :return: path of the backup
+    """
+    backup_path = f"{file_path}.corrupt"
+    backup_number = 0
+    while os.path.exists(backup_path):
+        backup_number += 1
+        backup_path = f"{file_path}.corrupt.{backup_number}"
+    os.replace(file_path, backup_path)
+    return backup_path
+
+
+def _get_permissions(file_path: str) -> int:
+    """Returns the permissions of the existing file, or the default ones reduced by the umask"""
+    try:
+        return os.stat(file_path).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def _fsync_directory(directory: str) -> None:
+    """Makes the rename durable, not possible on every platform"""
+    try:
+        directory_descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory_descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_descriptor)
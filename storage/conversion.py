@@ -0,0 +1,141 @@
+import os
+import sqlite3
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from storage.atomic_file import atomic_open
+from storage.istorage import IStorage
+from storage.file_types import DATABASE_EXTENSIONS, FILE_TYPES, NDJSON_EXTENSION, get_storage_class, normalize_extension
+from storage.json_stream import iter_ndjson, write_ndjson
+from storage.storage_csv import CSV_READ_ERRORS
+
+
+STORAGE_CLASSES = {extension: get_storage_class(file_type) for extension, file_type in FILE_TYPES.items()}
+# Errors of reading or writing a database, reported instead of raised by convert_directory()
+CONVERSION_ERRORS = (OSError, sqlite3.Error, *CSV_READ_ERRORS)
+# Files in a directory which are converted by convert_directory(), e.g. data/username_movie_database.json
+DATABASE_NAME_SUFFIX = "movie_database"
+
+
+def open_file_storage(file_path: str) -> IStorage:
+    """
+    Instantiates the storage of a database file by its extension, without a cache in front of it,
+    so reading it with iter_movies() streams the file.
+    Raises ValueError for an unknown extension.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in STORAGE_CLASSES:
+        raise ValueError(f"Unknown database type {extension or file_path}, expected one of {', '.join(STORAGE_CLASSES)}")
+    return STORAGE_CLASSES[extension](file_path)
+
+
+def iter_database(file_path: str) -> Iterator[dict]:
+    """Yields the movies of a database or NDJSON file one by one"""
+    if file_path.lower().endswith(NDJSON_EXTENSION):
+        with open(file_path, "r", encoding="utf-8") as file_reader:
+            yield from iter_ndjson(file_reader)
+    else:
+        # Conversion only reads its source, a corrupted database raises ValueError instead of being repaired
+        yield from open_file_storage(file_path).iter_movies(repair=False)
+
+
+def write_database(file_path: str, movies: Iterable[dict]) -> int:
+    """
+    Replaces the content of a database or NDJSON file with movies, which are consumed while writing.
+    :return: number of written movies
+    """
+    if file_path.lower().endswith(NDJSON_EXTENSION):
+        with atomic_open(file_path, "w", encoding="utf-8") as file_writer:
+            return write_ndjson(file_writer, movies)
+
+    count = 0
+
+    def count_movies(movies: Iterable[dict]) -> Iterator[dict]:
+        nonlocal count
+        for movie in movies:
+            count += 1
+            yield movie
+
+    open_file_storage(file_path).replace_movies_data(count_movies(movies))
+    return count
+
+
+def convert_database(source_path: str, target_path: str) -> int:
+    """
+    Streams all movies from one database file into another, the types are taken from the extensions.
+    Pending operations of the source's log are applied, the target gets replaced atomically.
+    The source is never modified, not even to repair it. Memory use doesn't depend on the number of movies.
+    Raises FileNotFoundError if the source doesn't exist,
+    ValueError if both paths are the same file, an extension is unknown or the source is corrupted.
+    :return: number of converted movies
+    """
+    if not os.path.isfile(source_path):
+        raise FileNotFoundError(f"{source_path} does not exist")
+    if os.path.abspath(source_path) == os.path.abspath(target_path):
+        raise ValueError(f"Can't convert {source_path} into itself")
+    if not target_path.lower().endswith(DATABASE_EXTENSIONS):
+        raise ValueError(f"Unknown database type of {target_path}, expected one of {', '.join(DATABASE_EXTENSIONS)}")
+    return write_database(target_path, iter_database(source_path))
+
+
+def find_databases(directory: str) -> list[str]:
+    """Returns the paths of the database files in directory, e.g. username_movie_database.json, sorted by name"""
+    database_paths = []
+    for file_name in sorted(os.listdir(directory)):
+        name, extension = os.path.splitext(file_name)
+        if name.endswith(DATABASE_NAME_SUFFIX) and extension.lower() in STORAGE_CLASSES:
+            database_paths.append(os.path.join(directory, file_name))
+    return database_paths
+
+
+def convert_directory(directory: str, target_extension: str, max_workers: int|None = None) -> list[dict]:
+    """
+    Converts every database in directory (see find_databases()) into a file of the same name with target_extension
+    (see normalize_extension(), so db becomes .sqlite like in main.py), each one in its own process,
+    at most max_workers (default: one per CPU core) at once.
+    Databases which already have the target extension are skipped, as well as databases of the same name
+    in several formats, which would be converted into the same file.
+    :return: list of dictionaries with source, target, the number of movies as count and error,
+             one of count and error is None
+    """
+    target_extension = normalize_extension(target_extension)
+    if target_extension not in DATABASE_EXTENSIONS:
+        raise ValueError(f"Unknown database type {target_extension}, expected one of {', '.join(DATABASE_EXTENSIONS)}")
+
+    targets = {}
+    for source_path in find_databases(directory):
+        if source_path.lower().endswith(target_extension):
+            continue
+        targets.setdefault(os.path.splitext(source_path)[0] + target_extension, []).append(source_path)
+
+    results = []
+    jobs = []
+    for target_path, source_paths in targets.items():
+        if len(source_paths) > 1:
+            results.extend(
+                {"source": source_path, "target": target_path, "count": None,
+                 "error": f"{len(source_paths)} databases would be converted into {target_path}"}
+                for source_path in source_paths
+            )
+        else:
+            jobs.append((source_paths[0], target_path))
+    if not jobs:
+        return results
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if max_workers == 1:
+        job_results = [_convert_job(*job) for job in jobs]
+    else:
+        # Converting is mostly parsing and serializing, so processes instead of threads
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            job_results = list(executor.map(_convert_job, *zip(*jobs)))
+    for (source_path, target_path), (count, error) in zip(jobs, job_results):
+        results.append({"source": source_path, "target": target_path, "count": count, "error": error})
+    return results
+
+
+def _convert_job(source_path: str, target_path: str) -> tuple[int|None, str|None]:
+    """Runs convert_database() in a worker process, errors are returned as message instead of being raised"""
+    try:
+        return convert_database(source_path, target_path), None
+    except CONVERSION_ERRORS as error:
+        return None, f"{type(error).__name__}: {error}"
@@ -0,0 +1,96 @@
+import os
+import threading
+from contextlib import contextmanager
+
+# Advisory locks are platform specific, on Windows shared locks are exclusive as well
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+class FileLock:
+    """
+    Advisory lock on a separate .lock file, so several processes can share a database file.
+    Readers hold a shared lock, writers an exclusive one. The lock file is never replaced,
+    which keeps the lock working while the database file itself gets atomically replaced.
+    Locks are reentrant within an instance: nested locks of the same or a weaker mode are no-ops,
+    a shared lock gets upgraded if an exclusive one is requested inside of it.
+    Threads of the same process are serialized by a threading lock.
+    """
+    SHARED = "shared"
+    EXCLUSIVE = "exclusive"
+
+    def __init__(self, lock_path: str) -> None:
+        """Initializes the path of the lock file, the file gets opened on first use"""
+        if not isinstance(lock_path, str):
+            raise TypeError(f"Expected string for lock_path, got {type(lock_path).__name__} instead.")
+        if not lock_path.strip():
+            raise ValueError("Empty string is invalid")
+
+        self._lock_path = lock_path
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._modes = []
+
+    @contextmanager
+    def shared(self):
+        """Holds a shared lock while the with block runs"""
+        with self._locked(self.SHARED):
+            yield
+
+    @contextmanager
+    def exclusive(self):
+        """Holds an exclusive lock while the with block runs"""
+        with self._locked(self.EXCLUSIVE):
+            yield
+
+    @contextmanager
+    def _locked(self, mode: str):
+        """Acquires the lock in the given mode unless it is already held in a mode which covers it"""
+        with self._thread_lock:
+            current_mode = self._modes[-1] if self._modes else None
+            if current_mode is None or (current_mode == self.SHARED and mode == self.EXCLUSIVE):
+                self._acquire(mode)
+                effective_mode = mode
+            else:
+                effective_mode = current_mode
+
+            self._modes.append(effective_mode)
+            try:
+                yield
+            finally:
+                self._modes.pop()
+                if not self._modes:
+                    self._release()
+                elif self._modes[-1] != effective_mode:
+                    # Leaving an upgraded lock, go back to the outer shared lock
+                    self._acquire(self._modes[-1])
+
+    def _acquire(self, mode: str) -> None:
+        """Blocks until the lock file is locked in the given mode"""
+        if self._file is None:
+            self._file = open(self._lock_path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if mode == self.SHARED else fcntl.LOCK_EX)
+        elif msvcrt is not None and not self._modes:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _release(self) -> None:
+        """Unlocks and closes the lock file"""
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
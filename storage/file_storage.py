@@ -0,0 +1,267 @@
+import os.path
+from abc import abstractmethod
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager
+from storage.atomic_file import backup_corrupt_file
+from storage.file_lock import FileLock
+from storage.istorage import IStorage
+from storage.operation_log import OperationLog
+
+
+DEFAULT_MOVIES = [{
+    "title": "Fight Club",
+    "year": 1999,
+    "rating": 8.8,
+    "poster_url": "https://m.media-amazon.com/images/M/MV5BOTgyOGQ1NDItNGU3Ny00MjU3LTg2YWEtNmEyYjBiMjI1Y2M5XkEyXkFqcGc@._V1_SX300.jpg"
+}]
+
+
+class FileStorage(IStorage):
+    """
+    Base class of the storages keeping all movies in a single file (JSON, CSV and binary snapshots).
+    Mutations get appended to an operation log next to the file and are compacted into a new file
+    once the log grew past max_log_size, a lock file next to it coordinates multiple processes.
+    Subclasses only read and write their file format, loading, validating and repairing the file is shared.
+    """
+    # Raised by _load_file() and _iter_file() if the file is corrupted
+    READ_ERRORS = (ValueError,)
+
+    def __init__(self, file_path: str, max_log_size: int = 1024 * 1024):
+        """Initializes self._file_path, the operation log and the lock file next to it"""
+        if not isinstance(file_path, str):
+            raise TypeError(f"Expected string for file_path, got {type(file_path).__name__} instead.")
+        if not file_path.strip():
+            raise ValueError("Empty string is invalid")
+
+        self._filepath = file_path
+        self._log = OperationLog(f"{file_path}.log", max_log_size)
+        self._lock = FileLock(f"{file_path}.lock")
+
+    def get_movies_data(self) -> list[dict]:
+        """
+        Loads the movies from the file under a shared lock,
+        replays the operation log on top of it and returns the data as a list of dictionaries.
+        If the file is missing, corrupted or there are no movies, validate_data() gets called
+        under an exclusive lock to verify and repair the file integrity first.
+        :return: list[dict]
+        """
+        with self._lock.shared():
+            movies = self._read_movies()
+        if movies is not None:
+            return movies
+
+        with self._lock.exclusive():
+            # Another process might have repaired the file while waiting for the lock
+            movies = self._read_movies()
+            if movies is None:
+                if not self.validate_data():
+                    print("Loading default data due to prior data issues.")
+                movies = self._read_movies()
+            if movies is None:
+                if self._log.get_size() == 0:
+                    # Nothing was deleted, so the file itself can't be read -> keep it before starting over
+                    backup_path = backup_corrupt_file(self._filepath)
+                    print(f"File data can't be read, moved it to {backup_path} and creating default Data")
+                # Same as an empty file, all movies got deleted -> start over with the default data
+                self._log.clear()
+                self.write_default_data()
+                movies = self._read_movies()
+            return movies
+
+    def iter_movies(self, repair: bool = True) -> Iterator[dict]:
+        """
+        Reads the movies from the file one by one under a shared lock and replays the operation log on top of them,
+        so only one movie at a time is held in memory, see IStorage.iter_movies().
+        If the file is missing, corrupted at its start or there are no movies, falls back to get_movies_data(),
+        which repairs the file like loading does. Corruption found later raises one of READ_ERRORS.
+        Without repair a missing or corrupted file raises ValueError instead, an empty file yields nothing.
+        :return: Iterator[dict]
+        """
+        with self._lock.shared():
+            movies = self._log.replay_stream(self._iter_file)
+            try:
+                first_movie = next(movies, None)
+            except (FileNotFoundError, *self.READ_ERRORS) as error:
+                if not repair:
+                    raise ValueError(f"Can't read {self._filepath}: {error}") from error
+                first_movie = None
+            if first_movie is not None:
+                yield first_movie
+                yield from movies
+                return
+        if repair:
+            yield from self.get_movies_data()
+
+    def locked(self) -> AbstractContextManager:
+        """Returns the exclusive lock of the file, see IStorage.locked()"""
+        return self._lock.exclusive()
+
+    def write_movies_data(self, title: str, year: int, rating: float, poster_url: str) -> None:
+        """
+        Adds a movie to the database.
+        Appends the movie to the operation log instead of rewriting the file.
+        The function doesn't need to validate the input.
+        """
+        with self._lock.exclusive():
+            self._log.log_add(self._to_logged_movie({
+                "title": title,
+                "year": year,
+                "rating": rating,
+                "poster_url": poster_url
+            }))
+            self._compact_if_needed()
+
+    def write_many_movies_data(self, movies: list[dict]) -> None:
+        """
+        Adds multiple movies to the database.
+        All of them get appended to the operation log with a single write.
+        """
+        with self._lock.exclusive():
+            self._log.log_add_many([self._to_logged_movie(movie) for movie in movies])
+            self._compact_if_needed()
+
+    def delete_movie_data(self, title: str) -> None:
+        """
+        Deletes a movie from the database.
+        Appends the deletion to the operation log instead of rewriting the file.
+        The function doesn't need to validate the input.
+        """
+        with self._lock.exclusive():
+            self._log.log_delete(title)
+            self._compact_if_needed()
+
+    def update_movie_data(self, title: str, note: str) -> None:
+        """
+        Updates a movie in the database.
+        Appends the note to the operation log instead of rewriting the file.
+        The function doesn't need to validate the input.
+        """
+        with self._lock.exclusive():
+            self._log.log_note(title, note)
+            self._compact_if_needed()
+
+    def replace_movies_data(self, movies: Iterable[dict]) -> None:
+        """
+        Rewrites the file atomically and clears the operation log, see IStorage.replace_movies_data().
+        The movies are written while iterating them, so they can be streamed from another storage.
+        """
+        with self._lock.exclusive():
+            self._write_file(movies)
+            self._log.clear()
+
+    def compact(self) -> None:
+        """
+        Writes the movies including all logged operations to the file
+        and clears the operation log afterwards.
+        The file gets replaced atomically, if the log can't be cleared (e.g. after a crash)
+        replaying it again doesn't change the movies.
+        """
+        with self._lock.exclusive():
+            movies = self.get_movies_data()
+            self._write_file(movies)
+            self._log.clear()
+
+    def _compact_if_needed(self) -> None:
+        """Compacts the operation log into the file once it grew past its maximum size"""
+        if self._log.needs_compaction():
+            self.compact()
+
+    def get_data_signature(self) -> tuple|None:
+        """
+        Returns modification time and size of the file and its operation log,
+        so cached data can be invalidated when one of them was changed.
+        :return: tuple or None if the file does not exist
+        """
+        try:
+            file_stat = os.stat(self._filepath)
+        except FileNotFoundError:
+            return None
+        return file_stat.st_mtime_ns, file_stat.st_size, self._log.get_signature()
+
+    def secure_existence(self) -> bool:
+        """
+        Checks if the file exists and returns True. If the file does not exist,
+        it calls write_default_data and returns True.
+        """
+        with self._lock.exclusive():
+            if not os.path.isfile(self._filepath):
+                print("File does not exist, creating default Data")
+                self.write_default_data()
+        return True
+
+    def validate_data(self) -> bool:
+        """
+        Calls secure_existence() to check if there is any data.
+        If there is data to work with, it reads the file and checks if there is at least one movie.
+        If the file is empty, it calls write_default_data(), corrupted files get moved aside first.
+        :returns: boolean
+        """
+        with self._lock.exclusive():
+            self.secure_existence()
+            try:
+                movie_count = self._count_file_movies()
+            except self.READ_ERRORS:
+                backup_path = backup_corrupt_file(self._filepath)
+                print(f"File data missing or corrupted, moved it to {backup_path} and creating default Data")
+                self.write_default_data()
+                return False
+
+            if movie_count == 0:
+                print("File is empty, writing default data!")
+                self.write_default_data()
+                return False
+            return True
+
+    def write_default_data(self) -> None:
+        """
+        Gets called if data is nonexistent or invalid and
+        writes some default data.
+        """
+        with self._lock.exclusive():
+            self._write_file(DEFAULT_MOVIES)
+
+    @abstractmethod
+    def _load_file(self) -> list[dict]:
+        """
+        Reads all movies of the file without replaying the operation log.
+        Raises FileNotFoundError or one of READ_ERRORS if the file is missing or corrupted.
+        :return: list[dict]
+        """
+        pass
+
+    @abstractmethod
+    def _iter_file(self) -> Iterator[dict]:
+        """Yields the movies of the file one by one without replaying the operation log, see _load_file()"""
+        pass
+
+    @abstractmethod
+    def _write_file(self, movies: Iterable[dict]) -> None:
+        """Replaces the file atomically with the movies, consuming them while writing"""
+        pass
+
+    def _count_file_movies(self) -> int:
+        """Returns the number of movies in the file, raises like _load_file()"""
+        return len(self._load_file())
+
+    def _to_logged_movie(self, movie: dict) -> dict:
+        """Returns the fields of a movie which get appended to the operation log, the note only if there is one"""
+        return {
+            "title": movie["title"],
+            "year": movie["year"],
+            "rating": movie["rating"],
+            "poster_url": movie["poster_url"],
+            **({"note": movie["note"]} if movie.get("note") else {})
+        }
+
+    def _read_movies(self) -> list[dict]|None:
+        """
+        Reads the file and replays the operation log on top of it.
+        :return: list[dict] or None if the file is missing, corrupted or there are no movies
+        """
+        try:
+            movies = self._load_file()
+        except (FileNotFoundError, *self.READ_ERRORS):
+            return None
+        if not movies:
+            return None
+        return self._log.replay(movies) or None
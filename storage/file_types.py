@@ -0,0 +1,40 @@
+import importlib
+
+
+# Storage type of every database file extension, username.db is stored as username_movie_database.sqlite
+FILE_TYPES = {
+    ".json": "json",
+    ".csv": "csv",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".mvdb": "mvdb"
+}
+# Newline-delimited JSON, one movie per line, for exports into other tools
+NDJSON_EXTENSION = ".ndjson"
+DATABASE_EXTENSIONS = (*FILE_TYPES, NDJSON_EXTENSION)
+# Module and class name of the storage of every storage type, a storage is only imported once it is used
+STORAGE_CLASS_NAMES = {
+    "json": ("storage.storage_json", "StorageJson"),
+    "csv": ("storage.storage_csv", "StorageCSV"),
+    "sqlite": ("storage.storage_sqlite", "StorageSQLite"),
+    "mvdb": ("storage.storage_binary", "StorageBinary")
+}
+
+
+def normalize_extension(extension: str) -> str:
+    """Returns the lowercase extension with leading dot of the files of a database type, e.g. .sqlite for db"""
+    if not extension.startswith("."):
+        extension = f".{extension}"
+    extension = extension.lower()
+    return f".{FILE_TYPES[extension]}" if extension in FILE_TYPES else extension
+
+
+def get_storage_class(file_type: str) -> type:
+    """
+    Imports and returns the storage class of a storage type, e.g. StorageJson for json.
+    Raises ValueError for an unknown type.
+    """
+    if file_type not in STORAGE_CLASS_NAMES:
+        raise ValueError(f"Unknown database type {file_type}")
+    module_name, class_name = STORAGE_CLASS_NAMES[file_type]
+    return getattr(importlib.import_module(module_name), class_name)
@@ -1,4 +1,11 @@
+import heapq
+import statistics
 from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager, nullcontext
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from storage.movie_analytics import describe_ratings
+from storage.title_search_index import approximate_substring_distance, default_max_distance
 
 
 class IStorage(ABC):
@@ -39,3 +46,195 @@ class IStorage(ABC):
     def write_default_data(self) -> None:
         """Writes default data"""
         pass
+
+    def get_movie(self, title: str) -> dict|None:
+        """
+        Returns the movie with the given title (case-insensitive), None if it doesn't exist.
+        Generic implementation scanning get_movies_data(), storages can override it with an index lookup.
+        """
+        wanted_title = title.casefold()
+        return next((movie for movie in self.get_movies_data() if movie["title"].casefold() == wanted_title), None)
+
+    def write_many_movies_data(self, movies: list[dict]) -> None:
+        """
+        Adds multiple movies (dictionaries with title, year, rating, poster_url and optional note) to the database.
+        Generic implementation adding them one by one, storages can override it to write all of them at once.
+        """
+        for movie in movies:
+            self.write_movies_data(movie["title"], movie["year"], movie["rating"], movie["poster_url"])
+            if movie.get("note"):
+                self.update_movie_data(movie["title"], movie["note"])
+
+    def replace_movies_data(self, movies: Iterable[dict]) -> None:
+        """
+        Replaces all movies of the database with the given ones, e.g. when converting between storages.
+        Generic implementation deleting every movie before adding the new ones,
+        storages can override it to rewrite their data at once.
+        """
+        for movie in self.get_movies_data():
+            self.delete_movie_data(movie["title"])
+        movies = iter(movies)
+        while chunk := list(islice(movies, 1000)):
+            self.write_many_movies_data(chunk)
+
+    def iter_movies(self, repair: bool = True) -> Iterator[dict]:
+        """
+        Returns an iterator over all movies in storage order, e.g. to stream them into another storage.
+        With repair set to False the database is only read, a missing or corrupted file raises ValueError
+        instead of being repaired like loading does, e.g. when converting it into another format.
+        Generic implementation on top of get_movies_data(), storages can override it to read their file
+        incrementally, so memory use doesn't grow with the size of the database.
+        :return: Iterator[dict]
+        """
+        return iter(self.get_movies_data())
+
+    def locked(self) -> AbstractContextManager:
+        """
+        Returns a context manager holding an exclusive lock on the database while the with block runs,
+        so several operations (e.g. checking the data signature and writing) can't be interleaved
+        with writes of other processes. The storages' own methods can be called inside of it.
+        Generic implementation without locking, storages can override it.
+        """
+        return nullcontext()
+
+    def get_data_signature(self) -> tuple|None:
+        """
+        Returns a value which changes whenever the stored data changes, e.g. modification time and size of a file.
+        Used by StorageCache to decide if the data has to be reloaded. None means the signature is unknown.
+        """
+        return None
+
+    def get_changes(self, since: tuple|None) -> tuple[tuple|None, list[tuple[str, str]]|None]:
+        """
+        Returns a token of the current state and the changes since the state of the token since,
+        e.g. to update a website with only the changed movies.
+        Changes are ("add", key), ("delete", key) or ("note", key) tuples in the order they happened,
+        key is the case-folded title. None instead of the changes means they are unknown
+        and everything has to be read again.
+        Generic implementation on top of get_data_signature(), which only tells if nothing changed,
+        storages can override it.
+        """
+        signature = self.get_data_signature()
+        if since is not None and signature is not None and signature == since:
+            return signature, []
+        return signature, None
+
+    def query(self, min_rating: float|None = None, year_range: tuple|None = None, title_contains: str|None = None,
+              order_by: str|None = None, descending: bool = False, limit: int|None = None) -> list[dict]:
+        """
+        Returns the movies matching all given filters.
+        year_range is a tuple (start_year, end_year), both can be None for an open range.
+        order_by can be "title", "year" or "rating", None keeps the order of the storage.
+        Generic implementation on top of get_movies_data(), storages can override it with a faster one.
+        :return: list[dict]
+        """
+        if order_by not in (None, "title", "year", "rating"):
+            raise ValueError(f"Can't order movies by {order_by}")
+
+        start_year, end_year = year_range if year_range is not None else (None, None)
+        search_term = title_contains.lower() if title_contains else None
+
+        matching_movies = []
+        for movie in self.get_movies_data():
+            if min_rating is not None and movie["rating"] < min_rating:
+                continue
+            if start_year is not None and movie["year"] < start_year:
+                continue
+            if end_year is not None and movie["year"] > end_year:
+                continue
+            if search_term is not None and search_term not in str(movie["title"]).lower():
+                continue
+            matching_movies.append(movie)
+
+        if order_by is None:
+            return matching_movies if limit is None else matching_movies[:limit]
+        if limit is not None:
+            # Only keeps the top movies in a heap instead of sorting all of them
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(limit, matching_movies, key=lambda movie: movie[order_by])
+        return sorted(matching_movies, key=lambda movie: movie[order_by], reverse=descending)
+
+    def search_movies(self, search_term: str, prefix: bool = False, typo_tolerant: bool = False,
+                      limit: int = 10) -> list[dict]:
+        """
+        Returns the movies whose title contains the search term (case-insensitive) in storage order,
+        or the ones starting with it if prefix is True.
+        With typo_tolerant the search term may contain a few typos, then at most limit movies
+        are returned, best matches first.
+        Generic implementation scanning get_movies_data(), storages can override it with a search index.
+        :return: list[dict]
+        """
+        pattern = search_term.casefold()
+        movies = self.get_movies_data()
+        if not typo_tolerant:
+            if prefix:
+                return [movie for movie in movies if str(movie["title"]).casefold().startswith(pattern)]
+            return [movie for movie in movies if pattern in str(movie["title"]).casefold()]
+
+        max_distance = default_max_distance(pattern)
+        scored_movies = []
+        for position, movie in enumerate(movies):
+            distance = approximate_substring_distance(pattern, str(movie["title"]).casefold(), max_distance)
+            if distance <= max_distance:
+                scored_movies.append((distance, position, movie))
+        scored_movies.sort(key=lambda scored_movie: scored_movie[:2])
+        return [movie for _, _, movie in scored_movies[:limit]]
+
+    def iter_query(self, min_rating: float|None = None, year_range: tuple|None = None,
+                   title_contains: str|None = None, order_by: str|None = None, descending: bool = False,
+                   limit: int|None = None) -> Iterator[dict]:
+        """
+        Same as query(), but returns an iterator over the matching movies.
+        Generic implementation on top of query(), storages can override it to produce the movies lazily,
+        so the first results are available without materializing all of them.
+        :return: Iterator[dict]
+        """
+        return iter(self.query(min_rating, year_range, title_contains, order_by, descending, limit))
+
+    def count_movies(self) -> int:
+        """
+        Returns the number of movies.
+        Generic implementation on top of get_movies_data(), storages can override it with a faster one.
+        """
+        return len(self.get_movies_data())
+
+    def aggregate_ratings(self) -> dict|None:
+        """
+        Returns rating statistics of all movies as a dictionary with the keys
+        count, average, median, best, worst and per_decade. best and worst are lists of (title, rating) tuples,
+        per_decade maps each decade (e.g. 1990) to a tuple (count, average rating).
+        Generic implementation on top of get_movies_data(), storages can override it with a faster one.
+        :return: dict or None if there are no movies
+        """
+        movies = self.get_movies_data()
+        if not movies:
+            return None
+
+        rating_list = [float(movie["rating"]) for movie in movies]
+        best_rating = max(rating_list)
+        worst_rating = min(rating_list)
+
+        decades = {}
+        for movie in movies:
+            decade_ratings = decades.setdefault(int(movie["year"]) // 10 * 10, [])
+            decade_ratings.append(float(movie["rating"]))
+        return {
+            "count": len(rating_list),
+            "average": sum(rating_list) / len(rating_list),
+            "median": statistics.median(rating_list),
+            "best": [(movie["title"], movie["rating"]) for movie in movies if float(movie["rating"]) == best_rating],
+            "worst": [(movie["title"], movie["rating"]) for movie in movies if float(movie["rating"]) == worst_rating],
+            "per_decade": {
+                decade: (len(decade_ratings), sum(decade_ratings) / len(decade_ratings))
+                for decade, decade_ratings in sorted(decades.items())
+            }
+        }
+
+    def describe_ratings(self) -> dict|None:
+        """
+        Returns the distribution of the ratings of all movies, see movie_analytics.describe_ratings().
+        Generic implementation on top of get_movies_data(), storages can override it with a faster one.
+        :return: dict or None if there are no movies
+        """
+        movies = self.get_movies_data()
+        return describe_ratings([float(movie["rating"]) for movie in movies], [int(movie["year"]) for movie in movies])
@@ -0,0 +1,105 @@
+import json
+import re
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import TextIO
+
+
+_DECODER = json.JSONDecoder()
+_INDENTED_ENCODER = json.JSONEncoder(indent=4)
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_array(file_reader: TextIO, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+    """
+    Parses a JSON array of objects incrementally and yields one object at a time,
+    so only a chunk of the file and the current object are held in memory.
+    Raises json.JSONDecodeError if the file isn't an array of objects.
+    """
+    buffer = ""
+    position = 0
+    end_of_file = False
+
+    def fill() -> bool:
+        """Drops the parsed part of the buffer and reads the next chunk, returns False at the end of the file"""
+        nonlocal buffer, position, end_of_file
+        chunk = file_reader.read(chunk_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        end_of_file = not chunk
+        return not end_of_file
+
+    def next_token() -> str:
+        """Skips whitespace and returns the next character without consuming it, "" at the end of the file"""
+        nonlocal position
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            if not fill():
+                return ""
+
+    if next_token() != "[":
+        raise json.JSONDecodeError("Expected a JSON array", buffer, position)
+    position += 1
+    if next_token() == "]":
+        return
+
+    while True:
+        if next_token() != "{":
+            raise json.JSONDecodeError("Expected a JSON object", buffer, position)
+        while True:
+            try:
+                item, end = _DECODER.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                # Objects can't be parsed before their closing brace, read on unless the file ended
+                if end_of_file or not fill():
+                    raise
+        position = end
+        yield item
+
+        separator = next_token()
+        position += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise json.JSONDecodeError("Expected , or ] after an object", buffer, position - 1)
+
+
+def write_json_array(file_writer: TextIO, items: Iterable[dict], chunk_size: int = 1000) -> int:
+    """
+    Writes items as JSON array formatted like json.dump(items, indent=4),
+    while only holding chunk_size items in memory at once.
+    :return: number of written items
+    """
+    items = iter(items)
+    count = 0
+    separator = "[\n"
+    while chunk := list(islice(items, chunk_size)):
+        # Each chunk is encoded as indented array, without its brackets it's a part of the whole array
+        file_writer.write(separator + _INDENTED_ENCODER.encode(chunk)[2:-2])
+        separator = ",\n"
+        count += len(chunk)
+    file_writer.write("\n]" if count else "[]")
+    return count
+
+
+def iter_ndjson(file_reader: TextIO) -> Iterator[dict]:
+    """Yields the objects of a newline-delimited JSON file, empty lines are skipped"""
+    for line in file_reader:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_ndjson(file_writer: TextIO, items: Iterable[dict], chunk_size: int = 1000) -> int:
+    """
+    Writes items as newline-delimited JSON, one object per line, chunk_size lines per write.
+    :return: number of written items
+    """
+    items = iter(items)
+    count = 0
+    while chunk := list(islice(items, chunk_size)):
+        file_writer.write("".join(json.dumps(item) + "\n" for item in chunk))
+        count += len(chunk)
+    return count
@@ -0,0 +1,128 @@
+import math
+from collections.abc import Sequence
+
+# NumPy is optional, without it the pure Python implementations give the same results.
+# It gets imported on first use, so starting the program doesn't pay for it.
+np = None
+_numpy_imported = False
+
+
+PERCENTILES = (10, 25, 75, 90)
+RATING_BUCKETS = 10
+# Below this number of rows importing NumPy and converting the columns costs more than vectorizing saves
+MIN_NUMPY_ROWS = 5000
+
+
+def is_numpy_available() -> bool:
+    """Checks if NumPy is installed, imports it on the first call, returns bool"""
+    global np, _numpy_imported
+    if not _numpy_imported:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+        _numpy_imported = True
+    return np is not None
+
+
+def use_numpy(row_count: int) -> bool:
+    """Checks if the vectorized NumPy implementation is used for row_count rows, returns bool"""
+    return row_count >= MIN_NUMPY_ROWS and is_numpy_available()
+
+
+def describe_ratings(ratings: Sequence[float], years: Sequence[int]) -> dict|None:
+    """
+    Returns the distribution of the ratings as a dictionary with the keys
+    std_dev (population standard deviation), percentiles (maps each of PERCENTILES to a rating,
+    linearly interpolated), histogram (number of movies per whole rating 0-9, 10 is counted as 9)
+    and decade_histograms (maps each decade, e.g. 1990, to its histogram).
+    ratings and years are parallel sequences, typed arrays get used by NumPy without copying them.
+    :return: dict or None if there are no ratings
+    """
+    if len(ratings) == 0:
+        return None
+    if use_numpy(len(ratings)):
+        return _describe_ratings_numpy(ratings, years)
+    return _describe_ratings_python(ratings, years)
+
+
+def filter_rows(ratings: Sequence[float], years: Sequence[int], deleted: bytearray|None = None,
+                min_rating: float|None = None, start_year: int|None = None, end_year: int|None = None) -> list[int]|None:
+    """
+    Returns the ascending row numbers whose rating and year match the filters, using boolean masks.
+    Rows marked with a non-zero byte in deleted are skipped, like the deleted rows of MovieColumns.
+    :return: list of row numbers, None if NumPy isn't installed or there are too few rows, see use_numpy()
+    """
+    if not use_numpy(len(ratings)):
+        return None
+
+    mask = np.ones(len(ratings), dtype=bool)
+    if deleted is not None:
+        mask &= np.frombuffer(deleted, dtype=np.uint8, count=len(ratings)) == 0
+    if min_rating is not None:
+        mask &= _as_numpy_array(ratings, np.float64) >= min_rating
+    if start_year is not None or end_year is not None:
+        year_array = _as_numpy_array(years, np.int64)
+        if start_year is not None:
+            mask &= year_array >= start_year
+        if end_year is not None:
+            mask &= year_array <= end_year
+    return np.flatnonzero(mask).tolist()
+
+
+def _describe_ratings_numpy(ratings: Sequence[float], years: Sequence[int]) -> dict:
+    """Vectorized implementation of describe_ratings()"""
+    rating_array = _as_numpy_array(ratings, np.float64)
+    decade_array = _as_numpy_array(years, np.int64) // 10 * 10
+    buckets = np.clip(rating_array.astype(np.int64), 0, RATING_BUCKETS - 1)
+
+    decades, decade_indexes = np.unique(decade_array, return_inverse=True)
+    decade_histograms = np.bincount(
+        decade_indexes.ravel() * RATING_BUCKETS + buckets,
+        minlength=len(decades) * RATING_BUCKETS
+    ).reshape(len(decades), RATING_BUCKETS)
+    return {
+        "std_dev": float(rating_array.std()),
+        "percentiles": dict(zip(PERCENTILES, np.percentile(rating_array, PERCENTILES).tolist())),
+        "histogram": np.bincount(buckets, minlength=RATING_BUCKETS).tolist(),
+        "decade_histograms": dict(zip(decades.tolist(), decade_histograms.tolist()))
+    }
+
+
+def _describe_ratings_python(ratings: Sequence[float], years: Sequence[int]) -> dict:
+    """Pure Python implementation of describe_ratings()"""
+    sorted_ratings = sorted(float(rating) for rating in ratings)
+    count = len(sorted_ratings)
+    average = math.fsum(sorted_ratings) / count
+
+    histogram = [0] * RATING_BUCKETS
+    decade_histograms = {}
+    for rating, year in zip(ratings, years):
+        bucket = min(max(int(rating), 0), RATING_BUCKETS - 1)
+        histogram[bucket] += 1
+        decade_histograms.setdefault(int(year) // 10 * 10, [0] * RATING_BUCKETS)[bucket] += 1
+    return {
+        "std_dev": math.sqrt(math.fsum((rating - average) ** 2 for rating in sorted_ratings) / count),
+        "percentiles": {
+            percentile: _get_percentile(sorted_ratings, percentile) for percentile in PERCENTILES
+        },
+        "histogram": histogram,
+        "decade_histograms": dict(sorted(decade_histograms.items()))
+    }
+
+
+def _get_percentile(sorted_ratings: list[float], percentile: float) -> float:
+    """Returns a percentile of sorted ratings, linearly interpolated like NumPy's default"""
+    position = (len(sorted_ratings) - 1) * percentile / 100
+    lower_index = math.floor(position)
+    upper_index = min(lower_index + 1, len(sorted_ratings) - 1)
+    fraction = position - lower_index
+    return sorted_ratings[lower_index] + (sorted_ratings[upper_index] - sorted_ratings[lower_index]) * fraction
+
+
+def _as_numpy_array(values: Sequence, dtype) -> "np.ndarray":
+    """Returns a NumPy array of values, typed arrays of the same type are wrapped without copying"""
+    if hasattr(values, "typecode") and np.dtype(values.typecode) == np.dtype(dtype):
+        return np.frombuffer(values, dtype=dtype)
+    return np.asarray(values, dtype=dtype)
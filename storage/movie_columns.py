@@ -0,0 +1,94 @@
+import sys
+from array import array
+from collections.abc import Iterator
+
+
+class MovieColumns:
+    """
+    Compact in-memory representation of a movie library, one column per field instead of a dict per movie.
+    Years and ratings are stored in typed arrays, titles are interned strings.
+    Rows are addressed by their number, which stays the same until compacted() is called:
+    deleting a movie only marks its row as deleted.
+    """
+    def __init__(self, movies: list[dict]|None = None) -> None:
+        """Initializes empty columns and appends the given movies"""
+        self.titles = []
+        # Signed 64 bit, so hand-edited years like 70000 or -500 can still be loaded
+        self.years = array('q')
+        # Doubles instead of floats, so ratings like 8.8 come back unchanged
+        self.ratings = array('d')
+        self.poster_urls = []
+        self.notes = []
+        self._deleted = bytearray()
+        self._deleted_count = 0
+        for movie in movies or []:
+            self.append(movie)
+
+    def __len__(self) -> int:
+        """Returns the number of movies which aren't deleted"""
+        return len(self.titles) - self._deleted_count
+
+    @property
+    def row_count(self) -> int:
+        """Returns the number of rows including deleted ones"""
+        return len(self.titles)
+
+    @property
+    def deleted_count(self) -> int:
+        """Returns the number of deleted rows"""
+        return self._deleted_count
+
+    @property
+    def deleted_mask(self) -> bytearray:
+        """Returns one byte per row, which isn't zero if the row was deleted"""
+        return self._deleted
+
+    def append(self, movie: dict) -> int:
+        """Appends a movie and returns its row number"""
+        self.titles.append(sys.intern(str(movie["title"])))
+        self.years.append(int(movie["year"]))
+        self.ratings.append(float(movie["rating"]))
+        self.poster_urls.append(movie.get("poster_url"))
+        self.notes.append(movie.get("note"))
+        self._deleted.append(0)
+        return len(self.titles) - 1
+
+    def delete(self, row: int) -> None:
+        """Marks a row as deleted"""
+        if not self._deleted[row]:
+            self._deleted[row] = 1
+            self._deleted_count += 1
+
+    def is_deleted(self, row: int) -> bool:
+        """Checks if a row was deleted, returns bool"""
+        return bool(self._deleted[row])
+
+    def iter_rows(self) -> Iterator[int]:
+        """Yields the numbers of all rows which aren't deleted, in insertion order"""
+        if self._deleted_count == 0:
+            return iter(range(len(self.titles)))
+        return (row for row in range(len(self.titles)) if not self._deleted[row])
+
+    def get_movie(self, row: int) -> dict:
+        """Returns a row as the movie dictionary used by the storages, the note only if there is one"""
+        movie = {
+            "title": self.titles[row],
+            "year": self.years[row],
+            "rating": self.ratings[row],
+            "poster_url": self.poster_urls[row]
+        }
+        if self.notes[row] is not None:
+            movie["note"] = self.notes[row]
+        return movie
+
+    def compacted(self) -> "MovieColumns":
+        """Returns new columns without the deleted rows, row numbers change"""
+        rows = list(self.iter_rows())
+        columns = MovieColumns()
+        columns.titles = [self.titles[row] for row in rows]
+        columns.years = array('q', (self.years[row] for row in rows))
+        columns.ratings = array('d', (self.ratings[row] for row in rows))
+        columns.poster_urls = [self.poster_urls[row] for row in rows]
+        columns.notes = [self.notes[row] for row in rows]
+        columns._deleted = bytearray(len(rows))
+        return columns
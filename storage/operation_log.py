@@ -0,0 +1,179 @@
+import json
+import os
+from collections.abc import Callable, Iterable, Iterator
+
+
+class OperationLog:
+    """
+    Append-only log of add, delete and note operations, stored as one JSON object per line next to a database file.
+    Storages append single operations to the log instead of rewriting their whole file
+    and replay the log on top of their file content when loading.
+    """
+    def __init__(self, file_path: str, max_size: int = 1024 * 1024):
+        """Initializes the path of the log file and the size in bytes after which it should be compacted"""
+        if not isinstance(file_path, str):
+            raise TypeError(f"Expected string for file_path, got {type(file_path).__name__} instead.")
+        if not file_path.strip():
+            raise ValueError("Empty string is invalid")
+
+        self._filepath = file_path
+        self._max_size = max_size
+
+    def log_add(self, movie: dict) -> None:
+        """Appends an add operation for a single movie"""
+        self._append([{"op": "add", "movie": movie}])
+
+    def log_add_many(self, movies: list[dict]) -> None:
+        """Appends add operations for multiple movies with a single write"""
+        self._append([{"op": "add", "movie": movie} for movie in movies])
+
+    def log_delete(self, title: str) -> None:
+        """Appends a delete operation"""
+        self._append([{"op": "delete", "title": title}])
+
+    def log_note(self, title: str, note: str) -> None:
+        """Appends a note operation"""
+        self._append([{"op": "note", "title": title, "note": note}])
+
+    def read_operations(self) -> list[dict]:
+        """
+        Reads all operations from the log file.
+        Lines which can't be parsed (e.g. an append interrupted by a crash) are skipped.
+        :return: list[dict]
+        """
+        if not os.path.isfile(self._filepath):
+            return []
+
+        operations = []
+        with open(self._filepath, "r", encoding='utf-8') as log_reader:
+            for line in log_reader:
+                try:
+                    operations.append(json.loads(line))
+                except json.decoder.JSONDecodeError:
+                    continue
+        return operations
+
+    def replay(self, movies: list[dict]) -> list[dict]:
+        """
+        Applies all logged operations to the given movies and returns the result.
+        Titles are looked up in a dictionary, so replaying costs O(movies + operations).
+        Adds of titles which exist already are skipped, so replaying a log again on top of
+        the compacted file (e.g. after a crash before the log was cleared) doesn't change the movies.
+        :return: list[dict]
+        """
+        operations = self.read_operations()
+        if not operations:
+            return movies
+
+        positions = {}
+        for index, movie in enumerate(movies):
+            positions.setdefault(movie["title"], []).append(index)
+
+        for operation in operations:
+            match operation.get("op"):
+                case "add":
+                    if operation["movie"]["title"] in positions:
+                        continue
+                    positions[operation["movie"]["title"]] = [len(movies)]
+                    movies.append(operation["movie"])
+                case "delete":
+                    for index in positions.pop(operation["title"], []):
+                        movies[index] = None
+                case "note":
+                    for index in positions.get(operation["title"], []):
+                        movies[index]["note"] = operation["note"]
+
+        return [movie for movie in movies if movie is not None]
+
+    def replay_stream(self, read_movies: Callable[[], Iterable[dict]]) -> Iterator[dict]:
+        """
+        Same as replay(), but yields the resulting movies one by one instead of building a list.
+        read_movies returns a new iterable over the movies of the database file, it gets called twice if there
+        are logged operations: first to find out which of the logged titles exist, then to yield the movies.
+        Only the state of the logged titles is kept in memory, so memory use depends on the size of the log.
+        :return: Iterator[dict]
+        """
+        operations = self.read_operations()
+        if not operations:
+            yield from read_movies()
+            return
+
+        logged_titles = {
+            operation["movie"]["title"] if operation.get("op") == "add" else operation.get("title")
+            for operation in operations
+        }
+        existing_titles = {movie["title"] for movie in read_movies() if movie["title"] in logged_titles}
+
+        # Per logged title: whether the movies of the file still exist, their new note and the added movie
+        file_exists = {title: title in existing_titles for title in logged_titles}
+        file_notes = {}
+        added_movies = {}
+        for operation in operations:
+            match operation.get("op"):
+                case "add":
+                    title = operation["movie"]["title"]
+                    if file_exists[title] or title in added_movies:
+                        continue
+                    added_movies[title] = dict(operation["movie"])
+                case "delete":
+                    file_exists[operation["title"]] = False
+                    file_notes.pop(operation["title"], None)
+                    added_movies.pop(operation["title"], None)
+                case "note":
+                    if file_exists[operation["title"]]:
+                        file_notes[operation["title"]] = operation["note"]
+                    elif operation["title"] in added_movies:
+                        added_movies[operation["title"]]["note"] = operation["note"]
+
+        for movie in read_movies():
+            title = movie["title"]
+            if title in file_exists:
+                if not file_exists[title]:
+                    continue
+                if title in file_notes:
+                    movie["note"] = file_notes[title]
+            yield movie
+        # Dictionaries keep the insertion order, re-added titles were removed before, so this is the order of replay()
+        yield from added_movies.values()
+
+    def needs_compaction(self) -> bool:
+        """Checks if the log file grew past its maximum size, returns bool"""
+        return self.get_size() > self._max_size
+
+    def get_size(self) -> int:
+        """Returns the size of the log file in bytes, 0 if it doesn't exist"""
+        try:
+            return os.path.getsize(self._filepath)
+        except FileNotFoundError:
+            return 0
+
+    def get_signature(self) -> tuple|None:
+        """Returns modification time and size of the log file, None if it doesn't exist"""
+        try:
+            file_stat = os.stat(self._filepath)
+        except FileNotFoundError:
+            return None
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def clear(self) -> None:
+        """Removes the log file, gets called after its operations were written to the database file"""
+        try:
+            os.remove(self._filepath)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, operations: list[dict]) -> None:
+        """
+        Writes operations to the end of the log file, one JSON object per line, and fsyncs it.
+        If the last append was interrupted by a crash, the new operations start on a new line,
+        so only the broken line gets skipped when reading.
+        """
+        lines = "".join(json.dumps(operation) + "\n" for operation in operations).encode('utf-8')
+        with open(self._filepath, "a+b") as log_writer:
+            if log_writer.tell() > 0:
+                log_writer.seek(-1, os.SEEK_END)
+                if log_writer.read(1) != b"\n":
+                    lines = b"\n" + lines
+            log_writer.write(lines)
+            log_writer.flush()
+            os.fsync(log_writer.fileno())
@@ -0,0 +1,121 @@
+import bisect
+import math
+
+# Every finite float is a multiple of 2 ** -1074, so sums scaled by 2 ** 1074 are exact integers
+FIXED_POINT_BITS = 1074
+
+
+class RatingStats:
+    """
+    Keeps rating statistics up to date while movies are added and removed, instead of recomputing them.
+    Holds an exact running sum and count, a sorted list of all ratings for the median,
+    the titles per rating for the best/worst movies and exact running sums per decade.
+    The sums are fixed point integers, so they don't drift after many add/remove cycles.
+    The sorted ratings are a plain list: each add or remove bisects in O(log N) but then moves
+    the list behind the position, which is O(N) (a memmove, about a millisecond per million ratings).
+    """
+    def __init__(self, titles: list[str]|None = None, years: list[int]|None = None,
+                 ratings: list[float]|None = None) -> None:
+        """Initializes the statistics with the movies given as columns, sorting all ratings only once"""
+        titles, years, ratings = titles or [], years or [], [float(rating) for rating in ratings or []]
+        self._rating_sum = self._exact_sum(ratings)
+        self._sorted_ratings = sorted(ratings)
+        self._titles_by_rating = {}
+        ratings_by_decade = {}
+        for title, year, rating in zip(titles, years, ratings):
+            self._titles_by_rating.setdefault(rating, {})[title] = None
+            ratings_by_decade.setdefault(self._get_decade(year), []).append(rating)
+        self._decades = {
+            decade: [self._exact_sum(decade_ratings), len(decade_ratings)]
+            for decade, decade_ratings in ratings_by_decade.items()
+        }
+
+    def add(self, title: str, year: int, rating: float) -> None:
+        """Adds the rating of a movie, O(log N) search plus the O(N) insert into the sorted ratings"""
+        rating = float(rating)
+        fixed_rating = self._to_fixed_point(rating)
+        self._rating_sum += fixed_rating
+        bisect.insort(self._sorted_ratings, rating)
+        self._titles_by_rating.setdefault(rating, {})[title] = None
+
+        decade_stats = self._decades.setdefault(self._get_decade(year), [0, 0])
+        decade_stats[0] += fixed_rating
+        decade_stats[1] += 1
+
+    def remove(self, title: str, year: int, rating: float) -> None:
+        """Removes the rating of a movie which was added before, O(log N) search plus the O(N) delete"""
+        rating = float(rating)
+        titles = self._titles_by_rating.get(rating, {})
+        if title not in titles:
+            return
+        del titles[title]
+        if not titles:
+            del self._titles_by_rating[rating]
+
+        fixed_rating = self._to_fixed_point(rating)
+        self._rating_sum -= fixed_rating
+        del self._sorted_ratings[bisect.bisect_left(self._sorted_ratings, rating)]
+
+        decade = self._get_decade(year)
+        decade_stats = self._decades[decade]
+        decade_stats[0] -= fixed_rating
+        decade_stats[1] -= 1
+        if decade_stats[1] == 0:
+            del self._decades[decade]
+
+    def get_summary(self) -> dict|None:
+        """
+        Returns the statistics in the format of IStorage.aggregate_ratings().
+        The averages are the exact sums divided by the counts, rounded only once.
+        :return: dict or None if there are no ratings
+        """
+        count = len(self._sorted_ratings)
+        if count == 0:
+            return None
+
+        middle = count // 2
+        if count % 2:
+            median = self._sorted_ratings[middle]
+        else:
+            median = (self._sorted_ratings[middle - 1] + self._sorted_ratings[middle]) / 2
+        best_rating = self._sorted_ratings[-1]
+        worst_rating = self._sorted_ratings[0]
+        return {
+            "count": count,
+            "average": self._rating_sum / (count << FIXED_POINT_BITS),
+            "median": median,
+            "best": [(title, best_rating) for title in self._titles_by_rating[best_rating]],
+            "worst": [(title, worst_rating) for title in self._titles_by_rating[worst_rating]],
+            "per_decade": {
+                decade: (decade_count, decade_sum / (decade_count << FIXED_POINT_BITS))
+                for decade, (decade_sum, decade_count) in sorted(self._decades.items())
+            }
+        }
+
+    @staticmethod
+    def _to_fixed_point(value: float) -> int:
+        """Returns a finite float as an exact integer multiple of 2 ** -FIXED_POINT_BITS"""
+        numerator, denominator = value.as_integer_ratio()
+        return numerator << (FIXED_POINT_BITS + 1 - denominator.bit_length())
+
+    @classmethod
+    def _exact_sum(cls, values: list[float]) -> int:
+        """
+        Returns the exact sum of the values as a fixed point integer.
+        Instead of converting every value, math.fsum() rounds the sum and is called again
+        on the remaining error until it is zero, which usually takes two or three passes.
+        :return: sum scaled by 2 ** FIXED_POINT_BITS
+        """
+        total = 0
+        residuals = list(values)
+        while True:
+            partial = math.fsum(residuals)
+            if partial == 0:
+                return total
+            total += cls._to_fixed_point(partial)
+            residuals.append(-partial)
+
+    @staticmethod
+    def _get_decade(year: int) -> int:
+        """Returns the decade of a year, e.g. 1990 for 1999"""
+        return int(year) // 10 * 10
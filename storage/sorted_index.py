@@ -0,0 +1,59 @@
+import bisect
+from collections.abc import Iterator
+
+
+class SortedIndex:
+    """
+    Secondary index keeping items sorted by a value (e.g. rating or year) in bisect-backed lists.
+    Equal values are ordered by a position, so the order is stable like sorted().
+    Inserts and deletes cost O(log N) plus moving the list, range scans O(log N + k).
+    """
+    def __init__(self, entries: list[tuple]|None = None) -> None:
+        """Initializes the index with (value, position, item) tuples, sorting them only once"""
+        entries = sorted(entries or [], key=lambda entry: entry[:2])
+        self._keys = [(value, position) for value, position, _ in entries]
+        self._items = [item for _, _, item in entries]
+
+    def __len__(self) -> int:
+        """Returns the number of indexed items"""
+        return len(self._items)
+
+    def add(self, value, position: int, item) -> None:
+        """Adds an item with its value and position"""
+        index = bisect.bisect_left(self._keys, (value, position))
+        self._keys.insert(index, (value, position))
+        self._items.insert(index, item)
+
+    def remove(self, value, position: int) -> None:
+        """Removes the item which was added with this value and position"""
+        index = bisect.bisect_left(self._keys, (value, position))
+        if index < len(self._keys) and self._keys[index] == (value, position):
+            del self._keys[index]
+            del self._items[index]
+
+    def count_range(self, low=None, high=None) -> int:
+        """Returns the number of items with low <= value <= high, None means unbounded"""
+        start, end = self._get_bounds(low, high)
+        return end - start
+
+    def iter_range(self, low=None, high=None, descending: bool = False) -> Iterator:
+        """
+        Lazily yields the items with low <= value <= high, None means unbounded.
+        Items with equal values are always yielded by ascending position,
+        so descending=True gives the same order as sorted(reverse=True).
+        """
+        start, end = self._get_bounds(low, high)
+        if not descending:
+            yield from self._items[start:end]
+            return
+
+        while end > start:
+            group_start = bisect.bisect_left(self._keys, (self._keys[end - 1][0],), start, end)
+            yield from self._items[group_start:end]
+            end = group_start
+
+    def _get_bounds(self, low, high) -> tuple[int, int]:
+        """Returns the slice of the sorted lists with low <= value <= high"""
+        start = 0 if low is None else bisect.bisect_left(self._keys, (low,))
+        end = len(self._keys) if high is None else bisect.bisect_right(self._keys, (high, float('inf')))
+        return start, max(start, end)
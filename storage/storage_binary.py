@@ -0,0 +1,233 @@
+import mmap
+import os.path
+import shutil
+import struct
+import tempfile
+from collections.abc import Iterable, Iterator
+from storage.atomic_file import atomic_open
+from storage.file_storage import FileStorage
+
+
+MAGIC = b"MVDB"
+FORMAT_VERSION = 2
+# magic, version, flags, record count, offset of the records, offset and size of the string table
+HEADER = struct.Struct("<4sHHIQQQ")
+# offset and length of title, poster url and note in the string table, year, rating
+RECORD = struct.Struct("<IIIIIIqd")
+# Version 1 stored the year unsigned in 16 bit, its snapshots can still be read
+RECORDS_BY_VERSION = {1: struct.Struct("<IIIIIIHd"), FORMAT_VERSION: RECORD}
+# Length of strings which are None, e.g. movies without a note
+NULL_LENGTH = 0xFFFFFFFF
+# Set if the string table is pure ASCII, byte offsets are character offsets then
+FLAG_ASCII = 1
+
+
+class BinarySnapshot:
+    """
+    Read access to a binary snapshot file, which is memory-mapped instead of parsed.
+    The file consists of a header, fixed-size records and a string table with all titles,
+    poster urls and notes as UTF-8. Records point into the string table by offset and length,
+    so the n-th movie can be read directly from its offset without touching the others.
+    """
+    def __init__(self, file_path: str) -> None:
+        """
+        Maps the file and checks its header.
+        Raises ValueError if the file isn't a valid snapshot.
+        """
+        with open(file_path, "rb") as snapshot_file:
+            file_size = os.fstat(snapshot_file.fileno()).st_size
+            if file_size < HEADER.size:
+                raise ValueError(f"{file_path} is too small to be a snapshot")
+            self._map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self._flags, self._count, self._records_offset, self._strings_offset, strings_size = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version not in RECORDS_BY_VERSION:
+            self.close()
+            raise ValueError(f"{file_path} isn't a snapshot of version {', '.join(map(str, RECORDS_BY_VERSION))}")
+        self._record = RECORDS_BY_VERSION[version]
+        if self._records_offset + self._count * self._record.size > file_size \
+                or self._strings_offset + strings_size > file_size:
+            self.close()
+            raise ValueError(f"{file_path} is truncated")
+        self._strings_size = strings_size
+
+    def __len__(self) -> int:
+        """Returns the number of movies, read from the header"""
+        return self._count
+
+    def __enter__(self) -> "BinarySnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_movie(self, index: int) -> dict:
+        """Reads the movie at index directly from its record"""
+        if not 0 <= index < self._count:
+            raise IndexError("movie index out of range")
+        record = self._record.unpack_from(self._map, self._records_offset + index * self._record.size)
+        return self._record_to_movie(record, self._read_string)
+
+    def iter_movies(self) -> Iterator[dict]:
+        """Lazily yields all movies in their stored order, decoding one record at a time"""
+        for index in range(self._count):
+            yield self.get_movie(index)
+
+    def load_movies(self) -> list[dict]:
+        """
+        Reads all movies at once.
+        The records get unpacked in a single pass and an ASCII string table is decoded with a single call
+        and sliced afterwards, so only the dictionaries have to be built per movie.
+        """
+        records_end = self._records_offset + self._count * self._record.size
+        records = self._record.iter_unpack(self._map[self._records_offset:records_end])
+        strings = self._map[self._strings_offset:self._strings_offset + self._strings_size]
+        if not self._flags & FLAG_ASCII:
+            read_string = self._decode_slice(strings)
+            return [self._record_to_movie(record, read_string) for record in records]
+
+        text = strings.decode("ascii")
+        movies = []
+        append = movies.append
+        for title_offset, title_length, poster_offset, poster_length, note_offset, note_length, year, rating in records:
+            movie = {
+                "title": text[title_offset:title_offset + title_length],
+                "year": year,
+                "rating": rating,
+                "poster_url": text[poster_offset:poster_offset + poster_length] if poster_length != NULL_LENGTH else None
+            }
+            if note_length != NULL_LENGTH:
+                movie["note"] = text[note_offset:note_offset + note_length]
+            append(movie)
+        return movies
+
+    def close(self) -> None:
+        """Unmaps the file"""
+        self._map.close()
+
+    def _read_string(self, offset: int, length: int) -> str:
+        """Reads a single string from the mapped string table"""
+        start = self._strings_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    @staticmethod
+    def _decode_slice(strings: bytes):
+        """Returns a function reading a UTF-8 string from the string table by offset and length"""
+        return lambda offset, length: strings[offset:offset + length].decode("utf-8")
+
+    @staticmethod
+    def _record_to_movie(record: tuple, read_string) -> dict:
+        """Converts a record into a movie dictionary, the note only if there is one"""
+        title_offset, title_length, poster_offset, poster_length, note_offset, note_length, year, rating = record
+        movie = {
+            "title": read_string(title_offset, title_length),
+            "year": year,
+            "rating": rating,
+            "poster_url": read_string(poster_offset, poster_length) if poster_length != NULL_LENGTH else None
+        }
+        if note_length != NULL_LENGTH:
+            movie["note"] = read_string(note_offset, note_length)
+        return movie
+
+
+def write_snapshot(file_path: str, movies: Iterable[dict]) -> int:
+    """
+    Writes movies as binary snapshot, atomically replacing file_path.
+    Records are written while the movies are consumed, the string table is collected in a temporary file
+    next to it and appended afterwards, so memory use doesn't grow with the number of movies.
+    :return: number of written movies
+    """
+    strings_size = 0
+    is_ascii = True
+
+    def add_string(value) -> tuple[int, int]:
+        nonlocal strings_size, is_ascii
+        if value is None:
+            return 0, NULL_LENGTH
+        value = str(value)
+        encoded = value.encode("utf-8")
+        is_ascii = is_ascii and value.isascii()
+        strings_file.write(encoded)
+        strings_size += len(encoded)
+        return strings_size - len(encoded), len(encoded)
+
+    count = 0
+    with atomic_open(file_path, "wb") as snapshot_file, \
+            tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(file_path))) as strings_file:
+        snapshot_file.write(bytes(HEADER.size))
+        for movie in movies:
+            snapshot_file.write(RECORD.pack(
+                *add_string(movie["title"]),
+                *add_string(movie.get("poster_url")),
+                *add_string(movie.get("note")),
+                int(movie["year"]),
+                float(movie["rating"])
+            ))
+            count += 1
+        strings_offset = HEADER.size + count * RECORD.size
+        strings_file.seek(0)
+        shutil.copyfileobj(strings_file, snapshot_file, 1024 * 1024)
+        snapshot_file.seek(0)
+        snapshot_file.write(HEADER.pack(
+            MAGIC, FORMAT_VERSION, FLAG_ASCII if is_ascii else 0, count, HEADER.size, strings_offset, strings_size
+        ))
+    return count
+
+
+class StorageBinary(FileStorage):
+    """
+    Handle data when working with a binary snapshot file (.mvdb), see BinarySnapshot and FileStorage.
+    Loading maps the file instead of parsing text, mutations get appended to an operation log
+    like in the JSON and CSV storages and are compacted into a new snapshot.
+    """
+    def get_movie(self, title: str) -> dict|None:
+        """
+        Looks up a movie case-insensitive.
+        Without pending operations in the log, the snapshot is scanned lazily and the scan stops at the match.
+        """
+        if self._log.get_size() > 0:
+            return super().get_movie(title)
+
+        search_title = title.casefold()
+        with self._lock.shared():
+            try:
+                with BinarySnapshot(self._filepath) as snapshot:
+                    for movie in snapshot.iter_movies():
+                        if movie["title"].casefold() == search_title:
+                            return movie
+                    return None
+            except (FileNotFoundError, ValueError):
+                pass
+        return super().get_movie(title)
+
+    def count_movies(self) -> int:
+        """Returns the number of movies from the snapshot header if there are no pending operations"""
+        if self._log.get_size() > 0:
+            return super().count_movies()
+        with self._lock.shared():
+            try:
+                with BinarySnapshot(self._filepath) as snapshot:
+                    return len(snapshot)
+            except (FileNotFoundError, ValueError):
+                pass
+        return super().count_movies()
+
+    def _load_file(self) -> list[dict]:
+        """Reads all movies of the snapshot at once, see BinarySnapshot.load_movies()"""
+        with BinarySnapshot(self._filepath) as snapshot:
+            return snapshot.load_movies()
+
+    def _iter_file(self) -> Iterator[dict]:
+        """Yields the movies of the snapshot one by one without replaying the operation log"""
+        with BinarySnapshot(self._filepath) as snapshot:
+            yield from snapshot.iter_movies()
+
+    def _write_file(self, movies: Iterable[dict]) -> None:
+        """Writes the movies as new snapshot, see write_snapshot()"""
+        write_snapshot(self._filepath, movies)
+
+    def _count_file_movies(self) -> int:
+        """Returns the number of movies from the snapshot header without reading the records"""
+        with BinarySnapshot(self._filepath) as snapshot:
+            return len(snapshot)
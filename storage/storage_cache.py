@@ -0,0 +1,380 @@
+import threading
+from array import array
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager
+from itertools import islice
+from storage import movie_analytics
+from storage.istorage import IStorage
+from storage.movie_columns import MovieColumns
+from storage.rating_stats import RatingStats
+from storage.sorted_index import SortedIndex
+from storage.title_search_index import TitleSearchIndex
+
+
+# Changes kept for get_changes() before starting over, more if there are more movies
+MIN_TRACKED_CHANGES = 1000
+
+
+class StorageCache(IStorage):
+    """
+    Keeps the movies of another IStorage in memory, stored compactly in MovieColumns.
+    The wrapped storage only gets parsed again if its data signature changed,
+    e.g. because the file was edited outside the app.
+    Rows are indexed by their case-folded title, so lookups, deletes and updates are O(1).
+    Searches use a trigram index, rating statistics are kept in a RatingStats object and
+    queries use sorted indexes on rating and year. All of them get built on first use
+    and updated on every mutation.
+    Mutations hold the lock of the wrapped storage and check its data signature first, so a write of
+    another process since the last load causes a reload instead of updating outdated data.
+    Several threads may read at once while none mutates, reloads and the indexes built on first use
+    are built under a lock, so they are only built once and never seen half-built.
+    """
+    def __init__(self, storage: IStorage, compaction_ratio: float = 0.5):
+        """
+        Initializes the wrapped storage and an empty cache.
+        Deleted rows get dropped from memory once they make up more than compaction_ratio of all rows.
+        """
+        if not isinstance(storage, IStorage):
+            raise TypeError(f"Expected storage to be instance of IStorage, got {type(storage).__name__} instead.")
+
+        self._storage = storage
+        self._compaction_ratio = compaction_ratio
+        self._columns = None
+        self._rows_by_title = {}
+        self._search_index = None
+        self._rating_stats = None
+        self._rating_index = None
+        self._year_index = None
+        self._signature = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # Changes since the movies were loaded, see get_changes(), the generation increases on every reload
+        self._changes = []
+        self._changes_generation = 0
+        self._build_lock = threading.Lock()
+
+    def get_movies_data(self) -> list[dict]:
+        """
+        Returns the cached movies, reloads them from the wrapped storage first if they are outdated.
+        :return: list[dict]
+        """
+        self._refresh()
+        return [self._columns.get_movie(row) for row in self._columns.iter_rows()]
+
+    def get_movie(self, title: str) -> dict|None:
+        """Looks up a movie in the title index, case-insensitive"""
+        self._refresh()
+        row = self._rows_by_title.get(title.casefold())
+        return self._columns.get_movie(row) if row is not None else None
+
+    def search_movies(self, search_term: str, prefix: bool = False, typo_tolerant: bool = False,
+                      limit: int = 10) -> list[dict]:
+        """Searches the titles using the trigram index, see IStorage.search_movies()"""
+        self._refresh()
+        if self._search_index is None:
+            with self._build_lock:
+                if self._search_index is None:
+                    self._search_index = TitleSearchIndex(list(self._rows_by_title))
+
+        if typo_tolerant:
+            keys = self._search_index.search_typo_tolerant(search_term, limit=limit)
+        else:
+            keys = self._search_index.search(search_term, prefix)
+        return [self._columns.get_movie(self._rows_by_title[key]) for key in keys]
+
+    def query(self, min_rating: float|None = None, year_range: tuple|None = None, title_contains: str|None = None,
+              order_by: str|None = None, descending: bool = False, limit: int|None = None) -> list[dict]:
+        """Returns the movies matching all given filters as list, see iter_query()"""
+        return list(self.iter_query(min_rating, year_range, title_contains, order_by, descending, limit))
+
+    def iter_query(self, min_rating: float|None = None, year_range: tuple|None = None,
+                   title_contains: str|None = None, order_by: str|None = None, descending: bool = False,
+                   limit: int|None = None) -> Iterator[dict]:
+        """
+        Lazily yields the movies matching all given filters, see IStorage.query().
+        Ordering by or filtering on rating and year are range scans over the sorted indexes,
+        so only movies within the range get visited and nothing has to be sorted.
+        Without ordering, rating and year filters are vectorized boolean masks if NumPy is installed.
+        Filters are checked on the columns, only matching rows get turned into dictionaries.
+        The iterator shouldn't be used anymore after the movies were modified.
+        """
+        if order_by not in (None, "title", "year", "rating"):
+            raise ValueError(f"Can't order movies by {order_by}")
+        if order_by == "title":
+            return iter(super().query(min_rating, year_range, title_contains, order_by, descending, limit))
+
+        self._refresh()
+        columns = self._columns
+        start_year, end_year = year_range if year_range is not None else (None, None)
+        has_year_filter = start_year is not None or end_year is not None
+        has_filter = min_rating is not None or has_year_filter
+        use_masks = order_by is None and has_filter and movie_analytics.use_numpy(len(columns.ratings))
+        if (order_by is not None or has_filter) and not use_masks:
+            self._build_sorted_indexes()
+
+        if order_by == "rating":
+            candidate_rows = self._rating_index.iter_range(min_rating, None, descending)
+        elif order_by == "year":
+            candidate_rows = self._year_index.iter_range(start_year, end_year, descending)
+        elif not has_filter:
+            candidate_rows = columns.iter_rows()
+        elif use_masks:
+            # Boolean masks over the columns already give the rows in storage order
+            candidate_rows = iter(movie_analytics.filter_rows(
+                columns.ratings, columns.years, columns.deleted_mask, min_rating, start_year, end_year
+            ))
+        else:
+            # Scan the more selective index, then restore the storage order of the few matches
+            rating_count = self._rating_index.count_range(min_rating, None) if min_rating is not None else None
+            year_count = self._year_index.count_range(start_year, end_year) if has_year_filter else None
+            if year_count is None or (rating_count is not None and rating_count < year_count):
+                candidate_rows = iter(sorted(self._rating_index.iter_range(min_rating, None)))
+            else:
+                candidate_rows = iter(sorted(self._year_index.iter_range(start_year, end_year)))
+
+        titles, years, ratings = columns.titles, columns.years, columns.ratings
+        search_term = title_contains.lower() if title_contains else None
+        matching_rows = (
+            row for row in candidate_rows
+            if (min_rating is None or ratings[row] >= min_rating)
+            and (start_year is None or years[row] >= start_year)
+            and (end_year is None or years[row] <= end_year)
+            and (search_term is None or search_term in titles[row].lower())
+        )
+        return map(columns.get_movie, islice(matching_rows, limit))
+
+    def iter_movies(self, repair: bool = True) -> Iterator[dict]:
+        """
+        Lazily yields the cached movies in storage order, see iter_query().
+        Without repair the storage gets read directly, as loading the cache could repair it.
+        """
+        if not repair:
+            return self._storage.iter_movies(repair=False)
+        return self.iter_query()
+
+    def count_movies(self) -> int:
+        """Returns the number of cached movies"""
+        self._refresh()
+        return len(self._columns)
+
+    def aggregate_ratings(self) -> dict|None:
+        """Returns the incrementally maintained rating statistics, see IStorage.aggregate_ratings()"""
+        self._refresh()
+        if self._rating_stats is None:
+            with self._build_lock:
+                if self._rating_stats is None:
+                    columns = self._columns
+                    rows = list(columns.iter_rows())
+                    self._rating_stats = RatingStats(
+                        [columns.titles[row] for row in rows],
+                        [columns.years[row] for row in rows],
+                        [columns.ratings[row] for row in rows]
+                    )
+        return self._rating_stats.get_summary()
+
+    def describe_ratings(self) -> dict|None:
+        """Computes the rating distribution on the columns, see IStorage.describe_ratings()"""
+        self._refresh()
+        columns = self._columns
+        if columns.deleted_count == 0:
+            return movie_analytics.describe_ratings(columns.ratings, columns.years)
+        rows = list(columns.iter_rows())
+        return movie_analytics.describe_ratings(
+            array('d', (columns.ratings[row] for row in rows)),
+            array('q', (columns.years[row] for row in rows))
+        )
+
+    def write_movies_data(self, title: str, year: int, rating: float, poster_url: str) -> None:
+        """Adds a movie to the wrapped storage and to the cache"""
+        with self._storage.locked():
+            self._refresh()
+            self._storage.write_movies_data(title, year, rating, poster_url)
+            if self._add_to_cache({
+                "title": title,
+                "year": year,
+                "rating": rating,
+                "poster_url": poster_url
+            }):
+                self._record_change("add", title.casefold())
+            self._signature = self._storage.get_data_signature()
+
+    def write_many_movies_data(self, movies: list[dict]) -> None:
+        """Adds multiple movies to the wrapped storage with a single write and to the cache"""
+        with self._storage.locked():
+            self._refresh()
+            self._storage.write_many_movies_data(movies)
+            for movie in movies:
+                if self._add_to_cache(movie):
+                    self._record_change("add", movie["title"].casefold())
+            self._signature = self._storage.get_data_signature()
+
+    def delete_movie_data(self, title: str) -> None:
+        """Deletes a movie from the wrapped storage and from the cache"""
+        with self._storage.locked():
+            self._refresh()
+            self._storage.delete_movie_data(title)
+            row = self._rows_by_title.pop(title.casefold(), None)
+            if row is not None:
+                columns = self._columns
+                columns.delete(row)
+                if self._search_index is not None:
+                    self._search_index.remove(columns.titles[row])
+                if self._rating_stats is not None:
+                    self._rating_stats.remove(columns.titles[row], columns.years[row], columns.ratings[row])
+                if self._rating_index is not None:
+                    self._rating_index.remove(columns.ratings[row], row)
+                    self._year_index.remove(columns.years[row], row)
+                if columns.deleted_count > columns.row_count * self._compaction_ratio:
+                    self._compact_columns()
+                self._record_change("delete", title.casefold())
+            if not self._rows_by_title:
+                # The file storages start over with default data when their last movie was deleted,
+                # so the next access reloads instead of serving an empty library
+                self.invalidate()
+                return
+            self._signature = self._storage.get_data_signature()
+
+    def update_movie_data(self, title: str, note: str) -> None:
+        """Updates a movie in the wrapped storage and in the cache"""
+        with self._storage.locked():
+            self._refresh()
+            self._storage.update_movie_data(title, note)
+            row = self._rows_by_title.get(title.casefold())
+            if row is not None:
+                self._columns.notes[row] = note
+                self._record_change("note", title.casefold())
+            self._signature = self._storage.get_data_signature()
+
+    def replace_movies_data(self, movies: Iterable[dict]) -> None:
+        """Delegates to the wrapped storage and drops the cache"""
+        with self._storage.locked():
+            self._storage.replace_movies_data(movies)
+            self.invalidate()
+
+    def secure_existence(self) -> bool:
+        """Delegates to the wrapped storage"""
+        return self._storage.secure_existence()
+
+    def validate_data(self) -> bool:
+        """Delegates to the wrapped storage"""
+        return self._storage.validate_data()
+
+    def write_default_data(self) -> None:
+        """Delegates to the wrapped storage and drops the cache"""
+        with self._storage.locked():
+            self._storage.write_default_data()
+            self.invalidate()
+
+    def locked(self) -> AbstractContextManager:
+        """Delegates to the wrapped storage"""
+        return self._storage.locked()
+
+    def get_data_signature(self) -> tuple|None:
+        """Delegates to the wrapped storage"""
+        return self._storage.get_data_signature()
+
+    def get_changes(self, since: tuple|None) -> tuple[tuple|None, list[tuple[str, str]]|None]:
+        """
+        Returns the changes made through the cache since the token since, see IStorage.get_changes().
+        They are unknown if the movies were reloaded in between, e.g. because another process changed the file.
+        """
+        self._refresh()
+        token = (self._changes_generation, len(self._changes))
+        if since is None or since[0] != self._changes_generation:
+            return token, None
+        return token, self._changes[since[1]:]
+
+    def get_cache_stats(self) -> tuple[int, int]:
+        """Returns how often the cached movies were used (hits) and how often they had to be loaded (misses)"""
+        return self._cache_hits, self._cache_misses
+
+    def invalidate(self) -> None:
+        """Drops the cached movies, so the next access reloads them"""
+        self._columns = None
+        self._rows_by_title = {}
+        self._search_index = None
+        self._rating_stats = None
+        self._rating_index = None
+        self._year_index = None
+        self._signature = None
+        self._changes = []
+        self._changes_generation += 1
+
+    def _refresh(self) -> None:
+        """
+        Compares the data signature of the wrapped storage with the one of the cached data.
+        Reloads the movies if they differ or if the storage can't tell its signature.
+        """
+        signature = self._storage.get_data_signature()
+        if self._columns is not None and signature is not None and signature == self._signature:
+            self._cache_hits += 1
+            return
+
+        with self._build_lock:
+            # Another thread might have reloaded the movies while waiting for the lock
+            if self._columns is not None and signature is not None and signature == self._signature:
+                self._cache_hits += 1
+                return
+            self._cache_misses += 1
+            self.invalidate()
+            self._columns = MovieColumns()
+            for movie in self._storage.get_movies_data():
+                # Titles are unique case-insensitively, the first movie wins like in the storages' lookups
+                self._add_to_cache(movie)
+            # Taken before loading, if loading changed the file (e.g. default data) the next call reloads again
+            self._signature = signature
+
+    def _add_to_cache(self, movie: dict) -> bool:
+        """
+        Appends a new movie to the columns and adds it to the indexes which are already built.
+        :return: False if a movie with the same title is cached already
+        """
+        key = movie["title"].casefold()
+        if key in self._rows_by_title:
+            return False
+        columns = self._columns
+        row = columns.append(movie)
+        self._rows_by_title[key] = row
+        if self._rating_index is not None:
+            self._rating_index.add(columns.ratings[row], row, row)
+            self._year_index.add(columns.years[row], row, row)
+        if self._search_index is not None:
+            self._search_index.add(columns.titles[row])
+        if self._rating_stats is not None:
+            self._rating_stats.add(columns.titles[row], columns.years[row], columns.ratings[row])
+        return True
+
+    def _record_change(self, operation: str, key: str) -> None:
+        """
+        Appends a change for get_changes().
+        Once there are more changes than movies, reading everything again is cheaper than replaying them,
+        so they get dropped and start over in a new generation.
+        """
+        if len(self._changes) > max(len(self._rows_by_title), MIN_TRACKED_CHANGES):
+            self._changes = []
+            self._changes_generation += 1
+        self._changes.append((operation, key))
+
+    def _build_sorted_indexes(self) -> None:
+        """Builds the sorted indexes on rating and year if they don't exist yet, row numbers are the positions"""
+        if self._rating_index is not None:
+            return
+        with self._build_lock:
+            if self._rating_index is not None:
+                return
+            columns = self._columns
+            rows = list(columns.iter_rows())
+            # The rating index gets set last, readers check it to tell if both exist
+            self._year_index = SortedIndex([(columns.years[row], row, row) for row in rows])
+            self._rating_index = SortedIndex([(columns.ratings[row], row, row) for row in rows])
+
+    def _compact_columns(self) -> None:
+        """
+        Drops the deleted rows from the columns.
+        Row numbers change, so the title lookup gets rebuilt and the sorted indexes are dropped.
+        The search index and the rating statistics don't use row numbers and stay valid.
+        """
+        self._columns = self._columns.compacted()
+        self._rows_by_title = {title.casefold(): row for row, title in enumerate(self._columns.titles)}
+        self._rating_index = None
+        self._year_index = None
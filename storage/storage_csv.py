@@ -1,133 +1,43 @@
 import csv
-import os.path
-from storage.istorage import IStorage
+from collections.abc import Iterable, Iterator
+from storage.atomic_file import atomic_open
+from storage.file_storage import FileStorage
 
 
-class StorageCSV(IStorage):
-    """Handle data when working with a CSV"""
-    def __init__(self, file_path: str):
-        """Initializes self._file_path"""
-        if not isinstance(file_path, str):
-            raise TypeError(f"Expected string for file_path, got {type(file_path).__name__} instead.")
-        if not file_path.strip():
-            raise ValueError("Empty string is invalid")
+CSV_READ_ERRORS = (csv.Error, ValueError, KeyError, TypeError)
+CSV_FIELDNAMES = ["title", "year", "rating", "poster_url", "note"]
 
-        self._filepath = file_path
 
-    def get_movies_data(self) -> list[dict]:
+class StorageCSV(FileStorage):
+    """Handle data when working with a CSV, see FileStorage"""
+    READ_ERRORS = CSV_READ_ERRORS
+
+    def _load_file(self) -> list[dict]:
         """
-        Calls validate_data() to verify file integrity.
-        If everything is fine, the function loads the information from
-        the CSV file and returns the data as a list of dictionaries.
+        Reads the movies from the CSV file and converts year and rating.
+        Raises FileNotFoundError or one of CSV_READ_ERRORS if the file is missing or corrupted.
         :return: list[dict]
         """
-        if not self.validate_data():
-            print("Loading default data due to prior data issues.")
+        return list(self._iter_file())
 
-        movies = []
+    def _iter_file(self) -> Iterator[dict]:
+        """Yields the movies of the CSV file one by one without replaying the operation log, see _load_file()"""
         with open(self._filepath, "r", newline='', encoding='utf-8') as file_reader:
             csv_reader = csv.DictReader(file_reader)
             for row in csv_reader:
+                if not isinstance(row['title'], str):
+                    raise ValueError("Row without title")
                 row['year'] = int(row['year'])
                 row['rating'] = float(row['rating'])
-                movies.append(row)
-        return movies
-
-    def write_movies_data(self, title: str, year: int, rating: float, poster_url: str) -> None:
-        """
-        Adds a movie to the database.
-        Loads the information from the CSV file, adds the movie,
-        and saves it.
-        """
-        movies = self.get_movies_data()
-        movies.append({
-            "title": title,
-            "year": year,
-            "rating": rating,
-            "poster_url": poster_url
-        })
-
-        with open(self._filepath, "w", newline='', encoding='utf-8') as file_writer:
-            csv_writer = csv.DictWriter(file_writer, fieldnames=["title", "year", "rating", "poster_url", "note"])
-            csv_writer.writeheader()
-            csv_writer.writerows(movies)
-
-    def delete_movie_data(self, title: str) -> None:
-        """
-        Deletes a movie from the database.
-        Loads the information from get_movies_data(), deletes the movie,
-        and saves it.
-        """
-        movies = self.get_movies_data()
-        movies = [movie for movie in movies if movie["title"] != title]
-
-        with open(self._filepath, "w", newline='', encoding='utf-8') as file_writer:
-            csv_writer = csv.DictWriter(file_writer, fieldnames=["title", "year", "rating", "poster_url", "note"])
-            csv_writer.writeheader()
-            csv_writer.writerows(movies)
+                yield row
 
-    def update_movie_data(self, title: str, note: str) -> None:
-        """
-        Updates a movie in the database.
-        Loads the information from get_movies_data(), updates the movie,
-        and saves it.
-        """
-        movies = self.get_movies_data()
-        for movie in movies:
-            if movie["title"] == title:
-                movie["note"] = note
-
-        with open(self._filepath, "w", newline='', encoding='utf-8') as file_writer:
-            csv_writer = csv.DictWriter(file_writer, fieldnames=["title", "year", "rating", "poster_url", "note"])
+    def _write_file(self, movies: Iterable[dict]) -> None:
+        """Writes the movies as CSV rows while iterating them"""
+        with atomic_open(self._filepath, "w", newline='', encoding='utf-8') as file_writer:
+            csv_writer = csv.DictWriter(file_writer, fieldnames=CSV_FIELDNAMES, extrasaction='ignore')
             csv_writer.writeheader()
             csv_writer.writerows(movies)
 
-    def secure_existence(self) -> bool:
-        """
-        Checks if the file exists and returns True. If the file does not exist,
-        it calls write_default_data and returns True.
-        """
-        if not os.path.isfile(self._filepath):
-            print("File does not exist, creating default Data")
-            self.write_default_data()
-        return True
-
-    def validate_data(self) -> bool:
-        """
-        Calls secure_existence() to check if there is any data.
-        If there is data to work with, it reads the data and checks
-        if the data is valid. In case the data is invalid, it calls write_default_data()
-        :returns: boolean
-        """
-        data_exists = self.secure_existence()
-        if data_exists:
-            try:
-                with open(self._filepath, "r", newline='', encoding='utf-8') as csv_file:
-                    csv_reader = csv.reader(csv_file)
-                    rows = list(csv_reader)
-                    if len(rows) <= 1:
-                        print("File is empty or contains only header, writing default data!")
-                        self.write_default_data()
-                        return False
-                return True
-            except csv.Error:
-                print("File data missing or corrupted, creating default Data")
-                self.write_default_data()
-                return False
-
-    def write_default_data(self) -> None:
-        """
-        Gets called if data is nonexistent or invalid and
-        writes some default data.
-        """
-        default_data = [{
-            "title": "Fight Club",
-            "year": 1999,
-            "rating": 8.8,
-            "poster_url": "https://m.media-amazon.com/images/M/MV5BOTgyOGQ1NDItNGU3Ny00MjU3LTg2YWEtNmEyYjBiMjI1Y2M5XkEyXkFqcGc@._V1_SX300.jpg"
-        }]
-
-        with open(self._filepath, "w", newline='', encoding='utf-8') as file_writer:
-            csv_writer = csv.DictWriter(file_writer, fieldnames=["title", "year", "rating", "poster_url", "note"])
-            csv_writer.writeheader()
-            csv_writer.writerows(default_data)
+    def _to_logged_movie(self, movie: dict) -> dict:
+        """Returns the fields of a movie which get appended to the operation log, the note is always a column"""
+        return {**super()._to_logged_movie(movie), "note": movie.get("note") or ""}
@@ -0,0 +1,374 @@
+import os.path
+import pathlib
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from storage.atomic_file import backup_corrupt_file
+from storage.istorage import IStorage
+
+
+class StorageSQLite(IStorage):
+    """
+    Handle data when working with a SQLite database.
+    Titles are unique (case-insensitive) and indexed by their case-folded title_key, as SQLite's NOCASE
+    only folds ASCII letters, like the title lookups of the other storages, year and rating have secondary indexes,
+    so lookups, deletes and updates don't have to scan or rewrite the whole database.
+    """
+    INSERT_MOVIE_SQL = (
+        "INSERT OR IGNORE INTO movies (title, title_key, year, rating, poster_url, note) VALUES (?, ?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, file_path: str, timeout: float = 5.0):
+        """
+        Initializes self._file_path, the connections get opened on first use.
+        Every thread gets its own connection, as SQLite connections can't be shared between threads.
+        timeout is the number of seconds to wait for a lock held by another connection.
+        """
+        if not isinstance(file_path, str):
+            raise TypeError(f"Expected string for file_path, got {type(file_path).__name__} instead.")
+        if not file_path.strip():
+            raise ValueError("Empty string is invalid")
+
+        self._filepath = file_path
+        self._timeout = timeout
+        self._local = threading.local()
+        self._validated_signature = None
+        # Increased when the file got replaced, so the connections of all threads get reopened
+        self._generation = 0
+
+    def get_movies_data(self) -> list[dict]:
+        """
+        Calls validate_data() to verify database integrity if the file changed since the last check.
+        If everything is fine, the function loads all movies in insertion order
+        and returns the data as a list of dictionaries.
+        :return: list[dict]
+        """
+        if not self._validate_if_changed():
+            print("Loading default data due to prior data issues.")
+
+        rows = self._connect().execute(
+            "SELECT title, year, rating, poster_url, note FROM movies ORDER BY id"
+        )
+        return [self._row_to_movie(row) for row in rows]
+
+    def get_movie(self, title: str) -> dict|None:
+        """Looks up a movie using the case-insensitive title index"""
+        self._validate_if_changed()
+        row = self._connect().execute(
+            "SELECT title, year, rating, poster_url, note FROM movies WHERE title_key = ?", (title.casefold(),)
+        ).fetchone()
+        return self._row_to_movie(row) if row is not None else None
+
+    def write_movies_data(self, title: str, year: int, rating: float, poster_url: str) -> None:
+        """
+        Adds a movie to the database.
+        A movie with an already existing title gets ignored.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO movies (title, title_key, year, rating, poster_url) VALUES (?, ?, ?, ?, ?)",
+                (title, title.casefold(), year, rating, poster_url)
+            )
+
+    def write_many_movies_data(self, movies: list[dict]) -> None:
+        """
+        Adds multiple movies to the database in a single transaction.
+        Movies with an already existing title get ignored.
+        """
+        with self._connect() as connection:
+            connection.executemany(self.INSERT_MOVIE_SQL, [self._movie_to_row(movie) for movie in movies])
+
+    def replace_movies_data(self, movies: Iterable[dict]) -> None:
+        """Replaces all movies in a single transaction, see IStorage.replace_movies_data()"""
+        self._validate_if_changed()
+        with self._connect() as connection:
+            connection.execute("DELETE FROM movies")
+            connection.executemany(self.INSERT_MOVIE_SQL, map(self._movie_to_row, movies))
+
+    def delete_movie_data(self, title: str) -> None:
+        """Deletes a movie from the database using the title index"""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM movies WHERE title_key = ?", (title.casefold(),))
+
+    def update_movie_data(self, title: str, note: str) -> None:
+        """Updates the note of a movie using the title index"""
+        with self._connect() as connection:
+            connection.execute("UPDATE movies SET note = ? WHERE title_key = ?", (note, title.casefold()))
+
+    def query(self, min_rating: float|None = None, year_range: tuple|None = None, title_contains: str|None = None,
+              order_by: str|None = None, descending: bool = False, limit: int|None = None) -> list[dict]:
+        """Returns the movies matching all given filters as list, see iter_query()"""
+        return list(self.iter_query(min_rating, year_range, title_contains, order_by, descending, limit))
+
+    def iter_query(self, min_rating: float|None = None, year_range: tuple|None = None,
+                   title_contains: str|None = None, order_by: str|None = None, descending: bool = False,
+                   limit: int|None = None) -> Iterator[dict]:
+        """
+        Lazily yields the movies matching all given filters, rows are fetched from the cursor on demand.
+        Filtering, sorting and limiting happen in SQLite, using the year and rating indexes.
+        :return: Iterator[dict]
+        """
+        if order_by not in (None, "title", "year", "rating"):
+            raise ValueError(f"Can't order movies by {order_by}")
+        self._validate_if_changed()
+
+        start_year, end_year = year_range if year_range is not None else (None, None)
+        conditions = []
+        parameters = []
+        if min_rating is not None:
+            conditions.append("rating >= ?")
+            parameters.append(min_rating)
+        if start_year is not None:
+            conditions.append("year >= ?")
+            parameters.append(start_year)
+        if end_year is not None:
+            conditions.append("year <= ?")
+            parameters.append(end_year)
+        if title_contains:
+            escaped_term = title_contains.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            conditions.append("title LIKE ? ESCAPE '\\'")
+            parameters.append(f"%{escaped_term}%")
+
+        sql = "SELECT title, year, rating, poster_url, note FROM movies"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if order_by is not None:
+            sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id"
+        else:
+            sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+
+        rows = self._connect().execute(sql, parameters)
+        return map(self._row_to_movie, rows)
+
+    def iter_movies(self, repair: bool = True) -> Iterator[dict]:
+        """
+        Lazily yields all movies in insertion order, rows are fetched from the cursor on demand.
+        Without repair the database gets opened read-only, so neither the schema gets created
+        nor a corrupted file replaced, errors raise ValueError.
+        """
+        if repair:
+            return self.iter_query()
+        return self._iter_read_only()
+
+    def count_movies(self) -> int:
+        """Returns the number of movies, counted by SQLite"""
+        self._validate_if_changed()
+        return self._connect().execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+    def aggregate_ratings(self) -> dict|None:
+        """
+        Returns rating statistics of all movies, computed by SQLite.
+        The median and the best/worst movies are read through the rating index.
+        :return: dict or None if there are no movies
+        """
+        self._validate_if_changed()
+        connection = self._connect()
+        count, average, best_rating, worst_rating = connection.execute(
+            "SELECT COUNT(*), AVG(rating), MAX(rating), MIN(rating) FROM movies"
+        ).fetchone()
+        if count == 0:
+            return None
+
+        middle_ratings = [row[0] for row in connection.execute(
+            "SELECT rating FROM movies ORDER BY rating LIMIT ? OFFSET ?", (2 - count % 2, (count - 1) // 2)
+        )]
+        return {
+            "count": count,
+            "average": average,
+            "median": sum(middle_ratings) / len(middle_ratings),
+            "best": connection.execute(
+                "SELECT title, rating FROM movies WHERE rating = ? ORDER BY id", (best_rating,)
+            ).fetchall(),
+            "worst": connection.execute(
+                "SELECT title, rating FROM movies WHERE rating = ? ORDER BY id", (worst_rating,)
+            ).fetchall(),
+            "per_decade": {
+                decade: (decade_count, decade_average)
+                for decade, decade_count, decade_average in connection.execute(
+                    "SELECT year / 10 * 10 AS decade, COUNT(*), AVG(rating) FROM movies GROUP BY decade ORDER BY decade"
+                )
+            }
+        }
+
+    def secure_existence(self) -> bool:
+        """
+        Checks if the database file exists, connecting creates the table and indexes if needed.
+        If the file didn't exist, it calls write_default_data. Returns True.
+        """
+        file_existed = os.path.isfile(self._filepath)
+        self._connect()
+        if not file_existed:
+            print("File does not exist, creating default Data")
+            self.write_default_data()
+        return True
+
+    def validate_data(self) -> bool:
+        """
+        Calls secure_existence() and checks if there is at least one movie.
+        If the database is empty, it calls write_default_data().
+        If the file isn't a valid database, it gets moved aside and replaced by default data.
+        Errors which don't mean corruption, e.g. "database is locked" while another connection writes,
+        are raised instead, so the database is never moved aside because of them.
+        :returns: boolean
+        """
+        try:
+            self.secure_existence()
+            has_movies = self._connect().execute("SELECT EXISTS (SELECT 1 FROM movies)").fetchone()[0]
+        except (sqlite3.OperationalError, sqlite3.ProgrammingError):
+            raise
+        except sqlite3.DatabaseError:
+            self._close()
+            backup_path = backup_corrupt_file(self._filepath)
+            print(f"Database corrupted, moved it to {backup_path} and creating default Data")
+            self.secure_existence()
+            return False
+
+        if not has_movies:
+            print("Database is empty, writing default data!")
+            self.write_default_data()
+            return False
+        return True
+
+    def write_default_data(self) -> None:
+        """
+        Gets called if data is nonexistent or invalid and
+        writes some default data.
+        """
+        self.write_movies_data(
+            "Fight Club",
+            1999,
+            8.8,
+            "https://m.media-amazon.com/images/M/MV5BOTgyOGQ1NDItNGU3Ny00MjU3LTg2YWEtNmEyYjBiMjI1Y2M5XkEyXkFqcGc@._V1_SX300.jpg"
+        )
+
+    def _iter_read_only(self) -> Iterator[dict]:
+        """Yields all movies in insertion order from a read-only connection, see iter_movies()"""
+        uri = f"{pathlib.Path(self._filepath).absolute().as_uri()}?mode=ro"
+        try:
+            connection = sqlite3.connect(uri, uri=True, timeout=self._timeout)
+            try:
+                rows = connection.execute("SELECT title, year, rating, poster_url, note FROM movies ORDER BY id")
+                for row in rows:
+                    yield self._row_to_movie(row)
+            finally:
+                connection.close()
+        except sqlite3.DatabaseError as error:
+            raise ValueError(f"Can't read {self._filepath}: {error}") from error
+
+    def _validate_if_changed(self) -> bool:
+        """
+        Calls validate_data() if the database file changed since the last validation (e.g. on first use,
+        after a write or if another process replaced it), so reads don't pay for a check every time.
+        :return: False if validate_data() found the data invalid, True otherwise
+        """
+        signature = self._get_file_signature()
+        if self._validated_signature is not None and signature == self._validated_signature:
+            return True
+        if self._validated_signature is not None and signature is not None and signature[0] != self._validated_signature[0]:
+            # Another file was moved in place, the open connections still refer to the old one
+            self._generation += 1
+        is_valid = self.validate_data()
+        self._validated_signature = self._get_file_signature()
+        return is_valid
+
+    def _get_file_signature(self) -> tuple|None:
+        """Returns inode, modification time and size of the database file, None if it doesn't exist"""
+        try:
+            file_stat = os.stat(self._filepath)
+        except FileNotFoundError:
+            return None
+        return file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens the connection of the current thread and creates the schema on first use, returns the connection"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.generation == self._generation:
+            return connection
+        if connection is not None:
+            connection.close()
+
+        generation = self._generation
+        connection = sqlite3.connect(self._filepath, timeout=self._timeout)
+        try:
+            self._create_schema(connection)
+        except sqlite3.Error:
+            connection.close()
+            self._local.connection = None
+            raise
+        self._local.connection = connection
+        self._local.generation = generation
+        return connection
+
+    def _close(self) -> None:
+        """Closes the connection of the current thread, the other threads reopen theirs on their next use"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+        self._generation += 1
+
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection) -> None:
+        """
+        Creates the movies table with a unique index on the case-folded titles and indexes on year and rating.
+        Databases without title_key column get it added, of titles which are equal case-folded the first one is kept.
+        """
+        with connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS movies (
+                    id INTEGER PRIMARY KEY,
+                    title TEXT NOT NULL COLLATE NOCASE,
+                    title_key TEXT NOT NULL,
+                    year INTEGER NOT NULL,
+                    rating REAL NOT NULL,
+                    poster_url TEXT,
+                    note TEXT
+                )
+                """
+            )
+        columns = [column[1] for column in connection.execute("PRAGMA table_info(movies)")]
+        if "title_key" not in columns:
+            StorageSQLite._add_title_keys(connection)
+        with connection:
+            connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_movies_title_key ON movies (title_key)")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_movies_year ON movies (year)")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_movies_rating ON movies (rating)")
+
+    @staticmethod
+    def _add_title_keys(connection: sqlite3.Connection) -> None:
+        """Adds the title_key column to a database of an older version and replaces the NOCASE title index"""
+        connection.create_function("casefold", 1, str.casefold, deterministic=True)
+        with connection:
+            # Taking the write lock first, another connection might be adding the column at the same time
+            connection.execute("BEGIN IMMEDIATE")
+            columns = [column[1] for column in connection.execute("PRAGMA table_info(movies)")]
+            if "title_key" in columns:
+                return
+            connection.execute("ALTER TABLE movies ADD COLUMN title_key TEXT NOT NULL DEFAULT ''")
+            connection.execute("UPDATE movies SET title_key = casefold(title)")
+            connection.execute("DELETE FROM movies WHERE id NOT IN (SELECT MIN(id) FROM movies GROUP BY title_key)")
+            connection.execute("DROP INDEX IF EXISTS idx_movies_title")
+
+    @staticmethod
+    def _movie_to_row(movie: dict) -> tuple:
+        """Converts a movie dictionary into the parameters of INSERT_MOVIE_SQL"""
+        title = movie["title"]
+        return title, title.casefold(), movie["year"], movie["rating"], movie["poster_url"], movie.get("note") or None
+
+    @staticmethod
+    def _row_to_movie(row: tuple) -> dict:
+        """Converts a database row into the movie dictionary used by the other storages"""
+        title, year, rating, poster_url, note = row
+        movie = {
+            "title": title,
+            "year": year,
+            "rating": rating,
+            "poster_url": poster_url
+        }
+        if note is not None:
+            movie["note"] = note
+        return movie
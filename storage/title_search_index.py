@@ -0,0 +1,156 @@
+from collections import Counter
+
+
+START_MARKER = "\x02"
+
+
+def approximate_substring_distance(search_term: str, text: str, max_distance: int|None = None) -> int:
+    """
+    Returns the smallest edit distance between search_term and any substring of text,
+    so "godfater" has a distance of 1 to "the godfather".
+    Uses Myers' bit-parallel algorithm: the column of the edit distance matrix is kept as bit vectors
+    of its vertical differences, so every character of text costs a few integer operations.
+    If max_distance is given and the distance is larger, max_distance + 1 gets returned.
+    """
+    term_length = len(search_term)
+    if term_length == 0:
+        return 0
+    char_masks = {}
+    for index, char in enumerate(search_term):
+        char_masks[char] = char_masks.get(char, 0) | (1 << index)
+    all_bits = (1 << term_length) - 1
+    last_bit = 1 << (term_length - 1)
+
+    positive_vertical = all_bits
+    negative_vertical = 0
+    distance = best_distance = term_length
+    for char in text:
+        equal = char_masks.get(char, 0)
+        vertical = equal | negative_vertical
+        horizontal = (((equal & positive_vertical) + positive_vertical) ^ positive_vertical) | equal
+        positive_horizontal = negative_vertical | (~(horizontal | positive_vertical) & all_bits)
+        negative_horizontal = positive_vertical & horizontal
+        if positive_horizontal & last_bit:
+            distance += 1
+        elif negative_horizontal & last_bit:
+            distance -= 1
+            if distance < best_distance:
+                best_distance = distance
+        # Substrings can start anywhere in text, so the first row stays 0 and nothing gets shifted in
+        positive_horizontal = (positive_horizontal << 1) & all_bits
+        negative_horizontal = (negative_horizontal << 1) & all_bits
+        positive_vertical = negative_horizontal | (~(vertical | positive_horizontal) & all_bits)
+        negative_vertical = positive_horizontal & vertical
+
+    if max_distance is not None and best_distance > max_distance:
+        return max_distance + 1
+    return best_distance
+
+
+def default_max_distance(search_term: str) -> int:
+    """Returns how many typos are tolerated for a search term, one per four characters"""
+    return max(1, len(search_term) // 4)
+
+
+class TitleSearchIndex:
+    """
+    Trigram index over case-folded titles for substring, prefix and typo-tolerant search.
+    Every title is indexed with a start marker, so prefix searches can use the trigram index too.
+    Titles can be added and removed incrementally.
+    """
+    def __init__(self, titles: list[str]|None = None) -> None:
+        """Initializes the index and adds the given titles"""
+        self._trigrams = {}
+        self._positions = {}
+        self._next_position = 0
+        for title in titles or []:
+            self.add(title)
+
+    def add(self, title: str) -> None:
+        """Adds a title to the index"""
+        key = title.casefold()
+        if key in self._positions:
+            return
+        self._positions[key] = self._next_position
+        self._next_position += 1
+        for trigram in self._get_trigrams(START_MARKER + key):
+            self._trigrams.setdefault(trigram, set()).add(key)
+
+    def remove(self, title: str) -> None:
+        """Removes a title from the index"""
+        key = title.casefold()
+        if self._positions.pop(key, None) is None:
+            return
+        for trigram in self._get_trigrams(START_MARKER + key):
+            titles = self._trigrams[trigram]
+            titles.discard(key)
+            if not titles:
+                del self._trigrams[trigram]
+
+    def search(self, search_term: str, prefix: bool = False) -> list[str]:
+        """
+        Returns all case-folded titles containing the search term (or starting with it if prefix is True),
+        in the order they were added.
+        """
+        pattern = search_term.casefold()
+        if prefix:
+            pattern = START_MARKER + pattern
+
+        candidates = self._get_candidates(pattern)
+        if candidates is None:
+            candidates = self._positions.keys()
+        matches = [key for key in candidates if pattern in START_MARKER + key]
+        return sorted(matches, key=self._positions.__getitem__)
+
+    def search_typo_tolerant(self, search_term: str, max_distance: int|None = None, limit: int = 10,
+                             max_candidates: int = 500) -> list[str]:
+        """
+        Returns case-folded titles containing the search term with at most max_distance typos,
+        best matches first.
+        Every typo destroys at most three trigrams, so only titles sharing enough trigrams
+        with the search term are candidates, but at least one. Of those, the max_candidates titles
+        sharing the most trigrams get compared by edit distance, so a search never scans all titles.
+        Search terms shorter than three characters have no trigrams, they are searched without typos.
+        """
+        pattern = search_term.casefold()
+        if max_distance is None:
+            max_distance = default_max_distance(pattern)
+
+        trigrams = self._get_trigrams(pattern)
+        if not trigrams:
+            return self.search(pattern)[:limit]
+        required_trigrams = max(1, len(trigrams) - 3 * max_distance)
+        trigram_counts = Counter()
+        for trigram in trigrams:
+            trigram_counts.update(self._trigrams.get(trigram, ()))
+        candidates = [key for key, count in trigram_counts.most_common(max_candidates) if count >= required_trigrams]
+
+        scored_matches = []
+        for key in candidates:
+            distance = approximate_substring_distance(pattern, key, max_distance)
+            if distance <= max_distance:
+                scored_matches.append((distance, self._positions[key], key))
+        scored_matches.sort()
+        return [key for _, _, key in scored_matches[:limit]]
+
+    def _get_candidates(self, pattern: str) -> set|None:
+        """
+        Intersects the titles of all trigrams of the pattern, starting with the rarest trigram.
+        :return: set of candidates, None if the pattern is too short to use the index
+        """
+        trigrams = self._get_trigrams(pattern)
+        if not trigrams:
+            return None
+
+        posting_sets = sorted((self._trigrams.get(trigram, set()) for trigram in trigrams), key=len)
+        candidates = set(posting_sets[0])
+        for posting_set in posting_sets[1:]:
+            if not candidates:
+                break
+            candidates &= posting_set
+        return candidates
+
+    @staticmethod
+    def _get_trigrams(text: str) -> set[str]:
+        """Returns all three character substrings of text"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
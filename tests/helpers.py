@@ -0,0 +1,53 @@
+import random
+
+
+TITLE_WORDS = [
+    "Dark", "Night", "Return", "Last", "Star", "City", "Love", "War", "Dream", "Shadow", "King", "Secret",
+    "Lost", "Blood", "Fire", "Ghost", "River", "Empire", "Silent", "Golden", "Wild", "Iron", "Summer", "Winter"
+]
+
+
+def generate_movies(count: int, seed: int = 42, note_ratio: float = 0.1) -> list[dict]:
+    """
+    Generates a reproducible library of count movies with unique titles, e.g. "Dark Night 123".
+    Years and ratings are spread like in a real library, note_ratio of the movies get a note.
+    :return: list[dict]
+    """
+    random_generator = random.Random(seed)
+    movies = []
+    for number in range(count):
+        title = f"{random_generator.choice(TITLE_WORDS)} {random_generator.choice(TITLE_WORDS)} {number}"
+        movie = {
+            "title": title,
+            "year": random_generator.randint(1920, 2025),
+            "rating": round(min(10.0, max(0.0, random_generator.gauss(6.5, 1.4))), 1),
+            "poster_url": f"https://example.com/posters/{number}.jpg"
+        }
+        if random_generator.random() < note_ratio:
+            movie["note"] = f"Watched {random_generator.randint(1, 5)} times"
+        movies.append(movie)
+    return movies
+
+
+class StubOmdbClient:
+    """
+    Replaces OmdbClient in tests and benchmarks, answers every title instantly without network access.
+    Titles starting with "Unknown" aren't found, like unknown titles on OMDB.
+    """
+    def __init__(self, seed: int = 42) -> None:
+        """Initializes the random generator for years and ratings"""
+        self._random = random.Random(seed)
+        self.request_count = 0
+
+    def get_movie_by_title(self, title: str) -> dict|None:
+        """Returns a response shaped like the OMDB one, None for unknown titles"""
+        self.request_count += 1
+        if title.startswith("Unknown"):
+            return None
+        return {
+            "Title": title,
+            "Year": str(self._random.randint(1920, 2025)),
+            "imdbRating": f"{self._random.uniform(1, 10):.1f}",
+            "Poster": f"https://example.com/posters/{abs(hash(title))}.jpg",
+            "Response": "True"
+        }
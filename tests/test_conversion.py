@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import pytest
+import main
+from storage import conversion
+from storage.storage_json import StorageJson
+from storage.storage_sqlite import StorageSQLite
+
+
+MOVIES = [
+    {"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None},
+    {"title": "Alien", "year": 1979, "rating": 8.5, "poster_url": None},
+]
+
+
+@pytest.mark.parametrize("extension, content", [
+    (".json", '[{"title": "Heat", "year": 19'),
+    (".json", '{"title": "Heat"}'),
+    (".csv", "name,year,rating\nHeat,1995,8.3\n"),
+    (".mvdb", "not a snapshot"),
+    (".sqlite", "not a database"),
+])
+def test_converting_a_corrupted_database_leaves_it_untouched(tmp_path, extension, content):
+    source_path = tmp_path / f"movies{extension}"
+    source_path.write_text(content)
+    target_path = tmp_path / "converted.ndjson"
+
+    with pytest.raises(ValueError, match="Can't read"):
+        conversion.convert_database(str(source_path), str(target_path))
+
+    assert source_path.read_text() == content
+    assert not target_path.exists()
+    assert not list(tmp_path.glob("*.corrupt*"))
+
+
+def test_conversion_streams_the_movies_with_pending_operations(tmp_path):
+    source_path = str(tmp_path / "movies.json")
+    storage = StorageJson(source_path)
+    storage.replace_movies_data(MOVIES)
+    storage.delete_movie_data("Heat")
+    target_path = str(tmp_path / "movies.sqlite")
+
+    assert conversion.convert_database(source_path, target_path) == 1
+    assert [movie["title"] for movie in StorageSQLite(target_path).get_movies_data()] == ["Alien"]
+
+
+def test_converting_all_databases_into_db_writes_the_files_main_opens(tmp_path, monkeypatch):
+    StorageJson(str(tmp_path / "anna_movie_database.json")).replace_movies_data(MOVIES)
+    monkeypatch.setattr(main, "DATA_DIRECTORY", str(tmp_path))
+
+    results = conversion.convert_directory(str(tmp_path), "db", max_workers=1)
+
+    assert results == [{"source": str(tmp_path / "anna_movie_database.json"),
+                        "target": main.get_database_path("anna.db"), "count": 2, "error": None}]
+    assert os.path.exists(main.get_database_path("anna.sqlite"))
+
+
+def test_commands_dont_import_the_conversion():
+    code = ("import sys, main; main.open_database('anna.json'); "
+            "assert 'storage.conversion' not in sys.modules and 'concurrent.futures.process' not in sys.modules "
+            "and 'storage.storage_sqlite' not in sys.modules and 'storage.storage_binary' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.abspath(main.__file__)))
@@ -0,0 +1,34 @@
+import pytest
+from storage.storage_binary import StorageBinary
+from storage.storage_csv import StorageCSV
+from storage.storage_json import StorageJson
+
+
+@pytest.mark.parametrize("storage_class, extension, content", [
+    (StorageJson, ".json", '{"title": "Heat", "year": 1995}'),
+    (StorageJson, ".json", '[{"name": "Heat"}]'),
+    (StorageCSV, ".csv", "name,year,rating\nHeat,1995,8.3\n"),
+    (StorageBinary, ".mvdb", "MVDB but not a snapshot of any version"),
+])
+def test_unreadable_file_is_moved_aside(tmp_path, storage_class, extension, content):
+    file_path = tmp_path / f"movies{extension}"
+    file_path.write_text(content)
+
+    movies = storage_class(str(file_path)).get_movies_data()
+
+    assert [movie["title"] for movie in movies] == ["Fight Club"]
+    assert (tmp_path / f"movies{extension}.corrupt").read_text() == content
+
+
+@pytest.mark.parametrize("storage_class, extension", [
+    (StorageJson, ".json"), (StorageCSV, ".csv"), (StorageBinary, ".mvdb")
+])
+def test_deleting_all_movies_starts_over_without_backup(tmp_path, storage_class, extension):
+    file_path = tmp_path / f"movies{extension}"
+    storage = storage_class(str(file_path))
+    storage.replace_movies_data([{"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None}])
+
+    storage.delete_movie_data("Heat")
+
+    assert [movie["title"] for movie in storage_class(str(file_path)).get_movies_data()] == ["Fight Club"]
+    assert not list(tmp_path.glob("*.corrupt*"))
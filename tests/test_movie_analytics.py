@@ -0,0 +1,52 @@
+import random
+from array import array
+import pytest
+from storage import movie_analytics
+
+ROW_COUNT = movie_analytics.MIN_NUMPY_ROWS + 1000
+
+
+@pytest.fixture
+def columns() -> tuple[array, array, bytearray]:
+    generator = random.Random(7)
+    ratings = array('d', (round(generator.uniform(0, 10), 1) for _ in range(ROW_COUNT)))
+    ratings[:3] = array('d', [0.0, 10.0, 9.99])
+    years = array('q', (generator.randint(1900, 2029) for _ in range(ROW_COUNT)))
+    deleted = bytearray(generator.random() < 0.1 for _ in range(ROW_COUNT))
+    return ratings, years, deleted
+
+
+@pytest.fixture
+def without_numpy(monkeypatch) -> None:
+    monkeypatch.setattr(movie_analytics, "np", None)
+    monkeypatch.setattr(movie_analytics, "_numpy_imported", True)
+
+
+def test_describe_ratings_without_numpy_above_the_threshold(columns, without_numpy):
+    ratings, years, _ = columns
+    assert not movie_analytics.use_numpy(len(ratings))
+    assert movie_analytics.filter_rows(ratings, years, min_rating=5) is None
+
+    description = movie_analytics.describe_ratings(ratings, years)
+    assert sum(description["histogram"]) == ROW_COUNT
+    assert description["histogram"][9] == sum(rating >= 9 for rating in ratings)
+
+
+def test_numpy_and_python_give_the_same_results(columns):
+    pytest.importorskip("numpy")
+    ratings, years, deleted = columns
+    assert movie_analytics.use_numpy(len(ratings))
+
+    numpy_description = movie_analytics.describe_ratings(ratings, years)
+    python_description = movie_analytics._describe_ratings_python(ratings, years)
+    assert numpy_description["histogram"] == python_description["histogram"]
+    assert numpy_description["decade_histograms"] == python_description["decade_histograms"]
+    assert list(numpy_description["decade_histograms"]) == list(python_description["decade_histograms"])
+    assert numpy_description["std_dev"] == pytest.approx(python_description["std_dev"], rel=1e-12)
+    assert numpy_description["percentiles"] == pytest.approx(python_description["percentiles"], rel=1e-12)
+
+    rows = movie_analytics.filter_rows(ratings, years, deleted, min_rating=7.5, start_year=1950, end_year=1999)
+    assert rows == [
+        row for row in range(ROW_COUNT)
+        if not deleted[row] and ratings[row] >= 7.5 and 1950 <= years[row] <= 1999
+    ]
@@ -0,0 +1,81 @@
+import os
+import pytest
+from movie_app.movie_app import MovieApp
+from storage.storage_sqlite import StorageSQLite
+from tests.helpers import StubOmdbClient
+
+
+HTML_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "static", "index_template.html")
+
+
+@pytest.fixture
+def database_path(tmp_path) -> str:
+    """Path of a SQLite database with 25 movies"""
+    file_path = str(tmp_path / "movies.sqlite")
+    StorageSQLite(file_path).replace_movies_data([
+        {"title": f"Movie {number:02}", "year": 2000 + number, "rating": 5.0, "poster_url": None}
+        for number in range(25)
+    ])
+    return file_path
+
+
+def test_pages_dont_keep_the_database_locked(database_path, tmp_path, capsys):
+    movie_app = MovieApp(StorageSQLite(database_path), HTML_TEMPLATE_PATH, str(tmp_path / "index.html"),
+                         page_size=10)
+    movie_app.list_movies()
+    first_page = capsys.readouterr().out
+
+    StorageSQLite(database_path, timeout=0.1).update_movie_data("Movie 15", "Written meanwhile")
+
+    movie_app.next_page()
+    second_page = capsys.readouterr().out
+    movie_app.next_page()
+    third_page = capsys.readouterr().out
+    movie_app.next_page()
+
+    assert "Movie 09" in first_page and "Movie 10" not in first_page
+    assert "Movie 10" in second_page and "Movie 19" in second_page and "Movie 20" not in second_page
+    assert "Written meanwhile" in second_page
+    assert "Movie 24" in third_page and "next page" not in third_page
+    assert capsys.readouterr().out == "There is no next page.\n"
+
+
+def test_search_results_are_paged(database_path, tmp_path, capsys, monkeypatch):
+    movie_app = MovieApp(StorageSQLite(database_path), HTML_TEMPLATE_PATH, str(tmp_path / "index.html"),
+                         page_size=3, offset=1)
+    monkeypatch.setattr("builtins.input", lambda prompt="": "movie 1")
+    movie_app.search_movie()
+    first_page = capsys.readouterr().out
+    movie_app.next_page()
+    second_page = capsys.readouterr().out
+
+    assert [line for line in first_page.splitlines() if line.startswith("Movie")] == [
+        "Movie 11 (2011): 5.0", "Movie 12 (2012): 5.0", "Movie 13 (2013): 5.0"
+    ]
+    assert [line for line in second_page.splitlines() if line.startswith("Movie")] == [
+        "Movie 14 (2014): 5.0", "Movie 15 (2015): 5.0", "Movie 16 (2016): 5.0"
+    ]
+
+
+def test_bulk_import_deduplicates_titles_and_writes_once(database_path, tmp_path, monkeypatch):
+    storage = StorageSQLite(database_path)
+    omdb_client = StubOmdbClient()
+    movie_app = MovieApp(storage, HTML_TEMPLATE_PATH, str(tmp_path / "index.html"), omdb_client=omdb_client)
+    writes = []
+    monkeypatch.setattr(storage, "write_movies_data", lambda *args: writes.append(args))
+    original_write_many = storage.write_many_movies_data
+    monkeypatch.setattr(storage, "write_many_movies_data",
+                        lambda movies: writes.append(movies) or original_write_many(movies))
+    import_path = tmp_path / "titles.txt"
+    import_path.write_text("Heat\nheat\n  HEAT \nmovie 03\nUnknown One\n\nRonin\nRonin\nUnknown Two\n",
+                           encoding="utf-8")
+
+    new_movies, failed_titles = movie_app.import_movies_from_file(str(import_path), max_workers=4)
+
+    assert [movie["title"] for movie in new_movies] == ["Heat", "Ronin"]
+    assert failed_titles == ["Unknown One", "Unknown Two"]
+    assert omdb_client.request_count == 4
+    assert writes == [new_movies]
+    assert (tmp_path / "titles.txt.failures.txt").read_text(encoding="utf-8") == "Unknown One\nUnknown Two\n"
+    assert StorageSQLite(database_path).count_movies() == 27
@@ -0,0 +1,38 @@
+from storage.movie_columns import MovieColumns
+
+MOVIES = [
+    {"title": "Alien", "year": 1979, "rating": 8.5, "poster_url": "alien.jpg"},
+    {"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None, "note": "Long"},
+    {"title": "Up", "year": 2009, "rating": 8.3, "poster_url": "up.jpg"},
+    {"title": "Tenet", "year": 2020, "rating": 7.3, "poster_url": None}
+]
+
+
+def test_deleted_rows_are_tombstoned_and_keep_their_numbers():
+    columns = MovieColumns(MOVIES)
+    columns.delete(1)
+    columns.delete(1)
+
+    assert len(columns) == 3
+    assert columns.row_count == 4
+    assert columns.deleted_count == 1
+    assert columns.is_deleted(1) and not columns.is_deleted(2)
+    assert list(columns.deleted_mask) == [0, 1, 0, 0]
+    assert list(columns.iter_rows()) == [0, 2, 3]
+    assert columns.get_movie(2) == MOVIES[2]
+    assert columns.append({"title": "Dune", "year": 2021, "rating": 8.0}) == 4
+    assert list(columns.iter_rows()) == [0, 2, 3, 4]
+
+
+def test_compacted_drops_the_deleted_rows():
+    columns = MovieColumns(MOVIES)
+    columns.delete(0)
+    columns.delete(2)
+    compacted = columns.compacted()
+
+    assert (len(compacted), compacted.row_count, compacted.deleted_count) == (2, 2, 0)
+    assert [compacted.get_movie(row) for row in compacted.iter_rows()] == [MOVIES[1], MOVIES[3]]
+    assert compacted.years.typecode == columns.years.typecode
+    assert compacted.ratings.typecode == columns.ratings.typecode
+    compacted.delete(0)
+    assert not columns.is_deleted(1)
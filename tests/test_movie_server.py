@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from movie_app.movie_app import MovieApp
+from movie_app.movie_server import MovieServer
+from storage.storage_sqlite import StorageSQLite
+from tests.helpers import StubOmdbClient
+
+
+HTML_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "static", "index_template.html")
+
+
+@pytest.fixture
+def sqlite_server(tmp_path):
+    """MovieServer on a SQLite database with two movies, listening on a free port"""
+    storage = StorageSQLite(str(tmp_path / "movies.sqlite"))
+    storage.replace_movies_data([
+        {"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None},
+        {"title": "Alien", "year": 1979, "rating": 8.5, "poster_url": None}
+    ])
+    html_output_path = str(tmp_path / "site" / "index.html")
+    os.makedirs(os.path.dirname(html_output_path))
+    server = MovieServer(storage, HTML_TEMPLATE_PATH, html_output_path, str(tmp_path / "omdb.sqlite"),
+                         port=0, max_workers=4)
+    server._movie_cli._movie_app = MovieApp(storage, HTML_TEMPLATE_PATH, html_output_path,
+                                            omdb_client=StubOmdbClient())
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    yield server
+    server.shutdown()
+    server_thread.join(timeout=10)
+
+
+def request(server: MovieServer, method: str, path: str, body: dict|None = None) -> tuple[int, dict]:
+    """Sends a request to the server, returns status and JSON body"""
+    host, port = server.server_address
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    api_request = urllib.request.Request(f"http://{host}:{port}{path}", data=data, method=method)
+    try:
+        with urllib.request.urlopen(api_request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def test_sqlite_backend_answers_from_pool_threads(sqlite_server):
+    status, result = request(sqlite_server, "GET", "/api/movies?sort=rating&desc=1")
+    assert status == 200
+    assert [movie["title"] for movie in result["movies"]] == ["Alien", "Heat"]
+
+    assert request(sqlite_server, "GET", "/api/stats")[1]["count"] == 2
+    assert request(sqlite_server, "GET", "/api/search?q=hea")[1]["ok"]
+    assert request(sqlite_server, "PUT", "/api/movies/Heat/note", {"note": "Great"})[0] == 200
+    assert request(sqlite_server, "POST", "/api/movies", {"titles": ["Ronin"]})[0] == 200
+    assert request(sqlite_server, "DELETE", "/api/movies/Alien")[0] == 200
+
+    status, result = request(sqlite_server, "GET", "/api/movies")
+    assert status == 200
+    assert {movie["title"]: movie.get("note") for movie in result["movies"]} == {"Heat": "Great", "Ronin": None}
+
+
+def test_concurrent_requests_on_sqlite_backend(sqlite_server):
+    statuses = []
+
+    def send_requests(number: int) -> None:
+        statuses.append(request(sqlite_server, "PUT", "/api/movies/Heat/note", {"note": f"Note {number}"})[0])
+        statuses.append(request(sqlite_server, "GET", "/api/movies")[0])
+
+    threads = [threading.Thread(target=send_requests, args=(number,)) for number in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * 40
+
+
+def test_unexpected_errors_are_answered_with_500(sqlite_server, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("broken storage")
+    monkeypatch.setattr(sqlite_server, "stats", fail)
+
+    status, result = request(sqlite_server, "GET", "/api/stats")
+
+    assert status == 500
+    assert result == {"ok": False, "error": "Internal server error"}
+
+
+def test_reads_dont_wait_for_each_other(sqlite_server, monkeypatch):
+    reading, release, finished = threading.Event(), threading.Event(), threading.Event()
+    original_stats = sqlite_server._movie_cli.stats
+
+    def slow_stats() -> dict:
+        reading.set()
+        release.wait(10)
+        finished.set()
+        return original_stats()
+    monkeypatch.setattr(sqlite_server._movie_cli, "stats", slow_stats)
+    slow_request = threading.Thread(target=request, args=(sqlite_server, "GET", "/api/stats"))
+    slow_request.start()
+    try:
+        assert reading.wait(10)
+        status, result = request(sqlite_server, "GET", "/api/movies")
+        assert status == 200
+        assert not finished.is_set()
+        assert [movie["title"] for movie in result["movies"]] == ["Heat", "Alien"]
+    finally:
+        release.set()
+        slow_request.join()
@@ -0,0 +1,55 @@
+import pytest
+from movie_app.omdb_cache import OmdbCache
+
+
+class FakeClock:
+    """Clock which only moves when it's told to"""
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def omdb_cache(tmp_path, clock) -> OmdbCache:
+    return OmdbCache(str(tmp_path / "omdb_cache.sqlite"), ttl=100, not_found_ttl=10, max_entries=3, clock=clock)
+
+
+def test_entries_expire_after_their_ttl(omdb_cache, clock):
+    omdb_cache.store("The Matrix", {"Title": "The Matrix"})
+
+    clock.now += 100
+    assert omdb_cache.lookup("  the MATRIX ") == (True, {"Title": "The Matrix"})
+    clock.now += 101
+    assert omdb_cache.lookup("The Matrix") == (False, None)
+    assert omdb_cache.get_cache_stats() == (1, 1)
+
+
+def test_not_found_results_are_cached_with_their_own_ttl(omdb_cache, clock):
+    omdb_cache.store("No Such Movie", None)
+    omdb_cache.store("Heat", {"Title": "Heat"})
+
+    clock.now += 10
+    assert omdb_cache.lookup("No Such Movie") == (True, None)
+    clock.now += 1
+    assert omdb_cache.lookup("No Such Movie") == (False, None)
+    assert omdb_cache.lookup("Heat") == (True, {"Title": "Heat"})
+
+
+def test_the_least_recently_used_entry_gets_evicted(omdb_cache, clock):
+    for title in ("Heat", "Alien", "Up"):
+        omdb_cache.store(title, {"Title": title})
+        clock.now += 1
+    assert omdb_cache.lookup("Heat")[0]
+    clock.now += 1
+
+    omdb_cache.store("Jaws", {"Title": "Jaws"})
+
+    assert omdb_cache.lookup("Alien") == (False, None)
+    assert all(omdb_cache.lookup(title)[0] for title in ("Heat", "Up", "Jaws"))
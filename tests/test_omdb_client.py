@@ -0,0 +1,87 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from movie_app.omdb_client import OmdbClient
+
+
+class FakeClock:
+    """Monotonic clock which only moves when sleep() is called"""
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def omdb_server():
+    """
+    Local OMDB stand-in, answers requests with the statuses in server.statuses (200 once they're used up)
+    and records the time of the fake clock in server.clock at every request
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            server.request_times.append(server.clock() if server.clock is not None else None)
+            status = server.statuses.pop(0) if server.statuses else 200
+            body = {"Title": "Heat", "Year": "1995"} if status == 200 else {"Error": "Try again"}
+            content = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.statuses = []
+    server.request_times = []
+    server.clock = None
+    server_thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    server_thread.start()
+    yield server
+    server.shutdown()
+    server_thread.join(timeout=10)
+
+
+def create_client(server, **kwargs) -> OmdbClient:
+    """Client sending its requests to the local server"""
+    client = OmdbClient("key", backoff_factor=0, **kwargs)
+    host, port = server.server_address
+    client.BASE_URL = f"http://{host}:{port}/"
+    return client
+
+
+def test_429_and_5xx_responses_are_retried(omdb_server):
+    omdb_server.statuses = [429, 503, 500]
+    client = create_client(omdb_server, max_retries=3)
+
+    assert client.get_movie_by_title("Heat")["Title"] == "Heat"
+    assert len(omdb_server.request_times) == 4
+
+
+def test_retries_give_up_after_max_retries(omdb_server):
+    omdb_server.statuses = [502, 504, 502]
+    client = create_client(omdb_server, max_retries=2)
+
+    assert client.get_movie_by_title("Heat") is None
+    assert len(omdb_server.request_times) == 3
+
+
+def test_requests_are_spaced_by_the_rate_limiter(omdb_server):
+    clock = FakeClock()
+    omdb_server.clock = clock
+    client = create_client(omdb_server, requests_per_second=4, clock=clock, sleep=clock.sleep)
+
+    for _ in range(4):
+        client.get_movie_by_title("Heat")
+
+    assert omdb_server.request_times == [0.0, 0.25, 0.5, 0.75]
+    assert clock.sleeps == [0.25, 0.25, 0.25]
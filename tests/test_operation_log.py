@@ -0,0 +1,77 @@
+import json
+import pytest
+from storage.operation_log import OperationLog
+from storage.storage_json import StorageJson
+
+
+MOVIES = [
+    {"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None},
+    {"title": "Alien", "year": 1979, "rating": 8.5, "poster_url": None}
+]
+
+
+@pytest.fixture
+def operation_log(tmp_path) -> OperationLog:
+    return OperationLog(str(tmp_path / "movies.json.log"))
+
+
+def replay_both(operation_log: OperationLog) -> list[dict]:
+    """Replays the log with replay() and replay_stream() and checks that both give the same movies"""
+    replayed = operation_log.replay([dict(movie) for movie in MOVIES])
+    assert list(operation_log.replay_stream(lambda: (dict(movie) for movie in MOVIES))) == replayed
+    return replayed
+
+
+def test_replay_applies_adds_deletes_and_notes(operation_log):
+    operation_log.log_add({"title": "Up", "year": 2009, "rating": 8.3, "poster_url": None})
+    operation_log.log_note("Alien", "Classic")
+    operation_log.log_delete("Heat")
+    operation_log.log_add_many([{"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None},
+                                {"title": "Alien", "year": 1979, "rating": 1.0, "poster_url": None}])
+    operation_log.log_note("Up", "Cried")
+
+    assert replay_both(operation_log) == [
+        {"title": "Alien", "year": 1979, "rating": 8.5, "poster_url": None, "note": "Classic"},
+        {"title": "Up", "year": 2009, "rating": 8.3, "poster_url": None, "note": "Cried"},
+        {"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None}
+    ]
+
+
+def test_a_truncated_last_line_is_skipped(operation_log):
+    operation_log.log_delete("Heat")
+    with open(operation_log._filepath, "a", encoding="utf-8") as log_file:
+        log_file.write('{"op": "delete", "title": "Ali')
+
+    assert [movie["title"] for movie in replay_both(operation_log)] == ["Alien"]
+
+    # The next append starts on a new line, so only the torn line is lost
+    operation_log.log_note("Alien", "Still there")
+    assert len(operation_log.read_operations()) == 2
+    assert replay_both(operation_log) == [
+        {"title": "Alien", "year": 1979, "rating": 8.5, "poster_url": None, "note": "Still there"}
+    ]
+
+
+def test_the_log_gets_compacted_once_it_crosses_its_maximum_size(tmp_path):
+    file_path = str(tmp_path / "movies.json")
+    storage = StorageJson(file_path, max_log_size=300)
+    storage.replace_movies_data(MOVIES)
+    log = OperationLog(f"{file_path}.log")
+    titles = ["Heat", "Alien"]
+
+    # Every add appends a line of about 90 bytes, the fourth one crosses the maximum size
+    while log.get_size() <= 300 - 100:
+        titles.append(f"Movie {len(titles)}")
+        storage.write_movies_data(titles[-1], 2000, 5.0, None)
+        with open(file_path, "r", encoding="utf-8") as json_file:
+            assert len(json.load(json_file)) == 2
+    titles.append("Crossing")
+    storage.write_movies_data("Crossing", 2001, 6.0, None)
+
+    assert log.get_size() == 0
+    with open(file_path, "r", encoding="utf-8") as json_file:
+        assert [movie["title"] for movie in json.load(json_file)] == titles
+    storage.update_movie_data("Heat", "After compaction")
+    assert 0 < log.get_size() <= 300
+    assert StorageJson(file_path).get_movie("Heat")["note"] == "After compaction"
+    assert [movie["title"] for movie in StorageJson(file_path).get_movies_data()] == titles
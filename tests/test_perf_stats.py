@@ -0,0 +1,89 @@
+import json
+import re
+import time
+import pytest
+from movie_app.perf_stats import PerfStats
+
+PROMETHEUS_SAMPLE = re.compile(r'^(\w+)\{(name|cache)="((?:[^"\\]|\\.)*)"\} (-?[0-9.e+-]+)$')
+
+
+class Library:
+    def __init__(self) -> None:
+        self.titles = ["Heat", "Alien"]
+
+    def count(self) -> int:
+        time.sleep(0.01)
+        return len(self.titles)
+
+    def fail(self) -> None:
+        raise ValueError("broken")
+
+    def iter_titles(self):
+        for title in self.titles:
+            time.sleep(0.01)
+            yield title
+
+
+class Cache:
+    def get_cache_stats(self) -> tuple[int, int]:
+        return 3, 1
+
+
+@pytest.fixture
+def perf_stats() -> PerfStats:
+    perf_stats = PerfStats()
+    library = Library()
+    perf_stats.instrument(library, ["count", "fail", "iter_titles", "missing"], 'lib"rary')
+    perf_stats.register_cache("omdb", Cache())
+
+    assert library.count() == 2
+    assert library.count() == 2
+    with pytest.raises(ValueError):
+        library.fail()
+    assert list(library.iter_titles()) == ["Heat", "Alien"]
+    return perf_stats
+
+
+def test_instrumented_methods_count_calls_errors_and_time(perf_stats):
+    calls = perf_stats.to_dict()["calls"]
+
+    assert set(calls) == {'lib"rary.count', 'lib"rary.fail', 'lib"rary.iter_titles'}
+    assert (calls['lib"rary.count']["count"], calls['lib"rary.count']["errors"]) == (2, 0)
+    assert calls['lib"rary.count']["total_seconds"] >= 0.02
+    assert calls['lib"rary.count']["max_seconds"] >= 0.01
+    assert (calls['lib"rary.fail']["count"], calls['lib"rary.fail']["errors"]) == (1, 1)
+    # Iterating the returned generator counts for the method, but not as further calls
+    assert calls['lib"rary.iter_titles']["count"] == 1
+    assert calls['lib"rary.iter_titles']["total_seconds"] >= 0.02
+    assert list(calls)[-1] == 'lib"rary.fail'
+
+
+def test_dumps_are_well_formed(perf_stats, tmp_path):
+    json_path, prometheus_path = perf_stats.dump(str(tmp_path))
+
+    with open(json_path, encoding="utf-8") as json_file:
+        assert json.load(json_file) == json.loads(json.dumps(perf_stats.to_dict()))
+
+    with open(prometheus_path, encoding="utf-8") as prometheus_file:
+        lines = prometheus_file.read().splitlines()
+    described_metrics = {}
+    samples = {}
+    help_metric_name = None
+    for line in lines:
+        if line.startswith("# HELP "):
+            help_metric_name = line.split()[2]
+        elif line.startswith("# TYPE "):
+            _, _, metric_name, metric_type = line.split()
+            assert metric_name == help_metric_name
+            assert metric_type in ("counter", "gauge")
+            described_metrics[metric_name] = metric_type
+        else:
+            match = PROMETHEUS_SAMPLE.match(line)
+            assert match, line
+            assert match.group(1) in described_metrics
+            samples[match.group(1), match.group(3)] = float(match.group(4))
+
+    assert samples["movie_app_calls_total", 'lib\\"rary.count'] == 2
+    assert samples["movie_app_call_errors_total", 'lib\\"rary.fail'] == 1
+    assert samples["movie_app_cache_hits_total", "omdb"] == 3
+    assert samples["movie_app_cache_misses_total", "omdb"] == 1
@@ -0,0 +1,50 @@
+import os
+import pytest
+from movie_app.poster_mirror import PosterMirror
+from movie_app.website_generator import WebsiteGenerator
+
+
+HTML_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "static", "index_template.html")
+
+
+class StubResponse:
+    """Response of a poster download with the URL as content"""
+    def __init__(self, url: str) -> None:
+        self.content = url.encode()
+        self.headers = {"Content-Type": "image/jpeg"}
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+@pytest.fixture
+def poster_mirror(tmp_path, monkeypatch) -> PosterMirror:
+    """Mirror into tmp_path whose downloads are answered by StubResponse"""
+    poster_mirror = PosterMirror(str(tmp_path), max_workers=2)
+    monkeypatch.setattr(poster_mirror._session, "get", lambda url, timeout: StubResponse(url))
+    return poster_mirror
+
+
+def test_a_failing_poster_falls_back_to_its_remote_url(poster_mirror, tmp_path, monkeypatch):
+    write_file = poster_mirror._write_file
+
+    def write_file_or_fail(relative_path: str, content: bytes) -> None:
+        if content == b"https://posters/broken.jpg":
+            raise PermissionError("Permission denied")
+        write_file(relative_path, content)
+
+    monkeypatch.setattr(poster_mirror, "_write_file", write_file_or_fail)
+    poster_urls = ["https://posters/broken.jpg", "https://posters/fine.jpg"]
+
+    assert poster_mirror.mirror(poster_urls) == (1, 1)
+    assert poster_mirror.get_local_poster("https://posters/broken.jpg") is None
+    assert poster_mirror.get_local_poster("https://posters/fine.jpg") is not None
+
+    movies = [{"title": f"Movie {number}", "year": 2000, "rating": 5.0, "poster_url": poster_url}
+              for number, poster_url in enumerate(poster_urls)]
+    output_path = tmp_path / "index.html"
+    WebsiteGenerator(movies, HTML_TEMPLATE_PATH, str(output_path), poster_mirror).generate_website()
+    html = output_path.read_text()
+    assert 'src="https://posters/broken.jpg"' in html
+    assert 'src="https://posters/fine.jpg"' not in html
@@ -0,0 +1,44 @@
+import random
+from fractions import Fraction
+from storage.rating_stats import RatingStats
+
+
+def exact_average(ratings: list[float]) -> float:
+    return float(sum(map(Fraction, ratings)) / len(ratings))
+
+
+def test_averages_dont_drift_after_many_add_remove_cycles():
+    generator = random.Random(42)
+    movies = {f"Movie {index}": (1950 + index % 50, round(generator.uniform(1, 10), 1)) for index in range(200)}
+    titles = list(movies)
+    rating_stats = RatingStats(titles, [movies[title][0] for title in titles], [movies[title][1] for title in titles])
+
+    for cycle in range(5000):
+        title = generator.choice(titles)
+        year, rating = movies[title]
+        rating_stats.remove(title, year, rating)
+        movies[title] = (year, round(generator.uniform(1, 10), 1) if cycle % 2 else rating * 1e15)
+        rating_stats.add(title, *movies[title])
+    for title in titles:
+        year, rating = movies[title]
+        if rating > 10:
+            rating_stats.remove(title, year, rating)
+            movies[title] = (year, 5.5)
+            rating_stats.add(title, year, 5.5)
+
+    summary = rating_stats.get_summary()
+    assert summary["count"] == 200
+    assert summary["average"] == exact_average([rating for _, rating in movies.values()])
+    for decade, (count, average) in summary["per_decade"].items():
+        decade_ratings = [rating for year, rating in movies.values() if year // 10 * 10 == decade]
+        assert (count, average) == (len(decade_ratings), exact_average(decade_ratings))
+
+
+def test_summary_of_an_emptied_index_is_none():
+    rating_stats = RatingStats(["A", "B"], [1999, 2001], [7.5, 8.0])
+    rating_stats.remove("A", 1999, 7.5)
+    rating_stats.remove("B", 2001, 8.0)
+    assert rating_stats.get_summary() is None
+
+    rating_stats.add("C", 1985, 0.1)
+    assert rating_stats.get_summary()["per_decade"] == {1980: (1, 0.1)}
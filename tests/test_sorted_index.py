@@ -0,0 +1,48 @@
+from storage.sorted_index import SortedIndex
+
+RATINGS = [8.0, 7.5, 8.0, 9.0, 7.5, 8.0, 6.0]
+
+
+def create_index() -> SortedIndex:
+    return SortedIndex([(rating, position, f"Movie {position}") for position, rating in enumerate(RATINGS)])
+
+
+def sorted_titles(low=None, high=None, reverse: bool = False) -> list[str]:
+    positions = [position for position, rating in enumerate(RATINGS)
+                 if (low is None or rating >= low) and (high is None or rating <= high)]
+    return [f"Movie {position}" for position in sorted(positions, key=lambda position: RATINGS[position],
+                                                        reverse=reverse)]
+
+
+def test_ranges_are_inclusive_and_ties_keep_their_position():
+    sorted_index = create_index()
+
+    assert list(sorted_index.iter_range()) == sorted_titles()
+    assert list(sorted_index.iter_range(7.5, 8.0)) == sorted_titles(7.5, 8.0)
+    assert list(sorted_index.iter_range(low=8.0)) == ["Movie 0", "Movie 2", "Movie 5", "Movie 3"]
+    assert list(sorted_index.iter_range(high=7.5)) == ["Movie 6", "Movie 1", "Movie 4"]
+    assert list(sorted_index.iter_range(8.5, 8.9)) == []
+    assert list(sorted_index.iter_range(9.0, 6.0)) == []
+    assert sorted_index.count_range(7.5, 8.0) == 5
+    assert sorted_index.count_range(9.0, 6.0) == 0
+
+
+def test_descending_order_matches_a_stable_reverse_sort():
+    sorted_index = create_index()
+
+    assert list(sorted_index.iter_range(descending=True)) == sorted_titles(reverse=True)
+    assert list(sorted_index.iter_range(7.5, 8.0, descending=True)) == sorted_titles(7.5, 8.0, reverse=True)
+    assert list(sorted_index.iter_range(7.5, 8.0, descending=True)) == [
+        "Movie 0", "Movie 2", "Movie 5", "Movie 1", "Movie 4"
+    ]
+
+
+def test_add_and_remove_keep_the_order():
+    sorted_index = create_index()
+    sorted_index.remove(8.0, 2)
+    sorted_index.remove(8.0, 42)
+    sorted_index.add(8.0, 1, "Inserted")
+
+    assert len(sorted_index) == 7
+    assert list(sorted_index.iter_range(8.0, 8.0)) == ["Movie 0", "Inserted", "Movie 5"]
+    assert list(sorted_index.iter_range(8.0, 8.0, descending=True)) == ["Movie 0", "Inserted", "Movie 5"]
@@ -0,0 +1,44 @@
+import struct
+from storage.storage_binary import HEADER, MAGIC, BinarySnapshot, StorageBinary, write_snapshot
+
+
+def test_snapshots_of_version_1_can_still_be_read(tmp_path):
+    file_path = tmp_path / "movies.mvdb"
+    strings = "Heat".encode()
+    record = struct.pack("<IIIIIIHd", 0, len(strings), 0, 0xFFFFFFFF, 0, 0xFFFFFFFF, 1995, 8.3)
+    file_path.write_bytes(HEADER.pack(MAGIC, 1, 1, 1, HEADER.size, HEADER.size + len(record), len(strings))
+                          + record + strings)
+
+    with BinarySnapshot(str(file_path)) as snapshot:
+        assert snapshot.load_movies() == [{"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None}]
+        assert list(snapshot.iter_movies()) == snapshot.load_movies()
+
+
+def test_non_ascii_titles_round_trip(tmp_path):
+    file_path = str(tmp_path / "movies.mvdb")
+    movies = [
+        {"title": "Amélie", "year": 2001, "rating": 8.3, "poster_url": None, "note": "Très bien"},
+        {"title": "千と千尋の神隠し", "year": 2001, "rating": 8.6, "poster_url": "https://example.com/🐉.jpg"},
+        {"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": "", "note": ""}
+    ]
+
+    assert write_snapshot(file_path, movies) == 3
+    with BinarySnapshot(file_path) as snapshot:
+        assert snapshot.load_movies() == movies
+        assert [snapshot.get_movie(index) for index in range(len(snapshot))] == movies
+    assert StorageBinary(file_path).get_movies_data() == movies
+
+
+def test_snapshots_with_an_empty_string_table_round_trip(tmp_path):
+    file_path = str(tmp_path / "movies.mvdb")
+    movies = [{"title": "", "year": 2020, "rating": 5.0, "poster_url": None}]
+
+    write_snapshot(file_path, movies)
+    with BinarySnapshot(file_path) as snapshot:
+        assert snapshot.load_movies() == movies
+        assert list(snapshot.iter_movies()) == movies
+
+    write_snapshot(file_path, [])
+    with BinarySnapshot(file_path) as snapshot:
+        assert len(snapshot) == 0
+        assert snapshot.load_movies() == []
@@ -0,0 +1,39 @@
+import pytest
+from storage.storage_binary import StorageBinary
+from storage.storage_cache import StorageCache
+from storage.storage_csv import StorageCSV
+from storage.storage_json import StorageJson
+from storage.storage_sqlite import StorageSQLite
+
+
+@pytest.mark.parametrize("storage_class, extension", [(StorageJson, ".json"), (StorageCSV, ".csv")])
+def test_deleting_the_last_movie_matches_the_storage(tmp_path, storage_class, extension):
+    file_path = str(tmp_path / f"movies{extension}")
+    storage_class(file_path).replace_movies_data([
+        {"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None}
+    ])
+    cache = StorageCache(storage_class(file_path))
+    assert cache.count_movies() == 1
+
+    cache.delete_movie_data("Heat")
+
+    cached_titles = [movie["title"] for movie in cache.get_movies_data()]
+    assert cached_titles == [movie["title"] for movie in storage_class(file_path).get_movies_data()]
+    assert cached_titles == ["Fight Club"]
+
+
+@pytest.mark.parametrize("storage_class, extension", [
+    (StorageJson, ".json"), (StorageCSV, ".csv"), (StorageBinary, ".mvdb"), (StorageSQLite, ".sqlite")
+])
+def test_years_outside_of_16_bit_can_be_written_and_reloaded(tmp_path, storage_class, extension):
+    file_path = str(tmp_path / f"movies{extension}")
+    cache = StorageCache(storage_class(file_path))
+
+    cache.write_movies_data("Future", 70000, 7.0, "u")
+    cache.write_movies_data("Ancient", -500, 6.0, "u")
+
+    reloaded = StorageCache(storage_class(file_path))
+    assert reloaded.get_movie("Future")["year"] == 70000
+    assert reloaded.get_movie("Ancient")["year"] == -500
+    assert [movie["title"] for movie in reloaded.query(year_range=(60000, None))] == ["Future"]
+    assert reloaded.describe_ratings() is not None
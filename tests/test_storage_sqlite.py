@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import pytest
+from storage.storage_sqlite import StorageSQLite
+
+
+@pytest.fixture
+def database_path(tmp_path) -> str:
+    """Path of a SQLite database with two movies"""
+    file_path = str(tmp_path / "movies.sqlite")
+    StorageSQLite(file_path).replace_movies_data([
+        {"title": "Heat", "year": 1995, "rating": 8.3, "poster_url": None},
+        {"title": "Alien", "year": 1979, "rating": 8.5, "poster_url": None, "note": "Classic"}
+    ])
+    return file_path
+
+
+def test_locked_database_is_not_treated_as_corrupt(database_path):
+    blocker = sqlite3.connect(database_path)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            StorageSQLite(database_path, timeout=0.1).get_movies_data()
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+    assert not os.path.exists(f"{database_path}.corrupt")
+    assert [movie["title"] for movie in StorageSQLite(database_path).get_movies_data()] == ["Heat", "Alien"]
+
+
+def test_corrupt_file_is_moved_aside(tmp_path):
+    file_path = tmp_path / "movies.sqlite"
+    file_path.write_bytes(b"this is not a database" * 100)
+
+    movies = StorageSQLite(str(file_path)).get_movies_data()
+
+    assert [movie["title"] for movie in movies] == ["Fight Club"]
+    assert (tmp_path / "movies.sqlite.corrupt").read_bytes().startswith(b"this is not a database")
+
+
+def test_reads_only_validate_after_the_file_changed(database_path, monkeypatch):
+    storage = StorageSQLite(database_path)
+    storage.get_movie("Heat")
+    validations = []
+    original_validate_data = storage.validate_data
+    monkeypatch.setattr(storage, "validate_data", lambda: validations.append(True) or original_validate_data())
+
+    assert storage.get_movie("heat")["title"] == "Heat"
+    assert storage.count_movies() == 2
+    assert validations == []
+
+    other_storage = StorageSQLite(database_path)
+    other_storage.delete_movie_data("Heat")
+    other_storage.delete_movie_data("Alien")
+    assert storage.get_movie("Fight Club") is not None
+    assert validations == [True]
+
+
+def test_titles_are_matched_case_folded_like_in_the_other_storages(database_path):
+    storage = StorageSQLite(database_path)
+    storage.write_movies_data("Ébène", 2001, 7.0, None)
+    storage.write_movies_data("ébène", 2002, 6.0, None)
+    storage.write_movies_data("Straße", 2003, 5.0, None)
+
+    assert storage.get_movie("ÉBÈNE")["year"] == 2001
+    assert storage.get_movie("STRASSE")["title"] == "Straße"
+    storage.update_movie_data("ébène", "Seen")
+    assert storage.get_movie("Ébène")["note"] == "Seen"
+    storage.delete_movie_data("ÉBÈNE")
+    assert [movie["title"] for movie in storage.get_movies_data()] == ["Heat", "Alien", "Straße"]
+
+
+def test_databases_without_title_keys_get_them_added(tmp_path):
+    file_path = str(tmp_path / "old.sqlite")
+    connection = sqlite3.connect(file_path)
+    with connection:
+        connection.execute("CREATE TABLE movies (id INTEGER PRIMARY KEY, title TEXT NOT NULL COLLATE NOCASE,"
+                           " year INTEGER NOT NULL, rating REAL NOT NULL, poster_url TEXT, note TEXT)")
+        connection.execute("CREATE UNIQUE INDEX idx_movies_title ON movies (title)")
+        connection.executemany("INSERT INTO movies (title, year, rating) VALUES (?, ?, ?)",
+                               [("Ébène", 2001, 7.0), ("ébène", 2002, 6.0), ("Heat", 1995, 8.3)])
+    connection.close()
+
+    storage = StorageSQLite(file_path)
+    assert [movie["title"] for movie in storage.get_movies_data()] == ["Ébène", "Heat"]
+    assert storage.get_movie("ÉBÈNE")["year"] == 2001
+    storage.write_movies_data("ÉBÈNE", 2005, 5.0, None)
+    assert storage.count_movies() == 2
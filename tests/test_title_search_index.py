@@ -0,0 +1,47 @@
+import pytest
+from storage import title_search_index
+from storage.title_search_index import TitleSearchIndex, approximate_substring_distance
+from tests.helpers import generate_movies
+
+
+@pytest.fixture(scope="module")
+def large_index() -> TitleSearchIndex:
+    """Search index over 100k synthetic titles"""
+    return TitleSearchIndex([movie["title"] for movie in generate_movies(100000, seed=1)])
+
+
+@pytest.fixture
+def compared_titles(monkeypatch) -> list[str]:
+    """Records the titles compared by edit distance"""
+    titles = []
+
+    def counting_distance(search_term: str, text: str, max_distance: int|None = None) -> int:
+        titles.append(text)
+        return approximate_substring_distance(search_term, text, max_distance)
+    monkeypatch.setattr(title_search_index, "approximate_substring_distance", counting_distance)
+    return titles
+
+
+@pytest.mark.parametrize("search_term", ["nigth", "godfater", "nihgt reiver", "xyz"])
+def test_typo_tolerant_search_scans_a_bounded_number_of_candidates(large_index, compared_titles, search_term):
+    large_index.search_typo_tolerant(search_term, max_candidates=500)
+
+    assert len(compared_titles) <= 500
+
+
+def test_typo_tolerant_search_finds_misspelled_titles(large_index, compared_titles):
+    matches = large_index.search_typo_tolerant("nihgt reiver")
+
+    assert matches and all("night river" in title for title in matches)
+
+
+@pytest.mark.parametrize("search_term, text, distance", [
+    ("godfater", "the godfather", 1),
+    ("heat", "heat", 0),
+    ("", "heat", 0),
+    ("heat", "", 4),
+    ("nihgt", "night river", 2)
+])
+def test_approximate_substring_distance(search_term, text, distance):
+    assert approximate_substring_distance(search_term, text) == distance
+    assert approximate_substring_distance(search_term, text, max_distance=0) == min(distance, 1)
@@ -0,0 +1,117 @@
+import os
+import subprocess
+import sys
+import pytest
+from movie_app import website_generator
+from movie_app.website_generator import MIN_PARALLEL_MOVIES, WebsiteGenerator
+from storage.storage_cache import StorageCache
+from storage.storage_json import StorageJson
+from tests.helpers import generate_movies
+
+
+HTML_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "static", "index_template.html")
+
+
+@pytest.fixture
+def storage(tmp_path) -> StorageCache:
+    """Cached JSON storage with 200 movies"""
+    file_path = str(tmp_path / "movies.json")
+    StorageJson(file_path).replace_movies_data([
+        {"title": f"Movie {number:03}", "year": 1950 + number % 70, "rating": 5.0, "poster_url": None}
+        for number in range(200)
+    ])
+    return StorageCache(StorageJson(file_path))
+
+
+def generate_from_scratch(storage: StorageCache, output_path: str) -> str:
+    """Generates the website with a new generator and returns its content"""
+    WebsiteGenerator([], HTML_TEMPLATE_PATH, output_path).generate_website(storage.get_movies_data())
+    with open(output_path, "r") as output_file:
+        return output_file.read()
+
+
+def test_updates_match_a_full_generation(storage, tmp_path):
+    output_path = str(tmp_path / "index.html")
+    generator = WebsiteGenerator([], HTML_TEMPLATE_PATH, output_path)
+    assert generator.update_website(storage)
+
+    storage.write_movies_data("New Movie", 2020, 7.5, None)
+    storage.update_movie_data("Movie 010", "Seen twice")
+    storage.delete_movie_data("Movie 020")
+    storage.delete_movie_data("Movie 030")
+    storage.write_movies_data("Movie 030", 1980, 6.0, None)
+    storage.write_movies_data("Gone Again", 2001, 4.0, None)
+    storage.delete_movie_data("Gone Again")
+    assert generator.update_website(storage)
+
+    with open(output_path, "r") as output_file:
+        assert output_file.read() == generate_from_scratch(storage, str(tmp_path / "expected.html"))
+
+
+def test_an_edit_only_reads_the_changed_movie(storage, tmp_path, monkeypatch):
+    generator = WebsiteGenerator([], HTML_TEMPLATE_PATH, str(tmp_path / "index.html"))
+    generator.update_website(storage)
+    looked_up_titles = []
+    get_movie = storage.get_movie
+    monkeypatch.setattr(storage, "get_movie", lambda title: looked_up_titles.append(title) or get_movie(title))
+    monkeypatch.setattr(storage, "get_movies_data", lambda: pytest.fail("All movies were read"))
+
+    storage.update_movie_data("Movie 100", "Changed")
+    assert generator.update_website(storage)
+    assert looked_up_titles == ["movie 100"]
+    assert not generator.update_website(storage)
+
+
+def test_changes_of_other_processes_are_picked_up(storage, tmp_path):
+    output_path = str(tmp_path / "index.html")
+    generator = WebsiteGenerator([], HTML_TEMPLATE_PATH, output_path)
+    generator.update_website(storage)
+
+    StorageJson(str(tmp_path / "movies.json")).update_movie_data("Movie 005", "Written by another process")
+
+    assert generator.update_website(storage)
+    with open(output_path, "r") as output_file:
+        assert "Written by another process" in output_file.read()
+
+
+def test_generating_doesnt_import_requests():
+    code = ("import sys; from movie_app.website_generator import WebsiteGenerator; "
+            "assert 'requests' not in sys.modules and 'movie_app.poster_mirror' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.dirname(HTML_TEMPLATE_PATH)))
+
+
+@pytest.mark.parametrize("shard_by", [None, "decade"])
+def test_switching_to_a_single_page_deletes_the_pages(storage, tmp_path, shard_by):
+    site_directory = tmp_path / "site"
+    site_directory.mkdir()
+    output_path = str(site_directory / "index.html")
+    WebsiteGenerator([], HTML_TEMPLATE_PATH, output_path).generate_pages(storage.iter_movies(), 50, shard_by)
+    assert len(list(site_directory.iterdir())) > 3
+
+    WebsiteGenerator([], HTML_TEMPLATE_PATH, output_path).update_website(storage)
+
+    assert [path.name for path in site_directory.iterdir()] == ["index.html"]
+    with open(output_path, "r") as output_file:
+        assert output_file.read() == generate_from_scratch(storage, str(tmp_path / "expected.html"))
+
+
+def test_parallel_rendering_matches_the_serial_one(tmp_path, monkeypatch):
+    movies = generate_movies(MIN_PARALLEL_MOVIES + 500)
+    movies[7]["title"] = "Amélie & <Friends>"
+    movies[8]["poster_url"] = None
+    executors = []
+
+    class RecordingExecutor(website_generator.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs) -> None:
+            executors.append(kwargs.get("max_workers"))
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(website_generator, "ProcessPoolExecutor", RecordingExecutor)
+
+    WebsiteGenerator([], HTML_TEMPLATE_PATH, str(tmp_path / "serial.html")).generate_website(movies)
+    assert executors == []
+    WebsiteGenerator([], HTML_TEMPLATE_PATH, str(tmp_path / "parallel.html"),
+                     render_workers=2).generate_website(movies)
+    assert executors == [2]
+
+    assert (tmp_path / "parallel.html").read_bytes() == (tmp_path / "serial.html").read_bytes()